@@ -0,0 +1,72 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Structured logging helpers for the Barbican client.
+
+Events are logged as a name followed by key=value fields.  Nothing is
+formatted unless a handler emits the record, and secret material such as
+payloads and pass phrases is redacted from the fields.
+"""
+import logging
+
+
+REDACTED = '<redacted>'
+_SENSITIVE_KEYS = frozenset(['payload', 'pass_phrase'])
+
+
+def redact(value):
+    """Returns a copy of value with its sensitive dict entries redacted."""
+    if isinstance(value, dict):
+        return dict(
+            (k, REDACTED if k in _SENSITIVE_KEYS and v is not None
+             else redact(v))
+            for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+class _Event(object):
+
+    __slots__ = ('name', 'fields')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self):
+        fields = redact(self.fields)
+        return ' '.join([self.name] + [
+            '{0}={1}'.format(key, fields[key]) for key in sorted(fields)
+        ])
+
+
+def log(logger, level, event, **fields):
+    """
+    Logs an event with its fields if the logger is enabled for level.
+
+    The record message is formatted when it is emitted.  The event name and
+    the redacted fields are also set on the record as barbican_event and
+    barbican_fields for structured handlers.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, _Event(event, fields), extra={
+            'barbican_event': event,
+            'barbican_fields': redact(fields),
+        })
+
+
+def debug(logger, event, **fields):
+    """Logs an event at DEBUG level, see log()."""
+    log(logger, logging.DEBUG, event, **fields)
@@ -0,0 +1,371 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Asyncio bindings for the Barbican client.
+
+The keystone Session used by :class:`barbicanclient.client.Client` is a
+blocking transport, so the AsyncClient dispatches every request to a bounded
+executor owned by the client and hands back asyncio futures.
+
+Entities returned by get() have their metadata loaded inside the executor,
+but some properties are still fetched lazily, by a blocking request, the
+first time they are read:
+
+* the payload of a secret retrieved without ``payload=True``,
+* the status and timestamps of a secret after ``await secret.store()``,
+* the member secrets of a container, such as ``container.certificate``.
+
+Await :meth:`AsyncEntity.load` first to retrieve them inside the executor
+instead of blocking the event loop.
+
+This module requires Python 3.5 or later.
+"""
+import asyncio
+from concurrent import futures
+import logging
+
+from barbicanclient import base
+from barbicanclient import client
+from barbicanclient import containers
+from barbicanclient import secrets
+
+
+LOG = logging.getLogger(__name__)
+_DEFAULT_MAX_WORKERS = 10
+_DEFAULT_PAGE_SIZE = 100
+
+
+def _unwrap(value):
+    if isinstance(value, AsyncEntity):
+        return value.entity
+    if isinstance(value, dict):
+        return dict((k, _unwrap(v)) for k, v in value.items())
+    return value
+
+
+def _unwrap_all(args, kwargs):
+    return (tuple(_unwrap(a) for a in args),
+            dict((k, _unwrap(v)) for k, v in kwargs.items()))
+
+
+def _load_secret(secret, payload):
+    if secret.secret_ref and secret._status is None:
+        with secret._lock:
+            if secret._status is None:
+                secret._load_metadata()
+    if payload:
+        secret.payload
+
+
+class AsyncEntity(object):
+    """
+    Wraps a Secret, Container or Order so its remote operations are awaitable.
+
+    Attribute access is passed through to the wrapped entity, so the usual
+    properties, setters and formatters keep working.  Properties that are not
+    loaded yet are fetched by a blocking request; see :meth:`load`.
+    """
+
+    def __init__(self, entity, dispatch):
+        object.__setattr__(self, '_entity', entity)
+        object.__setattr__(self, '_dispatch', dispatch)
+
+    @property
+    def entity(self):
+        return self._entity
+
+    def store(self):
+        return self._dispatch(self._entity.store)
+
+    def submit(self):
+        return self._dispatch(self._entity.submit)
+
+    def delete(self):
+        return self._dispatch(self._entity.delete)
+
+    def load(self, payload=False):
+        """
+        Retrieves the lazily loaded properties inside the executor
+
+        For a secret this is its metadata, reloaded when the secret was just
+        stored, and for a container the metadata of its member secrets.
+
+        :param payload: If True the decrypted payloads are retrieved as well
+        :returns: awaitable for this AsyncEntity
+        """
+        return self._dispatch(self._load, payload)
+
+    def _load(self, payload):
+        entity = self._entity
+        if isinstance(entity, secrets.Secret):
+            _load_secret(entity, payload)
+        elif isinstance(entity, containers.Container):
+            entity.load(payloads=payload)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._entity, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._entity, name, _unwrap(value))
+
+    def __str__(self):
+        return str(self._entity)
+
+    def __repr__(self):
+        return 'Async{0}'.format(repr(self._entity))
+
+
+class AsyncListIterator(object):
+    """
+    Asynchronous iterator that pages through a manager listing.
+
+    One page is requested at a time; items are yielded from the buffered page
+    without going back to the executor.
+    """
+
+    def __init__(self, async_manager, page_size, filters):
+        self._manager = async_manager
+        self._page_size = max(min(page_size, base.MAX_PAGE_SIZE), 1)
+        self._filters = filters
+        self._offset = 0
+        self._buffer = []
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self._buffer:
+            return self._done(self._buffer.pop(0))
+        if self._exhausted:
+            return self._done(exception=StopAsyncIteration())
+        return self._manager._dispatch(self._next_page)
+
+    def _next_page(self):
+        page = self._manager._manager.list(
+            limit=self._page_size, offset=self._offset, **self._filters
+        )
+        self._offset += len(page)
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if not page:
+            raise StopAsyncIteration()
+        self._buffer = [self._manager._wrap(e) for e in page[1:]]
+        return self._manager._wrap(page[0])
+
+    def _done(self, result=None, exception=None):
+        future = asyncio.get_event_loop().create_future()
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+        return future
+
+
+class _AsyncEntityManager(object):
+
+    def __init__(self, manager, executor):
+        self._manager = manager
+        self._executor = executor
+
+    def _dispatch(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return asyncio.wrap_future(
+            self._executor.submit(func, *args, **kwargs), loop=loop
+        )
+
+    def _wrap(self, entity):
+        return AsyncEntity(entity, self._dispatch)
+
+    def _get_and_wrap(self, func, *args, **kwargs):
+        return self._wrap(func(*args, **kwargs))
+
+    def _list_and_wrap(self, *args, **kwargs):
+        return [self._wrap(e) for e in self._manager.list(*args, **kwargs)]
+
+    def list(self, *args, **kwargs):
+        """
+        List entities for the project
+
+        Takes the same arguments as the list() method of the synchronous
+        manager.
+
+        :returns: awaitable list of AsyncEntity objects
+        """
+        return self._dispatch(self._list_and_wrap, *args, **kwargs)
+
+    def iter_all(self, page_size=_DEFAULT_PAGE_SIZE, **filters):
+        """
+        Iterate over every entity for the project with ``async for``
+
+        :param page_size: Number of entities requested per page, at most
+            Barbican's maximum of 100
+        :param filters: Filters understood by the synchronous list() method
+        :returns: AsyncListIterator
+        """
+        return AsyncListIterator(self, page_size, filters)
+
+    def delete(self, ref):
+        """
+        Delete an entity by its reference
+
+        :returns: awaitable that completes once the entity is deleted
+        """
+        return self._dispatch(self._manager.delete, ref)
+
+    def total(self):
+        """
+        Returns an awaitable for the total number of entities stored in
+        Barbican.
+        """
+        return self._dispatch(self._manager.total)
+
+
+class AsyncSecretManager(_AsyncEntityManager):
+
+    def get(self, secret_ref, payload_content_type=None, payload=False):
+        """
+        Get a Secret with its metadata loaded
+
+        :param secret_ref: Full HATEOAS reference to a Secret
+        :param payload_content_type: Content type to use for payload decryption
+        :param payload: If True the decrypted payload is retrieved as well
+        :returns: awaitable AsyncEntity wrapping a Secret
+        """
+        return self._dispatch(self._get_and_wrap, self._load, secret_ref,
+                              payload_content_type, payload)
+
+    def _load(self, secret_ref, payload_content_type, payload):
+        secret = self._manager.get(secret_ref,
+                                   payload_content_type=payload_content_type)
+        _load_secret(secret, payload)
+        return secret
+
+    def create(self, *args, **kwargs):
+        """
+        Create a Secret
+
+        Takes the same arguments as
+        :meth:`barbicanclient.secrets.SecretManager.create`.
+
+        :returns: AsyncEntity wrapping a Secret with an awaitable store()
+        """
+        return self._wrap(self._manager.create(*args, **kwargs))
+
+
+class AsyncContainerManager(_AsyncEntityManager):
+
+    def get(self, container_ref):
+        """
+        Get a Container
+
+        :param container_ref: Full HATEOAS reference to a Container
+        :returns: awaitable AsyncEntity wrapping a Container or a subclass
+        """
+        return self._dispatch(self._get_and_wrap, self._manager.get,
+                              container_ref)
+
+    def create(self, *args, **kwargs):
+        """
+        Create a Container
+
+        :returns: AsyncEntity wrapping a Container with an awaitable store()
+        """
+        args, kwargs = _unwrap_all(args, kwargs)
+        return self._wrap(self._manager.create(*args, **kwargs))
+
+    def create_rsa(self, *args, **kwargs):
+        """
+        Create an RSAContainer
+
+        :returns: AsyncEntity wrapping an RSAContainer
+        """
+        args, kwargs = _unwrap_all(args, kwargs)
+        return self._wrap(self._manager.create_rsa(*args, **kwargs))
+
+    def create_certificate(self, *args, **kwargs):
+        """
+        Create a CertificateContainer
+
+        :returns: AsyncEntity wrapping a CertificateContainer
+        """
+        args, kwargs = _unwrap_all(args, kwargs)
+        return self._wrap(self._manager.create_certificate(*args, **kwargs))
+
+
+class AsyncOrderManager(_AsyncEntityManager):
+
+    def get(self, order_ref):
+        """
+        Get an Order
+
+        :param order_ref: Full HATEOAS reference to an Order
+        :returns: awaitable AsyncEntity wrapping the appropriate Order subtype
+        """
+        return self._dispatch(self._get_and_wrap, self._manager.get,
+                              order_ref)
+
+    def create_key(self, *args, **kwargs):
+        """
+        Create an Order for a Symmetric Key
+
+        :returns: AsyncEntity wrapping a KeyOrder with an awaitable submit()
+        """
+        return self._wrap(self._manager.create_key(*args, **kwargs))
+
+    def create_asymmetric(self, *args, **kwargs):
+        """
+        Create an Order for an Asymmetric Key
+
+        :returns: AsyncEntity wrapping an AsymmetricOrder
+        """
+        return self._wrap(self._manager.create_asymmetric(*args, **kwargs))
+
+
+class AsyncClient(object):
+
+    def __init__(self, max_workers=_DEFAULT_MAX_WORKERS, executor=None,
+                 **kwargs):
+        """
+        Barbican client object whose operations return asyncio awaitables.
+
+        :param max_workers: Maximum number of requests in flight at once.
+            Ignored when an executor is given.
+        :param executor: A concurrent.futures.Executor used to run requests.
+            When not provided the client creates and owns a thread pool.
+        :param kwargs: Any argument accepted by
+            :class:`barbicanclient.client.Client`.  thread_safe defaults to
+            True, since the entities are used from the executor threads.
+        """
+        LOG.debug("Creating AsyncClient object")
+        kwargs.setdefault('thread_safe', True)
+        self._client = client.Client(**kwargs)
+        self._owns_executor = executor is None
+        self._executor = executor or futures.ThreadPoolExecutor(max_workers)
+
+        self.secrets = AsyncSecretManager(self._client.secrets,
+                                          self._executor)
+        self.orders = AsyncOrderManager(self._client.orders, self._executor)
+        self.containers = AsyncContainerManager(self._client.containers,
+                                                self._executor)
+
+    @property
+    def client(self):
+        """The synchronous Client used to perform the requests."""
+        return self._client
+
+    def close(self):
+        """Release the executor owned by this client."""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
@@ -138,10 +138,10 @@ class Barbican(app.App):
                 raise Exception(
                     'ERROR: please specify --endpoint and '
                     '--os-project-id(or --os-tenant-id)')
-            self.client = client.Client(endpoint=args.endpoint,
-                                        project_id=args.os_tenant_id or
-                                        args.os_project_id,
-                                        verify=not args.insecure)
+            self._client_kwargs = dict(endpoint=args.endpoint,
+                                       project_id=args.os_tenant_id or
+                                       args.os_project_id,
+                                       verify=not args.insecure)
         elif all([args.os_auth_url, args.os_user_id or args.os_username,
                   args.os_password, args.os_tenant_name or args.os_tenant_id or
                   args.os_project_name or args.os_project_id]):
@@ -177,11 +177,22 @@ class Barbican(app.App):
                 auth = identity.v2.Password(**kwargs)
 
             ks_session = session.Session(auth=auth, verify=not args.insecure)
-            self.client = client.Client(session=ks_session,
-                                        endpoint=args.endpoint)
+            self._client_kwargs = dict(session=ks_session,
+                                       endpoint=args.endpoint)
         else:
             self.stderr.write(self.parser.format_usage())
             raise Exception('ERROR: please specify authentication credentials')
+        self.client = self.create_client()
+
+    def create_client(self, **kwargs):
+        """Creates a client connected as configured on the command line.
+
+        Keyword arguments are passed to the client, on top of the options
+        given on the command line.
+        """
+        client_kwargs = dict(self._client_kwargs)
+        client_kwargs.update(kwargs)
+        return client.Client(**client_kwargs)
 
 
 def main(argv=sys.argv[1:]):
@@ -0,0 +1,359 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Command-line interface sub-command generating load on Barbican.
+"""
+import argparse
+import bisect
+import logging
+import math
+import random
+import threading
+import time
+
+from cliff import lister
+
+from barbicanclient import _logging
+
+
+LOG = logging.getLogger(__name__)
+
+OPERATIONS = ('secret-store', 'secret-get', 'secret-decrypt',
+              'secret-delete', 'container-create', 'container-get',
+              'order-submit')
+
+
+def parse_mix(value):
+    """Parses an operation mix such as "secret-get=3,secret-store=1"."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                'unknown operation {0}, choose from {1}'.format(
+                    name, ', '.join(OPERATIONS)))
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                'invalid weight {0} for {1}'.format(weight, name))
+        if mix[name] < 0:
+            raise argparse.ArgumentTypeError(
+                'invalid weight {0} for {1}'.format(weight, name))
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the mix has no operation')
+    return mix
+
+
+def percentile(sorted_values, percent):
+    """Returns the nearest-rank percentile of a sorted list."""
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class _RefPool(object):
+    """References of the entities created by the benchmark."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refs = []
+
+    def add(self, ref):
+        with self._lock:
+            self._refs.append(ref)
+
+    def sample(self):
+        with self._lock:
+            return random.choice(self._refs) if self._refs else None
+
+    def take(self):
+        with self._lock:
+            if not self._refs:
+                return None
+            return self._refs.pop(random.randrange(len(self._refs)))
+
+    def take_all(self):
+        with self._lock:
+            refs, self._refs = self._refs, []
+        return refs
+
+
+class Workload(object):
+    """
+    The operations of the benchmark.
+
+    Every operation prepares what it needs, such as a secret to read, and
+    returns the request to time.  Secrets are read from a pool stored
+    before the benchmark starts, while the secrets stored during the
+    benchmark are the ones deleted, so no operation reads a deleted secret.
+
+    :param client: Client sending the requests
+    :param payload: Payload of the stored secrets
+    :param seed: Number of secrets stored before the benchmark starts
+    """
+
+    def __init__(self, client, payload, seed):
+        self._client = client
+        self._payload = payload
+        self._seed = seed
+        self.secrets = _RefPool()
+        self.stored_secrets = _RefPool()
+        self.containers = _RefPool()
+        self.orders = _RefPool()
+
+    def setup(self):
+        for _ in range(self._seed):
+            self.secrets.add(self._store_secret())
+
+    def prepare(self, operation):
+        return getattr(self, '_' + operation.replace('-', '_'))()
+
+    def cleanup(self):
+        """Deletes the entities left by the benchmark."""
+        for ref in self.containers.take_all():
+            self._delete(self._client.containers, ref)
+        for ref in self.orders.take_all():
+            # The secrets generated by the orders are deleted with them
+            try:
+                secret_ref = self._client.orders.get(ref).secret_ref
+            except Exception as e:
+                self._cleanup_failed(ref, e)
+            else:
+                if secret_ref:
+                    self._delete(self._client.secrets, secret_ref)
+            self._delete(self._client.orders, ref)
+        for pool in (self.secrets, self.stored_secrets):
+            for ref in pool.take_all():
+                self._delete(self._client.secrets, ref)
+
+    def _delete(self, manager, ref):
+        try:
+            manager.delete(ref)
+        except Exception as e:
+            self._cleanup_failed(ref, e)
+
+    @staticmethod
+    def _cleanup_failed(ref, error):
+        _logging.log(LOG, logging.WARNING, 'bench.cleanup_failed', ref=ref,
+                     error=error)
+
+    def _store_secret(self):
+        return self._client.secrets.create(
+            name='barbican-bench', payload=self._payload,
+            payload_content_type='text/plain').store()
+
+    def _secret_ref(self):
+        return self.secrets.sample() or self._add(self.secrets,
+                                                  self._store_secret())
+
+    def _container_ref(self):
+        return self.containers.sample() or self._container_create()()
+
+    @staticmethod
+    def _add(pool, ref):
+        pool.add(ref)
+        return ref
+
+    def _secret_store(self):
+        return lambda: self.stored_secrets.add(self._store_secret())
+
+    def _secret_get(self):
+        secret_ref = self._secret_ref()
+        return lambda: self._client.secrets.get(secret_ref).name
+
+    def _secret_decrypt(self):
+        secret_ref = self._secret_ref()
+        return lambda: self._client.secrets.get(secret_ref,
+                                                'text/plain').payload
+
+    def _secret_delete(self):
+        secret_ref = self.stored_secrets.take() or self._store_secret()
+        return lambda: self._client.secrets.delete(secret_ref)
+
+    def _container_create(self):
+        secret = self._client.secrets.get(self._secret_ref())
+
+        def create():
+            container = self._client.containers.create(
+                name='barbican-bench', secrets={'secret': secret})
+            return self._add(self.containers, container.store())
+        return create
+
+    def _container_get(self):
+        container_ref = self._container_ref()
+        return lambda: self._client.containers.get(container_ref).name
+
+    def _order_submit(self):
+        order = self._client.orders.create_key(
+            name='barbican-bench', algorithm='aes', bit_length=256)
+        return lambda: self.orders.add(order.submit())
+
+
+class _Schedule(object):
+    """
+    Hands the operations out to the workers.
+
+    Operations are drawn at random according to their weights.  With a rate,
+    they are spread evenly in time and each comes with the time it is due
+    at, otherwise they are run as fast as the workers go and are due at
+    None.
+    """
+
+    def __init__(self, mix, duration, requests, rate):
+        self._operations = sorted(mix)
+        self._cumulative = []
+        total = 0
+        for name in self._operations:
+            total += mix[name]
+            self._cumulative.append(total)
+        self._total = total
+        self._requests = requests
+        self._rate = rate
+        self._lock = threading.Lock()
+        self._count = 0
+        self.start = time.time()
+        self._end = self.start + duration if duration else None
+
+    def next(self):
+        """Returns the next operation and its due time, or None when done."""
+        with self._lock:
+            if self._requests is not None and self._count >= self._requests:
+                return None
+            index = self._count
+            self._count += 1
+        due = self.start + index / self._rate if self._rate else None
+        if self._end is not None and (due or time.time()) >= self._end:
+            return None
+        position = random.random() * self._total
+        operation = self._operations[
+            bisect.bisect_right(self._cumulative, position)]
+        return operation, due
+
+
+class Bench(lister.Lister):
+    """Generate load on Barbican and report latencies per operation.
+
+    Throughput is given in successful operations per second, and the
+    latency percentiles in milliseconds.
+    """
+
+    columns = ('Operation', 'Requests', 'Errors', 'Throughput', 'p50',
+               'p95', 'p99')
+
+    def get_parser(self, prog_name):
+        parser = super(Bench, self).get_parser(prog_name)
+        parser.add_argument('--mix', '-m', type=parse_mix,
+                            default=dict((o, 1.0) for o in OPERATIONS),
+                            help='comma separated operations to run, with '
+                                 'an optional weight, such as '
+                                 '"secret-get=3,secret-store=1".  The '
+                                 'operations are {0} (default: all of them '
+                                 'evenly).'.format(', '.join(OPERATIONS)))
+        parser.add_argument('--concurrency', '-C', default=10, type=int,
+                            help='number of operations in flight at once '
+                                 '(default: %(default)s).')
+        parser.add_argument('--rate', '-r', type=float,
+                            help='target number of operations started per '
+                                 'second.  Latencies are then measured '
+                                 'from the time an operation was due, '
+                                 'including the wait for a free worker.  '
+                                 'Operations run back to back by default.')
+        parser.add_argument('--duration', '-d', default=10, type=float,
+                            help='seconds to run for (default: '
+                                 '%(default)s).')
+        parser.add_argument('--requests', '-n', type=int,
+                            help='number of operations to run, unless the '
+                                 'duration elapses first.')
+        parser.add_argument('--payload-size', '-s', default=32, type=int,
+                            help='size in bytes of the stored payloads '
+                                 '(default: %(default)s).')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='delete the secrets, containers and orders '
+                                 'created by the benchmark.')
+        return parser
+
+    def take_action(self, args):
+        # Coalescing would hide identical concurrent reads from the server
+        client = self.app.create_client(thread_safe=True,
+                                        pool_maxsize=args.concurrency,
+                                        coalesce_requests=False)
+        workload = Workload(client, 'x' * args.payload_size,
+                            seed=args.concurrency)
+        workload.setup()
+        # list.append is atomic, so the workers need no lock to record
+        results = dict((o, {'latencies': [], 'errors': []}) for o in args.mix)
+        schedule = _Schedule(args.mix, args.duration, args.requests,
+                             args.rate)
+        workers = [
+            threading.Thread(target=self._work,
+                             args=(workload, schedule, results))
+            for _ in range(args.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.time() - schedule.start
+        if args.cleanup:
+            workload.cleanup()
+        return self.columns, self._summarize(results, elapsed)
+
+    @staticmethod
+    def _work(workload, schedule, results):
+        while True:
+            task = schedule.next()
+            if task is None:
+                return
+            operation, due = task
+            result = results[operation]
+            try:
+                request = workload.prepare(operation)
+                if due is None:
+                    start = time.time()
+                else:
+                    start = due
+                    delay = due - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                request()
+                result['latencies'].append(time.time() - start)
+            except Exception as e:
+                result['errors'].append(e)
+                _logging.debug(LOG, 'bench.error', operation=operation,
+                               error=e)
+
+    def _summarize(self, results, elapsed):
+        rows = []
+        everything = {'latencies': [], 'errors': []}
+        for operation in sorted(results):
+            result = results[operation]
+            everything['latencies'].extend(result['latencies'])
+            everything['errors'].extend(result['errors'])
+            rows.append(self._row(operation, result, elapsed))
+        rows.append(self._row('all', everything, elapsed))
+        return rows
+
+    @staticmethod
+    def _row(operation, result, elapsed):
+        latencies = sorted(result['latencies'])
+        errors = len(result['errors'])
+
+        def ms(percent):
+            value = percentile(latencies, percent)
+            return None if value is None else round(value * 1000, 3)
+
+        return (operation, len(latencies) + errors, errors,
+                round(len(latencies) / elapsed, 1) if elapsed else None,
+                ms(50), ms(95), ms(99))
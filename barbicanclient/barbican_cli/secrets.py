@@ -48,17 +48,35 @@ class GetSecret(show.ShowOne):
                             default='text/plain',
                             help='the content type of the decrypted'
                                  ' secret (default: %(default)s.')
+        parser.add_argument('--file', '-F',
+                            help='with --decrypt, write the unencrypted '
+                                 'secret data to this file instead of '
+                                 'standard output.')
         return parser
 
-    def take_action(self, args):
+    def run(self, args):
         if args.decrypt:
-            entity = self.app.client.secrets.decrypt(args.URI,
-                                                     args.payload_content_type)
-            return (('Secret',),
-                    (entity,))
+            # The payload is streamed as it is, not formatted as a table
+            self._write_payload(args)
+            return 0
+        return super(GetSecret, self).run(args)
+
+    def _write_payload(self, args):
+        entity = self.app.client.secrets.get(
+            secret_ref=args.URI,
+            payload_content_type=args.payload_content_type
+        )
+        if args.file:
+            with open(args.file, 'wb') as fobj:
+                entity.payload_to_file(fobj)
         else:
-            entity = self.app.client.secrets.get(secret_ref=args.URI)
-            return entity._get_formatted_entity()
+            stdout = getattr(self.app.stdout, 'buffer', self.app.stdout)
+            entity.payload_to_file(stdout)
+            stdout.flush()
+
+    def take_action(self, args):
+        entity = self.app.client.secrets.get(secret_ref=args.URI)
+        return entity._get_formatted_entity()
 
 
 class ListSecret(lister.Lister):
@@ -15,10 +15,57 @@
 """
 Base utilities to build API operation managers.
 """
+import collections
+import datetime
+import re
+import threading
+import time
 import uuid
 
+from oslo.utils import timeutils
 import six
 
+from barbicanclient import tracing
+
+
+DEFAULT_MAX_WORKERS = 10
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+BulkResult = collections.namedtuple('BulkResult', ['ref', 'entity', 'error'])
+
+# Format of the timestamps returned by Barbican, in UTC
+_TIMESTAMP_RE = re.compile(
+    r'^(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?Z?$')
+# Same tzinfo as the timestamps parsed by oslo.utils
+_UTC = timeutils.parse_isotime('1970-01-01T00:00:00').tzinfo
+# Named tuple types used by select_fields, keyed by field names
+_ROW_TYPES = {}
+
+
+class _NoLock(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_LOCK = _NoLock()
+
+
+def entity_lock(api):
+    """
+    Returns the lock guarding the lazy loading of a new entity.
+
+    Entities of a client created with thread_safe=True get their own
+    reentrant lock, the others share a lock that does nothing.
+    """
+    if getattr(api, '_thread_safe', False) is True:
+        return threading.RLock()
+    return _NO_LOCK
+
 
 def filter_empty_keys(dictionary):
     return dict(((k, v) for k, v in dictionary.items() if v))
@@ -35,6 +82,101 @@ def validate_ref(ref, entity):
         raise ValueError('{0} incorrectly specified.'.format(entity))
 
 
+def parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp into an aware datetime.
+
+    Barbican's own format is parsed directly, anything else is handed to
+    oslo.utils.  Datetimes and empty values are returned as they are, so
+    entities keep the raw value and parse it when it is first read.
+    """
+    if not value or isinstance(value, datetime.datetime):
+        return value or None
+    match = _TIMESTAMP_RE.match(value)
+    if match is None:
+        return timeutils.parse_isotime(value)
+    year, month, day, hour, minute, second, fraction = match.groups()
+    microsecond = int(fraction.ljust(6, '0')) if fraction else 0
+    return datetime.datetime(int(year), int(month), int(day), int(hour),
+                             int(minute), int(second), microsecond,
+                             tzinfo=_UTC)
+
+
+def _get_row_type(fields):
+    row_type = _ROW_TYPES.get(fields)
+    if row_type is None:
+        row_type = collections.namedtuple('Row', fields)
+        _ROW_TYPES[fields] = row_type
+    return row_type
+
+
+def select_fields(items, fields, columnar=False):
+    """
+    Picks fields out of the entity dicts of a list response.
+
+    Values are returned as Barbican sent them, without building entities or
+    parsing timestamps.  Fields missing from an item are None.
+
+    :param items: Entity dicts from the response
+    :param fields: Names of the fields to keep
+    :param columnar: If True a dict of lists keyed by field is returned
+        instead of one named tuple per item
+    """
+    fields = tuple(fields)
+    if columnar:
+        return dict((field, [item.get(field) for item in items])
+                    for field in fields)
+    row_type = _get_row_type(fields)
+    return [row_type._make([item.get(field) for field in fields])
+            for item in items]
+
+
+def unique(items):
+    """Returns the items without duplicates, keeping their first position."""
+    seen = set()
+    return [i for i in items if not (i in seen or seen.add(i))]
+
+
+def run_concurrently(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Calls func once per item using at most max_workers threads.
+
+    Exceptions do not stop the other calls.
+
+    :returns: list of (result, exception) tuples in the order of items
+    """
+    items = list(items)
+    results = [None] * len(items)
+    work = six.moves.queue.Queue()
+    for index, item in enumerate(items):
+        work.put((index, item))
+    parent_span = tracing.current_span()
+
+    def worker():
+        with tracing.use_span(parent_span):
+            run_items()
+
+    def run_items():
+        while True:
+            try:
+                index, item = work.get_nowait()
+            except six.moves.queue.Empty:
+                return
+            try:
+                results[index] = (func(item), None)
+            except Exception as e:
+                results[index] = (None, e)
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(min(max(max_workers, 1), len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
 class ImmutableException(Exception):
     def __init__(self, attribute=None):
         message = "This object is immutable!"
@@ -46,6 +188,7 @@ class BaseEntityManager(object):
         self._api = api
         self._entity = entity
 
+    @tracing.traced
     def total(self):
         """
         Returns the total number of entities stored in Barbican.
@@ -55,3 +198,82 @@ class BaseEntityManager(object):
         resp = self._api._get(href, params)
 
         return resp['total']
+
+    def iter_all(self, page_size=DEFAULT_PAGE_SIZE, pages_in_flight=2,
+                 target_latency=0.5, **filters):
+        """
+        Iterates over every entity, following pagination automatically.
+
+        Pages are fetched by a background thread, so the next page is
+        already on its way while the caller works on the current one.  The
+        page size grows while pages come back faster than target_latency and
+        shrinks when they are slower, staying within Barbican's maximum of
+        100.
+
+        :param page_size: Number of entities requested for the first page
+        :param pages_in_flight: Maximum number of fetched pages waiting to be
+            consumed, which bounds memory use
+        :param target_latency: Seconds a page request should take, or None
+            to keep page_size fixed
+        :param filters: Filters understood by the list() method
+        :returns: generator of entities as returned by list()
+        """
+        if filters.get('columnar'):
+            raise ValueError('iter_all does not support columnar pages.')
+        pages = six.moves.queue.Queue(maxsize=max(pages_in_flight, 1))
+        stop = threading.Event()
+        fetcher = threading.Thread(
+            target=self._fetch_pages,
+            args=(pages, stop, page_size, target_latency, filters)
+        )
+        fetcher.daemon = True
+        fetcher.start()
+        try:
+            while True:
+                page, error = pages.get()
+                if error is not None:
+                    raise error
+                if page is None:
+                    return
+                for entity in page:
+                    yield entity
+        finally:
+            stop.set()
+
+    def _fetch_pages(self, pages, stop, page_size, target_latency, filters):
+        offset = 0
+        limit = max(min(page_size, MAX_PAGE_SIZE), 1)
+        try:
+            while not stop.is_set():
+                start = time.time()
+                page = self.list(limit=limit, offset=offset, **filters)
+                elapsed = time.time() - start
+                if page and not self._put_page(pages, stop, (page, None)):
+                    return
+                if len(page) < limit:
+                    break
+                offset += len(page)
+                if target_latency:
+                    limit = _adapt_page_size(limit, elapsed, target_latency)
+        except Exception as e:
+            self._put_page(pages, stop, (None, e))
+            return
+        self._put_page(pages, stop, (None, None))
+
+    @staticmethod
+    def _put_page(pages, stop, item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except six.moves.queue.Full:
+                pass
+        return False
+
+
+def _adapt_page_size(limit, elapsed, target_latency):
+    if elapsed < target_latency / 2:
+        return min(limit * 2, MAX_PAGE_SIZE)
+    if elapsed > target_latency:
+        return max(limit // 2, 1)
+    return limit
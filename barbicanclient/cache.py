@@ -0,0 +1,295 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory caches used by the Barbican client.
+"""
+import collections
+import threading
+import time
+
+import six
+
+
+CachedResponse = collections.namedtuple('CachedResponse',
+                                        ['etag', 'last_modified', 'content'])
+
+
+class _Entry(object):
+    __slots__ = ('key', 'value', 'expires', 'prev', 'next')
+
+    def __init__(self, key=None, value=None, expires=None):
+        self.key = key
+        self.value = value
+        self.expires = expires
+        self.prev = self
+        self.next = self
+
+
+class TTLCache(object):
+    """
+    Thread-safe cache with a time to live and least recently used eviction.
+
+    :param max_entries: Maximum number of entries kept.  Adding an entry to a
+        full cache evicts the least recently used one.
+    :param ttl: Seconds an entry stays valid after it was set
+    :param clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, max_entries=1000, ttl=300, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._root = _Entry()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached value for key, or None if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= self._clock():
+                self._remove(entry)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._unlink(entry)
+            self._link_first(entry)
+            return self._use(entry)
+
+    def set(self, key, value, ttl=None):
+        """Adds or replaces the value for key."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._remove(entry)
+            entry = _Entry(key, value, self._clock() + ttl)
+            self._entries[key] = entry
+            self._link_first(entry)
+            self._admit(value)
+            while self._is_full():
+                self._remove(self._root.prev)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        """Removes the value for key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._remove(entry)
+
+    def clear(self):
+        with self._lock:
+            while self._root.next is not self._root:
+                self._remove(self._root.next)
+
+    def statistics(self):
+        """
+        Returns the cache counters.
+
+        The dict holds the number of ``hits``, ``misses``, ``evictions`` of
+        least recently used entries, ``expirations`` of entries that outlived
+        their time to live and the current number of ``entries``.
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'entries': len(self._entries),
+            }
+
+    def _remove(self, entry):
+        del self._entries[entry.key]
+        self._unlink(entry)
+        self._discard(entry.value)
+
+    def _use(self, entry):
+        """Returns the value handed out for a cache hit."""
+        return entry.value
+
+    def _admit(self, value):
+        """Called with every value added to the cache."""
+
+    def _discard(self, value):
+        """Called with every value that leaves the cache."""
+
+    def _is_full(self):
+        return len(self._entries) > self.max_entries
+
+    def _link_first(self, entry):
+        entry.prev = self._root
+        entry.next = self._root.next
+        self._root.next.prev = entry
+        self._root.next = entry
+
+    def _unlink(self, entry):
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+
+class _Payload(object):
+    __slots__ = ('data', 'is_text', 'uses')
+
+    def __init__(self, payload):
+        self.is_text = isinstance(payload, six.text_type)
+        if self.is_text:
+            payload = payload.encode('utf-8')
+        self.data = bytearray(payload)
+        self.uses = 0
+
+    def copy(self):
+        if self.is_text:
+            return self.data.decode('utf-8')
+        return bytes(self.data)
+
+    def wipe(self):
+        self.data[:] = b'\x00' * len(self.data)
+
+
+class PayloadCache(TTLCache):
+    """
+    Cache for decrypted secret payloads.
+
+    Payloads are kept in buffers that are overwritten with zeros when they
+    leave the cache, whether they expired, were evicted, invalidated or used
+    up.  Callers receive copies, which are not wiped.
+
+    :param max_entries: Maximum number of payloads kept
+    :param ttl: Maximum age of a payload in seconds
+    :param max_uses: Number of times a payload may be served before it is
+        dropped, or None for no limit
+    :param max_bytes: Maximum total size of the cached payloads.  Larger
+        payloads are never cached.
+    :param clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, max_entries=100, ttl=60, max_uses=None,
+                 max_bytes=1024 * 1024, clock=time.time):
+        super(PayloadCache, self).__init__(max_entries=max_entries, ttl=ttl,
+                                           clock=clock)
+        self.max_uses = max_uses
+        self.max_bytes = max_bytes
+        self._bytes = 0
+
+    def set(self, key, value, ttl=None):
+        """
+        Adds or replaces the payload for key.
+
+        :param ttl: Seconds until the payload must no longer be served, such
+            as the time left before the secret expires.  The cache ttl still
+            applies when it is shorter.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        payload = _Payload(value)
+        if ttl <= 0 or len(payload.data) > self.max_bytes:
+            payload.wipe()
+            return
+        super(PayloadCache, self).set(key, payload, ttl)
+
+    def invalidate_ref(self, secret_ref):
+        """Removes the payloads of a secret for every content type."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == secret_ref:
+                    self._remove(self._entries[key])
+
+    def statistics(self):
+        stats = super(PayloadCache, self).statistics()
+        with self._lock:
+            stats['bytes'] = self._bytes
+        return stats
+
+    def _use(self, entry):
+        payload = entry.value
+        payload.uses += 1
+        value = payload.copy()
+        if self.max_uses is not None and payload.uses >= self.max_uses:
+            self._remove(entry)
+        return value
+
+    def _admit(self, payload):
+        self._bytes += len(payload.data)
+
+    def _discard(self, payload):
+        self._bytes -= len(payload.data)
+        payload.wipe()
+
+    def _is_full(self):
+        return (super(PayloadCache, self)._is_full() or
+                self._bytes > self.max_bytes)
+
+
+class HTTPCache(TTLCache):
+    """
+    Cache of response bodies and their validators for conditional GETs.
+
+    Entries are CachedResponse tuples.  The client sends their ETag and
+    Last-Modified validators with the next GET of the same URL and serves
+    the cached body when the server answers 304 Not Modified.
+
+    :param max_entries: Maximum number of responses kept
+    :param ttl: Seconds a response is kept for revalidation
+    :param clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, max_entries=1000, ttl=300, clock=time.time):
+        super(HTTPCache, self).__init__(max_entries=max_entries, ttl=ttl,
+                                        clock=clock)
+        self._endpoints = {}
+
+    def record(self, endpoint, revalidated):
+        """Counts a GET of endpoint, served from cache if revalidated."""
+        with self._lock:
+            counters = self._endpoints.setdefault(
+                endpoint, {'hits': 0, 'misses': 0})
+            counters['hits' if revalidated else 'misses'] += 1
+
+    def invalidate_href(self, href):
+        """Removes the responses cached for a URL with any parameters."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == href:
+                    self._remove(self._entries[key])
+
+    def statistics(self):
+        """
+        Returns the cache counters.
+
+        Besides the TTLCache counters, where a hit means validators were
+        found, the dict holds per endpoint ``hits`` served from cache after
+        a 304 response, ``misses`` that needed a full response and their
+        ``hit_ratio``.
+        """
+        stats = super(HTTPCache, self).statistics()
+        endpoints = {}
+        with self._lock:
+            for endpoint, counters in six.iteritems(self._endpoints):
+                total = counters['hits'] + counters['misses']
+                endpoints[endpoint] = dict(
+                    counters,
+                    hit_ratio=float(counters['hits']) / total if total else 0.0
+                )
+        stats['endpoints'] = endpoints
+        return stats
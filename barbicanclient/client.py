@@ -12,17 +12,28 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import json
+import functools
 import logging
 import os
+import sys
+import time
 
 from keystoneclient.auth.base import BaseAuthPlugin
 from keystoneclient import session as ks_session
+import six
 
+from barbicanclient import cache
+from barbicanclient import codec
 from barbicanclient import containers
 from barbicanclient._i18n import _
+from barbicanclient import _logging
+from barbicanclient import instrumentation
 from barbicanclient import orders
+from barbicanclient import pooling
+from barbicanclient import retry
 from barbicanclient import secrets
+from barbicanclient import singleflight
+from barbicanclient import tracing
 
 
 LOG = logging.getLogger(__name__)
@@ -57,12 +68,23 @@ class HTTPAuthError(HTTPError):
     pass
 
 
+def _params_key(params):
+    return tuple(sorted(params.items())) if params else None
+
+
 class Client(object):
 
     def __init__(self, session=None, endpoint=None, project_id=None,
                  verify=True, service_type=_DEFAULT_SERVICE_TYPE,
                  service_name=None, interface=_DEFAULT_SERVICE_INTERFACE,
-                 region_name=None):
+                 region_name=None, pool_connections=None, pool_maxsize=None,
+                 pool_block=None, keep_alive=True, retry_policy=None,
+                 metadata_cache_size=0, metadata_cache_ttl=300,
+                 payload_cache_size=0, payload_cache_ttl=60,
+                 payload_cache_max_uses=None,
+                 payload_cache_max_bytes=1024 * 1024, json_codec=None,
+                 http_cache_size=0, http_cache_ttl=300,
+                 coalesce_requests=False, thread_safe=False, tracer=None):
         """
         Barbican client object used to interact with barbican service.
 
@@ -95,11 +117,75 @@ class Client(object):
             authenticated keystone session. Defaults to 'public'.
         :param region_name: Used as an endpoint filter when using an
             authenticated keystone session.
+        :param pool_connections: Number of per-host connection pools to
+            cache.  Defaults to 10.
+        :param pool_maxsize: Maximum number of connections kept open per
+            host.  Should be at least the number of threads sharing the
+            client.  Defaults to 10.
+        :param pool_block: If True, requests wait for a free pooled
+            connection instead of opening one that is discarded afterwards.
+            Defaults to False.
+        :param keep_alive: If False, connections are closed after every
+            request instead of being returned to the pool.  Defaults to True.
+
+        :param retry_policy: A barbicanclient.retry.RetryPolicy describing
+            how transient failures are retried.  Requests are not retried
+            when no policy is given.
+        :param metadata_cache_size: Maximum number of secret metadata
+            entries cached by this client.  The cache is disabled when set
+            to 0, which is the default.
+        :param metadata_cache_ttl: Seconds cached secret metadata stays
+            valid.  Defaults to 300.
+        :param payload_cache_size: Maximum number of decrypted payloads
+            cached by this client.  The cache is disabled when set to 0,
+            which is the default.
+        :param payload_cache_ttl: Maximum age in seconds of a cached payload.
+            Payloads are never cached past the expiration of their secret.
+            Defaults to 60.
+        :param payload_cache_max_uses: Number of times a cached payload is
+            served before it is dropped.  Defaults to no limit.
+        :param payload_cache_max_bytes: Maximum total size of the cached
+            payloads.  Defaults to 1 MiB.
+        :param json_codec: Name of the JSON library used for request and
+            response bodies, see barbicanclient.codec.available_codecs(), or
+            a barbicanclient.codec.JSONCodec.  Defaults to the fastest
+            installed library.
+        :param http_cache_size: Maximum number of JSON responses kept for
+            revalidation.  Cached responses are fetched again with
+            If-None-Match and If-Modified-Since headers and reused when
+            Barbican answers 304 Not Modified.  The cache is disabled when
+            set to 0, which is the default.
+        :param http_cache_ttl: Seconds a cached response is kept for
+            revalidation.  Defaults to 300.
+        :param coalesce_requests: If True, concurrent GET requests for the
+            same URL and Accept header share a single HTTP request and its
+            result.  A GET joining a request already in flight can then miss
+            a change another thread completed after that request was sent.
+            Defaults to False.
+        :param thread_safe: If True, every thread sends its requests through
+            its own copy of the session, sharing the auth plugin and the
+            connection pools of the original one, and entities guard their
+            lazy loading with a lock so they can be shared between threads.
+            Defaults to False.
+        :param tracer: A barbicanclient.tracing.Tracer, or any object with
+            a start_span method behaving like its own.  When given, manager
+            methods and entity operations open spans, with a child span for
+            every HTTP request they send.  Tracing is disabled by default.
+
+        The pool options are applied by mounting a tuned adapter on the
+        session.  When a session is given the adapter is only mounted if at
+        least one pool option is set.
         """
-        LOG.debug("Creating Client object")
-
         self._session = session or ks_session.Session(verify=verify)
 
+        self._pool_adapter = None
+        pool_options = (pool_connections, pool_maxsize, pool_block)
+        if session is None or any(o is not None for o in pool_options):
+            self._pool_adapter = pooling.mount_pooling_adapter(
+                self._session, pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize, pool_block=pool_block
+            )
+
         if self._session.auth is None:
             self._validate_endpoint_and_project_id(endpoint, project_id)
 
@@ -119,6 +205,48 @@ class Client(object):
             # If provided we'll include the project ID in all requests.
             self._default_headers = {'X-Project-Id': project_id}
 
+        if not keep_alive:
+            self._default_headers['Connection'] = 'close'
+
+        self._retrier = None
+        if retry_policy is not None:
+            self._retrier = retry.Retrier(retry_policy)
+
+        self._metadata_cache = None
+        if metadata_cache_size > 0:
+            self._metadata_cache = cache.TTLCache(
+                max_entries=metadata_cache_size, ttl=metadata_cache_ttl)
+
+        self._payload_cache = None
+        if payload_cache_size > 0:
+            self._payload_cache = cache.PayloadCache(
+                max_entries=payload_cache_size, ttl=payload_cache_ttl,
+                max_uses=payload_cache_max_uses,
+                max_bytes=payload_cache_max_bytes)
+
+        self._http_cache = None
+        if http_cache_size > 0:
+            self._http_cache = cache.HTTPCache(max_entries=http_cache_size,
+                                               ttl=http_cache_ttl)
+
+        self._request_hooks = ()
+        self._tracer = tracer
+
+        self._thread_safe = thread_safe
+        self._thread_sessions = None
+        if thread_safe:
+            self._thread_sessions = pooling.ThreadLocalSessions(self._session)
+
+        self._single_flight = None
+        if coalesce_requests:
+            self._single_flight = singleflight.SingleFlight()
+
+        if json_codec is None or isinstance(json_codec, six.string_types):
+            json_codec = codec.get_codec(json_codec)
+        self._codec = json_codec
+        _logging.debug(LOG, 'client.create', json_codec=self._codec.name,
+                       thread_safe=thread_safe)
+
         self._base_url = '{0}/{1}'.format(self._barbican_endpoint,
                                           _DEFAULT_API_VERSION)
 
@@ -139,53 +267,281 @@ class Client(object):
             endpoint = endpoint[:-1]
         return endpoint
 
+    def pool_statistics(self):
+        """
+        Returns connection pool counters for this client.
+
+        The dict holds the number of connection ``checkouts``, the ``hits``
+        served by an already open connection, the ``new_connections`` that
+        had to be opened and the ``waits`` for a free connection.  Returns
+        None when the client did not mount its own pooling adapter.
+        """
+        if self._pool_adapter is None:
+            return None
+        return self._pool_adapter.statistics.as_dict()
+
+    def retry_statistics(self):
+        """
+        Returns retry counters for this client.
+
+        The dict holds the number of ``requests`` sent, the ``retries``
+        taken, how often a retry was refused because the retry budget was
+        spent (``budget_exhausted``) and the retries taken by the last
+        request issued from the calling thread (``last_call_retries``).
+        Returns None when the client has no retry policy.
+        """
+        if self._retrier is None:
+            return None
+        stats = self._retrier.statistics()
+        stats['last_call_retries'] = self._retrier.last_retries
+        return stats
+
+    def metadata_cache_statistics(self):
+        """
+        Returns the secret metadata cache counters for this client.
+
+        See :meth:`barbicanclient.cache.TTLCache.statistics`.  Returns None
+        when the metadata cache is disabled.
+        """
+        if self._metadata_cache is None:
+            return None
+        return self._metadata_cache.statistics()
+
+    def payload_cache_statistics(self):
+        """
+        Returns the payload cache counters for this client.
+
+        See :meth:`barbicanclient.cache.TTLCache.statistics`; the dict also
+        holds the number of cached ``bytes``.  Returns None when the payload
+        cache is disabled.
+        """
+        if self._payload_cache is None:
+            return None
+        return self._payload_cache.statistics()
+
+    def http_cache_statistics(self):
+        """
+        Returns the HTTP revalidation cache counters for this client.
+
+        See :meth:`barbicanclient.cache.HTTPCache.statistics` for the per
+        endpoint hit ratios.  Returns None when the HTTP cache is disabled.
+        """
+        if self._http_cache is None:
+            return None
+        return self._http_cache.statistics()
+
+    def coalescing_statistics(self):
+        """
+        Returns the GET coalescing counters for this client.
+
+        The dict holds the number of ``requests`` that could be coalesced
+        and how many of them were ``coalesced`` into a request already in
+        flight.  Returns None when coalescing is disabled.
+        """
+        if self._single_flight is None:
+            return None
+        return self._single_flight.statistics()
+
+    def add_request_hook(self, hook):
+        """
+        Registers a callable called after every HTTP request.
+
+        The hook receives a barbicanclient.instrumentation.RequestEvent and
+        runs in the thread that sent the request, so it should return
+        quickly.  Exceptions raised by hooks are logged and ignored.
+        """
+        self._request_hooks += (hook,)
+
+    def remove_request_hook(self, hook):
+        """Unregisters a hook added with add_request_hook()."""
+        self._request_hooks = tuple(h for h in self._request_hooks
+                                    if h != hook)
+
+    def _coalesce(self, key, func, *args):
+        if self._single_flight is None or key is None:
+            return func(*args)
+        return self._single_flight.do(key, func, *args)
+
+    def _get_session(self):
+        if self._thread_sessions is None:
+            return self._session
+        return self._thread_sessions.get()
+
+    def _send(self, method, url, **kwargs):
+        send = functools.partial(getattr(self._get_session(), method), url,
+                                 **kwargs)
+        if self._request_hooks:
+            send = functools.partial(self._send_instrumented, send, method,
+                                     url, kwargs)
+        if self._tracer is not None:
+            send = functools.partial(self._send_traced, send, method, url)
+        if self._retrier is None:
+            return send()
+        return self._retrier.call(method, send)
+
+    def _send_instrumented(self, send, method, url, kwargs):
+        start = time.time()
+        try:
+            resp = send()
+        except Exception as e:
+            exc_info = sys.exc_info()
+            self._emit_request_event(method, url, kwargs,
+                                     getattr(e, 'http_status', None), None,
+                                     time.time() - start)
+            six.reraise(*exc_info)
+        bytes_in = instrumentation.response_size(resp, kwargs.get('stream'))
+        self._emit_request_event(method, url, kwargs, resp.status_code,
+                                 bytes_in, time.time() - start)
+        return resp
+
+    def _send_traced(self, send, method, url):
+        with self._tracer.start_span(
+                'HTTP {0}'.format(method.upper()),
+                entity=self._get_endpoint_name(url), ref=url) as span:
+            span.set_attribute('http.method', method.upper())
+            span.set_attribute('http.url', instrumentation.url_template(url))
+            try:
+                resp = send()
+            except Exception as e:
+                span.set_attribute('http.status_code',
+                                   getattr(e, 'http_status', None))
+                raise
+            span.set_attribute('http.status_code', resp.status_code)
+            return resp
+
+    def _emit_request_event(self, method, url, kwargs, status, bytes_in,
+                            latency):
+        event = instrumentation.RequestEvent(
+            method=method,
+            entity=self._get_endpoint_name(url),
+            url_template=instrumentation.url_template(url),
+            status=status,
+            bytes_in=bytes_in,
+            bytes_out=instrumentation.body_size(kwargs.get('data'),
+                                                kwargs.get('json')),
+            latency=latency
+        )
+        for hook in self._request_hooks:
+            try:
+                hook(event)
+            except Exception:
+                LOG.exception('Request hook %s failed', hook)
+
     def _get(self, href, params=None):
         headers = {'Accept': 'application/json'}
         headers.update(self._default_headers)
-        resp = self._session.get(href, params=params, headers=headers)
+        key = None
+        if params is None or isinstance(params, dict):
+            key = ('json', href, _params_key(params), headers['Accept'])
+        # Coalesced callers share the response, each of them decodes it
+        resp = self._coalesce(key, self._get_response, href, params, headers)
+        if isinstance(resp, cache.CachedResponse):
+            # Decoded again so callers never share the cached objects
+            return self._codec.loads(resp.content)
+        return self._codec.decode(resp)
+
+    def _get_response(self, href, params, headers):
+        if self._http_cache is not None:
+            return self._get_revalidated(href, params, headers)
+        resp = self._send('get', href, params=params, headers=headers)
         self._check_status_code(resp)
-        return resp.json()
+        return resp
+
+    def _get_revalidated(self, href, params, headers):
+        key = (href, _params_key(params))
+        cached = self._http_cache.get(key)
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        resp = self._send('get', href, params=params, headers=headers)
+        endpoint = self._get_endpoint_name(href)
+        if cached is not None and resp.status_code == 304:
+            self._http_cache.record(endpoint, revalidated=True)
+            return cached
+        self._check_status_code(resp)
+        self._http_cache.record(endpoint, revalidated=False)
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._http_cache.set(key, cache.CachedResponse(
+                etag, last_modified, resp.content))
+        else:
+            self._http_cache.invalidate(key)
+        return resp
+
+    def _get_endpoint_name(self, href):
+        if href.startswith(self._base_url):
+            path = href[len(self._base_url):]
+        else:
+            path = six.moves.urllib.parse.urlparse(href).path
+        return path.strip('/').split('/')[0]
 
     def _get_raw(self, href, headers):
         headers.update(self._default_headers)
-        resp = self._session.get(href, headers=headers)
+        return self._coalesce(('raw', href, headers.get('Accept')),
+                              self._get_raw_content, href, headers)
+
+    def _get_raw_content(self, href, headers):
+        resp = self._send('get', href, headers=headers)
         self._check_status_code(resp)
         return resp.content
 
+    def _get_stream(self, href, headers, chunk_size):
+        headers.update(self._default_headers)
+        resp = self._send('get', href, headers=headers, stream=True)
+        try:
+            self._check_status_code(resp)
+            for chunk in resp.iter_content(chunk_size):
+                yield chunk
+        finally:
+            resp.close()
+
+    def _put(self, href, data, headers):
+        headers.update(self._default_headers)
+        resp = self._send('put', href, data=data, headers=headers)
+        self._check_status_code(resp)
+
     def _delete(self, href, json=None):
         headers = dict()
         headers.update(self._default_headers)
-        resp = self._session.delete(href, headers=headers, json=json)
+        resp = self._send('delete', href, headers=headers, json=json)
         self._check_status_code(resp)
+        if self._http_cache is not None:
+            self._http_cache.invalidate_href(href)
 
     def _post(self, path, data):
         url = '{0}/{1}/'.format(self._base_url, path)
         headers = {'Content-Type': 'application/json'}
         headers.update(self._default_headers)
-        resp = self._session.post(url, data=json.dumps(data), headers=headers)
+        resp = self._send('post', url, data=self._codec.dumps(data),
+                          headers=headers)
         self._check_status_code(resp)
-        return resp.json()
+        return self._codec.decode(resp)
 
     def _check_status_code(self, resp):
         status = resp.status_code
-        LOG.debug('Response status {0}'.format(status))
+        _logging.debug(LOG, 'http.response', status=status)
         if status == 401:
-            LOG.error('Auth error: {0}'.format(self._get_error_message(resp)))
-            raise HTTPAuthError('{0}'.format(self._get_error_message(resp)))
+            message = self._get_error_message(resp)
+            _logging.log(LOG, logging.ERROR, 'http.auth_error',
+                         status=status, message=message)
+            raise HTTPAuthError('{0}'.format(message))
         if not status or status >= 500:
-            LOG.error('5xx Server error: {0}'.format(
-                self._get_error_message(resp)
-            ))
-            raise HTTPServerError('{0}'.format(self._get_error_message(resp)))
+            message = self._get_error_message(resp)
+            _logging.log(LOG, logging.ERROR, 'http.server_error',
+                         status=status, message=message)
+            raise HTTPServerError('{0}'.format(message))
         if status >= 400:
-            LOG.error('4xx Client error: {0}'.format(
-                self._get_error_message(resp)
-            ))
-            raise HTTPClientError('{0}'.format(self._get_error_message(resp)))
+            message = self._get_error_message(resp)
+            _logging.log(LOG, logging.ERROR, 'http.client_error',
+                         status=status, message=message)
+            raise HTTPClientError('{0}'.format(message))
 
     def _get_error_message(self, resp):
         try:
-            response_data = resp.json()
+            response_data = self._codec.decode(resp)
             message = response_data['title']
         except ValueError:
             message = resp.content
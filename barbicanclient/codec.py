@@ -0,0 +1,151 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+JSON codecs used by the Barbican client for request and response bodies.
+"""
+import datetime
+import json
+
+import six
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+_SCALAR_TYPES = six.string_types + six.integer_types + (float, type(None))
+
+
+def normalize(data):
+    """
+    Returns a copy of data made of plain JSON types.
+
+    Dates and datetimes are turned into ISO 8601 strings.  Every codec
+    encodes the normalized data, so they all accept the same values.
+
+    :raises TypeError: for any other type the JSON libraries disagree on,
+        such as bytes on Python 3
+    """
+    if isinstance(data, _SCALAR_TYPES):
+        return data
+    if isinstance(data, dict):
+        result = {}
+        for key, value in data.items():
+            if not isinstance(key, six.string_types):
+                raise TypeError(
+                    'JSON object keys must be strings, not {0!r}'.format(key))
+            result[key] = normalize(value)
+        return result
+    if isinstance(data, (list, tuple)):
+        return [normalize(value) for value in data]
+    if isinstance(data, (datetime.datetime, datetime.date)):
+        return data.isoformat()
+    raise TypeError('Object of type {0} is not JSON serializable'.format(
+        type(data).__name__))
+
+
+class JSONCodec(object):
+    """
+    Codec based on the standard library json module.
+
+    Response bodies are decoded by the response itself, so the encoding
+    detection of requests applies.
+    """
+
+    name = 'json'
+
+    def dumps(self, data):
+        return json.dumps(normalize(data))
+
+    def loads(self, content):
+        if isinstance(content, six.binary_type):
+            content = content.decode('utf-8')
+        return json.loads(content)
+
+    def decode(self, resp):
+        """Returns the decoded JSON body of a response."""
+        return resp.json()
+
+
+class LibraryCodec(JSONCodec):
+    """
+    Codec based on a third party JSON library.
+
+    Response bodies are decoded straight from the raw content, which JSON
+    requires to be UTF-8.
+
+    :param name: Name of the library
+    :param dumps: Function encoding an object
+    :param loads: Function decoding bytes or text
+    """
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, data):
+        return self._dumps(normalize(data))
+
+    def loads(self, content):
+        return self._loads(content)
+
+    def decode(self, resp):
+        return self._loads(resp.content)
+
+
+def _get_codecs():
+    codecs = []
+    if orjson is not None:
+        codecs.append(LibraryCodec('orjson', orjson.dumps, orjson.loads))
+    if ujson is not None:
+        codecs.append(LibraryCodec('ujson', ujson.dumps, ujson.loads))
+    if simplejson is not None:
+        codecs.append(LibraryCodec('simplejson', simplejson.dumps,
+                                   simplejson.loads))
+    codecs.append(JSONCodec())
+    return codecs
+
+
+def available_codecs():
+    """Returns the names of the installed codecs, fastest first."""
+    return [codec.name for codec in _get_codecs()]
+
+
+def get_codec(name=None):
+    """
+    Returns a codec by name.
+
+    :param name: One of the names returned by available_codecs(), or None
+        for the fastest installed codec
+    :raises ValueError: if the codec is unknown or its library is not
+        installed
+    """
+    codecs = _get_codecs()
+    if name is None:
+        return codecs[0]
+    for codec in codecs:
+        if codec.name == name:
+            return codec
+    raise ValueError('JSON codec {0} is not available.'.format(name))
@@ -14,13 +14,16 @@
 # limitations under the License.
 import functools
 import logging
-import six
+import sys
+import time
 
-from oslo.utils.timeutils import parse_isotime
+import six
 
+from barbicanclient import _logging
 from barbicanclient import base
 from barbicanclient import formatter
 from barbicanclient import secrets
+from barbicanclient import tracing
 
 
 LOG = logging.getLogger(__name__)
@@ -28,15 +31,17 @@ LOG = logging.getLogger(__name__)
 
 def _immutable_after_save(func):
     @functools.wraps(func)
-    def wrapper(self, *args):
+    def wrapper(self, *args, **kwargs):
         if hasattr(self, '_container_ref') and self._container_ref:
             raise base.ImmutableException()
-        return func(self, *args)
+        return func(self, *args, **kwargs)
     return wrapper
 
 
 class ContainerFormatter(formatter.EntityFormatter):
 
+    __slots__ = ()
+
     columns = ("Container href",
                "Name",
                "Created",
@@ -74,19 +79,26 @@ class Container(ContainerFormatter):
     _entity = 'containers'
     _type = 'generic'
 
+    # Listings can hold many containers, so instances have no __dict__
+    __slots__ = ('_api', '_name', '_container_ref', '_secret_refs',
+                 '_cached_secrets', '_store_timings', '_consumers',
+                 '_created', '_updated', '_status', '_lock')
+
     def __init__(self, api, name=None, secrets=None, consumers=None,
                  container_ref=None, created=None, updated=None, status=None,
                  secret_refs=None):
         self._api = api
+        self._lock = base.entity_lock(api)
         self._name = name
         self._container_ref = container_ref
         self._secret_refs = secret_refs
         self._cached_secrets = dict()
+        self._store_timings = None
         self._initialize_secrets(secrets)
         if container_ref:
             self._consumers = consumers if consumers else list()
-            self._created = parse_isotime(created) if created else None
-            self._updated = parse_isotime(updated) if updated else None
+            self._created = created
+            self._updated = updated
             self._status = status
         else:
             self._consumers = list()
@@ -122,21 +134,27 @@ class Container(ContainerFormatter):
     @property
     def name(self):
         if self._container_ref and not self._name:
-            self._reload()
+            with self._lock:
+                if not self._name:
+                    self._reload()
         return self._name
 
     @property
     def created(self):
+        self._created = base.parse_timestamp(self._created)
         return self._created
 
     @property
     def updated(self):
+        self._updated = base.parse_timestamp(self._updated)
         return self._updated
 
     @property
     def status(self):
         if self._container_ref and not self._status:
-            self._reload()
+            with self._lock:
+                if not self._status:
+                    self._reload()
         return self._status
 
     @property
@@ -152,13 +170,22 @@ class Container(ContainerFormatter):
     @property
     def secrets(self, cache=True):
         if not self._cached_secrets or not cache:
-            self._fill_secrets_from_secret_refs()
+            with self._lock:
+                if not self._cached_secrets or not cache:
+                    self._fill_secrets_from_secret_refs()
         return self._cached_secrets
 
     @property
     def consumers(self):
         return self._consumers
 
+    @property
+    def store_timings(self):
+        """Seconds spent storing each member secret during the last store"""
+        if self._store_timings is None:
+            return dict()
+        return self._store_timings
+
     @name.setter
     @_immutable_after_save
     def name(self, value):
@@ -178,9 +205,21 @@ class Container(ContainerFormatter):
         if self._secret_refs:
             self._secret_refs.pop(name.lower(), None)
 
+    @tracing.traced
     @_immutable_after_save
-    def store(self):
-        secret_refs = self._get_secrets_and_store_them_if_necessary()
+    def store(self, max_workers=base.DEFAULT_MAX_WORKERS):
+        """
+        Stores the container, storing its unsaved secrets first
+
+        Unsaved secrets are stored concurrently.  If any of them, or the
+        container itself, cannot be stored, the secrets stored by this call
+        are deleted again.
+
+        :param max_workers: Maximum number of secrets stored at once
+        :returns: the container reference
+        """
+        secret_refs, stored = self._get_secrets_and_store_them_if_necessary(
+            max_workers)
 
         container_dict = base.filter_empty_keys({
             'name': self.name,
@@ -188,14 +227,20 @@ class Container(ContainerFormatter):
             'secret_refs': secret_refs
         })
 
-        LOG.debug("Request body: {0}".format(container_dict))
+        _logging.debug(LOG, 'container.store', body=container_dict)
 
         # Save, store container_ref and return
-        response = self._api._post(self._entity, container_dict)
+        try:
+            response = self._api._post(self._entity, container_dict)
+        except Exception:
+            exc_info = sys.exc_info()
+            self._delete_stored_secrets(stored, max_workers)
+            six.reraise(*exc_info)
         if response:
             self._container_ref = response['container_ref']
         return self.container_ref
 
+    @tracing.traced
     def delete(self):
         if self._container_ref:
             self._api._delete(self._container_ref)
@@ -206,21 +251,55 @@ class Container(ContainerFormatter):
         else:
             raise LookupError("Secret is not yet stored.")
 
-    def _get_secrets_and_store_them_if_necessary(self):
+    def _get_secrets_and_store_them_if_necessary(self, max_workers):
         # Save all secrets if they are not yet saved
-        LOG.debug("Storing secrets: {0}".format(self.secrets))
+        _logging.debug(LOG, 'container.store_secrets', secrets=self.secrets)
+        unsaved = []
+        for name, secret in six.iteritems(self.secrets):
+            if secret and not secret.secret_ref and not any(
+                    secret is other for _, other in unsaved):
+                unsaved.append((name, secret))
+
+        self._store_timings = dict()
+        results = base.run_concurrently(self._store_secret, unsaved,
+                                        max_workers)
+        stored = [secret for (name, secret), (_, error)
+                  in zip(unsaved, results) if error is None]
+        errors = [error for _, error in results if error is not None]
+        if errors:
+            self._delete_stored_secrets(stored, max_workers)
+            raise errors[0]
+
         secret_refs = []
         for name, secret in six.iteritems(self.secrets):
-            if secret and not secret.secret_ref:
-                secret.store()
             secret_refs.append({'name': name, 'secret_ref': secret.secret_ref})
-        return secret_refs
+        return secret_refs, stored
 
+    def _store_secret(self, named_secret):
+        name, secret = named_secret
+        start = time.time()
+        try:
+            secret.store()
+        finally:
+            self._store_timings[name] = time.time() - start
+            _logging.debug(LOG, 'container.secret_stored', name=name,
+                           seconds=self._store_timings[name])
+
+    def _delete_stored_secrets(self, stored, max_workers):
+        refs = [secret.secret_ref for secret in stored]
+        results = base.run_concurrently(lambda secret: secret.delete(),
+                                        stored, max_workers)
+        for secret_ref, (_, error) in zip(refs, results):
+            if error is not None:
+                _logging.log(LOG, logging.WARNING,
+                             'container.store_cleanup_failed', ref=secret_ref,
+                             error=error)
+
+    @tracing.traced
     def _reload(self):
         if not self._container_ref:
             raise AttributeError("container_ref not set, cannot reload data.")
-        LOG.debug('Getting container - Container href: {0}'
-                  .format(self._container_ref))
+        _logging.debug(LOG, 'container.get', ref=self._container_ref)
         base.validate_ref(self._container_ref, 'Container')
         try:
             response = self._api._get(self._container_ref)
@@ -229,20 +308,50 @@ class Container(ContainerFormatter):
                               .format(self._container_ref))
         self._name = response.get('name')
         self._consumers = response.get('consumers', [])
-        created = response.get('created')
-        updated = response.get('updated')
-        self._created = parse_isotime(created) if created else None
-        self._updated = parse_isotime(updated) if updated else None
+        self._created = response.get('created')
+        self._updated = response.get('updated')
         self._status = response.get('status')
 
+    @tracing.traced
+    def load(self, payloads=True, max_workers=base.DEFAULT_MAX_WORKERS):
+        """
+        Retrieves the metadata of all the secrets in the container at once
+
+        The secrets are retrieved concurrently, so accessing them afterwards
+        does not trigger one request per secret and attribute.
+
+        :param payloads: If True the decrypted payloads are retrieved as well
+        :param max_workers: Maximum number of concurrent requests
+        :returns: the container
+        :raises: the first error met while retrieving a secret, after all
+            the others were retrieved
+        """
+        def load_secret(secret):
+            if not secret.secret_ref:
+                return
+            secret._fill_lazy_properties()
+            if payloads and not secret._payload:
+                secret._fetch_payload()
+
+        _logging.debug(LOG, 'container.load', ref=self._container_ref)
+        results = base.run_concurrently(load_secret,
+                                        list(self.secrets.values()),
+                                        max_workers)
+        for _, error in results:
+            if error is not None:
+                raise error
+        return self
+
     def _get_named_secret(self, name):
         return self.secrets.get(name)
 
     def __repr__(self):
-        return 'Container(name="{0}")'.format(self.name)
+        return 'Container(name="{0}")'.format(self._name)
 
 
 class RSAContainerFormatter(formatter.EntityFormatter):
+
+    __slots__ = ()
     _get_generic_data = ContainerFormatter._get_formatted_data
 
     def _get_generic_columns(self):
@@ -290,6 +399,8 @@ class RSAContainer(RSAContainerFormatter, Container):
     _optional_secrets = ["private_key_passphrase"]
     _type = 'rsa'
 
+    __slots__ = ()
+
     def __init__(self, api, name=None, public_key=None, private_key=None,
                  private_key_passphrase=None, consumers=[], container_ref=None,
                  created=None, updated=None, status=None, public_key_ref=None,
@@ -353,10 +464,12 @@ class RSAContainer(RSAContainerFormatter, Container):
                                   "Typed Containers")
 
     def __repr__(self):
-        return 'RSAContainer(name="{0}")'.format(self.name)
+        return 'RSAContainer(name="{0}")'.format(self._name)
 
 
 class CertificateContainerFormatter(formatter.EntityFormatter):
+
+    __slots__ = ()
     _get_generic_data = ContainerFormatter._get_formatted_data
 
     def _get_generic_columns(self):
@@ -409,6 +522,8 @@ class CertificateContainer(CertificateContainerFormatter, Container):
     _optional_secrets = ["private_key_passphrase", "intermediates"]
     _type = 'certificate'
 
+    __slots__ = ()
+
     def __init__(self, api, name=None, certificate=None, intermediates=None,
                  private_key=None, private_key_passphrase=None, consumers=[],
                  container_ref=None, created=None, updated=None, status=None,
@@ -487,7 +602,7 @@ class CertificateContainer(CertificateContainerFormatter, Container):
                                   "Typed Containers")
 
     def __repr__(self):
-        return 'CertificateContainer(name="{0}")'.format(self.name)
+        return 'CertificateContainer(name="{0}")'.format(self._name)
 
 
 class ContainerManager(base.BaseEntityManager):
@@ -501,6 +616,7 @@ class ContainerManager(base.BaseEntityManager):
     def __init__(self, api):
         super(ContainerManager, self).__init__(api, 'containers')
 
+    @tracing.traced
     def get(self, container_ref):
         """
         Get a Container
@@ -508,8 +624,7 @@ class ContainerManager(base.BaseEntityManager):
         :param container_ref: Full HATEOAS reference to a Container
         :returns: Container object or a subclass of the appropriate type
         """
-        LOG.debug('Getting container - Container href: {0}'
-                  .format(container_ref))
+        _logging.debug(LOG, 'container.get', ref=container_ref)
         base.validate_ref(container_ref, 'Container')
         try:
             response = self._api._get(container_ref)
@@ -642,6 +757,7 @@ class ContainerManager(base.BaseEntityManager):
             private_key_passphrase=private_key_passphrase
         )
 
+    @tracing.traced
     def delete(self, container_ref):
         """
         Delete a Container
@@ -652,7 +768,9 @@ class ContainerManager(base.BaseEntityManager):
             raise ValueError('container_ref is required.')
         self._api._delete(container_ref)
 
-    def list(self, limit=10, offset=0, name=None, type=None):
+    @tracing.traced
+    def list(self, limit=10, offset=0, name=None, type=None, fields=None,
+             columnar=False):
         """
         List all containers for the project
 
@@ -660,10 +778,16 @@ class ContainerManager(base.BaseEntityManager):
         :param offset: Offset containers to begin list
         :param name: Name filter for the list
         :param type: Type filter for the list
+        :param fields: Names of the fields to return, such as
+            'container_ref' or 'name'.  When given, named tuples holding the
+            values sent by Barbican are returned instead of Container
+            objects.
+        :param columnar: If True, return the fields as a dict of lists keyed
+            by field name
         :returns: list of Container metadata objects
         """
-        LOG.debug('Listing containers - offset {0} limit {1} name {2} type {3}'
-                  .format(offset, limit, name, type))
+        _logging.debug(LOG, 'container.list', offset=offset, limit=limit,
+                       name=name, type=type)
         href = '{0}/{1}'.format(self._api._base_url, self._entity)
         params = {'limit': limit, 'offset': offset}
         if name:
@@ -673,9 +797,13 @@ class ContainerManager(base.BaseEntityManager):
 
         response = self._api._get(href, params)
 
+        if fields is not None:
+            return base.select_fields(response.get('containers', []), fields,
+                                      columnar)
         return [self._generate_typed_container(container)
                 for container in response.get('containers', [])]
 
+    @tracing.traced
     def register_consumer(self, container_ref, name, url):
         """
         Add a consumer to the container
@@ -685,8 +813,8 @@ class ContainerManager(base.BaseEntityManager):
         :param url: URL of the consuming resource
         :returns: A container object per the get() method
         """
-        LOG.debug('Creating consumer registration for container '
-                  '{0} as {1}: {2}'.format(container_ref, name, url))
+        _logging.debug(LOG, 'container.register_consumer',
+                       ref=container_ref, name=name, url=url)
         href = '{0}/{1}/consumers'.format(self._entity,
                                           container_ref.split('/')[-1])
         consumer_dict = dict()
@@ -696,6 +824,7 @@ class ContainerManager(base.BaseEntityManager):
         response = self._api._post(href, consumer_dict)
         return self._generate_typed_container(response)
 
+    @tracing.traced
     def remove_consumer(self, container_ref, name, url):
         """
         Remove a consumer from the container
@@ -704,8 +833,8 @@ class ContainerManager(base.BaseEntityManager):
         :param name: Name of the previously consuming service
         :param url: URL of the previously consuming resource
         """
-        LOG.debug('Deleting consumer registration for container '
-                  '{0} as {1}: {2}'.format(container_ref, name, url))
+        _logging.debug(LOG, 'container.remove_consumer',
+                       ref=container_ref, name=name, url=url)
         href = '{0}/{1}/{2}/consumers'.format(self._api._base_url,
                                               self._entity,
                                               container_ref.split('/')[-1])
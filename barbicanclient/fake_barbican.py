@@ -0,0 +1,536 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-process stand-in for the Barbican v1 API, for load and integration tests.
+
+FakeBarbican is a WSGI application keeping secrets, containers and orders
+in memory.  It implements the parts of the API used by the client: secret
+payloads, typed containers and their consumers, key and asymmetric orders
+going from PENDING to ACTIVE or ERROR, and paginated listings.
+FakeBarbicanServer serves it over HTTP/1.1 keep-alive connections from a
+background thread, so the real Client can be used against it::
+
+    with fake_barbican.FakeBarbicanServer() as server:
+        barbican = client.Client(endpoint=server.endpoint,
+                                 project_id='project')
+"""
+import base64
+import datetime
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib import parse
+
+
+_STATUS_LINES = {
+    200: '200 OK',
+    201: '201 Created',
+    204: '204 No Content',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+    406: '406 Not Acceptable',
+}
+_COLLECTIONS = ('secrets', 'containers', 'orders')
+
+# Secret names allowed in the typed containers
+_CONTAINER_SECRET_NAMES = {
+    'generic': None,
+    'rsa': frozenset(['public_key', 'private_key', 'private_key_passphrase']),
+    'certificate': frozenset(['certificate', 'private_key',
+                              'private_key_passphrase', 'intermediates']),
+}
+_ORDER_ALGORITHMS = {
+    'key': frozenset(['aes', 'des', '3des', 'hmacsha1', 'hmacsha256',
+                      'hmacsha384', 'hmacsha512']),
+    'asymmetric': frozenset(['rsa', 'dsa']),
+}
+# Query parameters of the listings, and the attribute they filter on
+_LIST_FILTERS = {
+    'secrets': (('name', 'name'), ('alg', 'algorithm'), ('mode', 'mode'),
+                ('bits', 'bit_length')),
+    'containers': (('name', 'name'), ('type', 'type')),
+    'orders': (),
+}
+# Largest page of a listing, larger limits are lowered to it
+_MAX_LIMIT = 100
+
+
+def _timestamp(seconds):
+    return datetime.datetime.utcfromtimestamp(seconds).strftime(
+        '%Y-%m-%dT%H:%M:%S.%f')
+
+
+class _Response(Exception):
+    """A response, raised to end the handling of a request early."""
+
+    def __init__(self, status, body=None, content_type='application/json'):
+        self.status = status
+        if body is not None and content_type == 'application/json':
+            body = json.dumps(body).encode('utf-8')
+        self.body = body or b''
+        self.content_type = content_type
+
+
+def _error(status, description):
+    title = _STATUS_LINES[status].split(' ', 1)[1]
+    return _Response(status, {'code': status, 'title': title,
+                              'description': description})
+
+
+def _not_found(what):
+    return _error(404, '{0} not found.'.format(what))
+
+
+def _media_type(content_type):
+    return content_type.split(';', 1)[0].strip().lower()
+
+
+class FakeBarbican(object):
+    """
+    WSGI application implementing the Barbican v1 API in memory.
+
+    :param latency: Seconds every request is delayed by before it is
+        handled, to mimic a remote server
+    :param order_delay: Seconds an order stays PENDING before its secret
+        or container is generated
+    :param clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, latency=0, order_delay=0, clock=time.time):
+        self.latency = latency
+        self.order_delay = order_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entities = dict((c, {}) for c in _COLLECTIONS)
+        # Secret payloads and their content types, keyed by secret id
+        self._payloads = {}
+        # Creation time and sequence number of the entities, keyed by id
+        self._created = {}
+        self._sequence = itertools.count()
+        # Ids of the orders whose secret or container is being generated
+        self._processing = set()
+
+    def __call__(self, environ, start_response):
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            resp = self._dispatch(environ)
+        except _Response as e:
+            resp = e
+        headers = [('Content-Length', str(len(resp.body)))]
+        if resp.body:
+            headers.append(('Content-Type', resp.content_type))
+        start_response(_STATUS_LINES[resp.status], headers)
+        return [resp.body]
+
+    def _dispatch(self, environ):
+        method = environ['REQUEST_METHOD']
+        parts = [p for p in environ['PATH_INFO'].split('/') if p]
+        if len(parts) < 2 or parts[0] != 'v1' or parts[1] not in _COLLECTIONS:
+            return _not_found('Resource')
+        collection = parts[1]
+        base_url = '{0}://{1}/v1'.format(environ['wsgi.url_scheme'],
+                                         environ['HTTP_HOST'])
+        if len(parts) == 2:
+            if method == 'GET':
+                return self._list(collection, environ, base_url)
+            if method == 'POST':
+                return getattr(self, '_create_' + collection[:-1])(
+                    self._read_json(environ), base_url)
+        elif len(parts) == 3:
+            entity_id = parts[2]
+            if method == 'GET':
+                accept = environ.get('HTTP_ACCEPT', 'application/json')
+                if collection == 'secrets' and accept != 'application/json':
+                    return self._get_payload(entity_id, accept)
+                return _Response(200, self._get(collection, entity_id,
+                                                base_url))
+            if method == 'PUT' and collection == 'secrets':
+                return self._put_payload(entity_id, environ)
+            if method == 'DELETE':
+                return self._delete(collection, entity_id)
+        elif (len(parts) == 4 and collection == 'containers' and
+                parts[3] == 'consumers' and method in ('POST', 'DELETE')):
+            return self._update_consumers(parts[2], method,
+                                          self._read_json(environ))
+        return _error(405, 'Method not allowed.')
+
+    @staticmethod
+    def _read_body(environ):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        return environ['wsgi.input'].read(length) if length else b''
+
+    def _read_json(self, environ):
+        try:
+            return json.loads(self._read_body(environ).decode('utf-8'))
+        except ValueError:
+            raise _error(400, 'Malformed JSON.')
+
+    @staticmethod
+    def _ref(base_url, collection, entity_id):
+        return '{0}/{1}/{2}'.format(base_url, collection, entity_id)
+
+    def _add(self, collection, entity_id, entity, status='ACTIVE'):
+        now = self._clock()
+        entity.update({'status': status, 'created': _timestamp(now),
+                       'updated': _timestamp(now)})
+        with self._lock:
+            self._entities[collection][entity_id] = entity
+            self._created[entity_id] = (now, next(self._sequence))
+        return entity
+
+    def _get(self, collection, entity_id, base_url=None):
+        if collection == 'orders':
+            self._process_order(entity_id, base_url)
+        with self._lock:
+            entity = self._entities[collection].get(entity_id)
+            # Copied, updates replace the values of the stored entity
+            entity = dict(entity) if entity is not None else None
+        if entity is None:
+            raise _not_found(collection[:-1].capitalize())
+        return entity
+
+    def _delete(self, collection, entity_id):
+        with self._lock:
+            entity = self._entities[collection].pop(entity_id, None)
+            self._payloads.pop(entity_id, None)
+            self._created.pop(entity_id, None)
+        if entity is None:
+            return _not_found(collection[:-1].capitalize())
+        return _Response(204)
+
+    def _list(self, collection, environ, base_url):
+        query = dict(parse.parse_qsl(environ.get('QUERY_STRING', '')))
+        try:
+            limit = min(int(query.get('limit', 10)), _MAX_LIMIT)
+            offset = int(query.get('offset', 0))
+        except ValueError:
+            return _error(400, 'Invalid limit or offset.')
+        if collection == 'orders':
+            with self._lock:
+                order_ids = list(self._entities['orders'])
+            for order_id in order_ids:
+                self._process_order(order_id, base_url)
+        with self._lock:
+            entities = sorted(self._entities[collection].items(),
+                              key=lambda item: self._created[item[0]][1])
+            entities = [dict(entity) for _, entity in entities]
+        for param, attribute in _LIST_FILTERS[collection]:
+            if query.get(param):
+                entities = [e for e in entities
+                            if six.text_type(e.get(attribute)) ==
+                            query[param]]
+        body = {collection: entities[offset:offset + limit],
+                'total': len(entities)}
+        url = '{0}/{1}'.format(base_url, collection)
+        if offset + limit < len(entities):
+            body['next'] = '{0}?limit={1}&offset={2}'.format(
+                url, limit, offset + limit)
+        if offset > 0:
+            body['previous'] = '{0}?limit={1}&offset={2}'.format(
+                url, limit, max(offset - limit, 0))
+        return _Response(200, body)
+
+    def _create_secret(self, data, base_url):
+        secret_id = str(uuid.uuid4())
+        secret = {
+            'secret_ref': self._ref(base_url, 'secrets', secret_id),
+            'name': data.get('name'),
+            'algorithm': data.get('algorithm'),
+            'bit_length': data.get('bit_length'),
+            'mode': data.get('mode'),
+            'expiration': data.get('expiration'),
+        }
+        if data.get('payload') is not None:
+            content_type = data.get('payload_content_type')
+            if not content_type:
+                return _error(400, 'A payload needs a payload content '
+                                   'type.')
+            payload = data['payload']
+            if isinstance(payload, six.text_type):
+                payload = payload.encode('utf-8')
+            if data.get('payload_content_encoding') == 'base64':
+                payload = base64.b64decode(payload)
+            secret['content_types'] = {'default': content_type}
+            with self._lock:
+                self._payloads[secret_id] = (payload, content_type)
+        self._add('secrets', secret_id, secret)
+        return _Response(201, {'secret_ref': secret['secret_ref']})
+
+    def _get_payload(self, secret_id, accept):
+        self._get('secrets', secret_id)
+        with self._lock:
+            payload = self._payloads.get(secret_id)
+        if payload is None:
+            return _not_found('Secret payload')
+        # Parameters such as the charset are not compared
+        if _media_type(accept) != _media_type(payload[1]):
+            return _error(406, 'The payload is not available as '
+                               '{0}.'.format(accept))
+        return _Response(200, payload[0], content_type=payload[1])
+
+    def _put_payload(self, secret_id, environ):
+        payload = self._read_body(environ)
+        if environ.get('HTTP_CONTENT_ENCODING') == 'base64':
+            payload = base64.b64decode(payload)
+        content_type = (environ.get('CONTENT_TYPE') or
+                        'application/octet-stream')
+        with self._lock:
+            secret = self._entities['secrets'].get(secret_id)
+            if secret is None:
+                return _not_found('Secret')
+            if secret_id in self._payloads:
+                return _error(400, 'Secret already has a payload.')
+            secret['content_types'] = {'default': content_type}
+            self._payloads[secret_id] = (payload, content_type)
+        return _Response(204)
+
+    def _create_container(self, data, base_url):
+        container_type = data.get('type', 'generic')
+        if container_type not in _CONTAINER_SECRET_NAMES:
+            return _error(400, 'Invalid container type.')
+        allowed_names = _CONTAINER_SECRET_NAMES[container_type]
+        secret_refs = data.get('secret_refs', [])
+        for secret_ref in secret_refs:
+            if allowed_names is not None and (
+                    secret_ref.get('name') not in allowed_names):
+                return _error(400, 'Invalid secret name for a {0} '
+                                   'container.'.format(container_type))
+            self._get('secrets', secret_ref['secret_ref'].split('/')[-1])
+        container_id = str(uuid.uuid4())
+        container = {
+            'container_ref': self._ref(base_url, 'containers', container_id),
+            'name': data.get('name'),
+            'type': container_type,
+            'secret_refs': secret_refs,
+            'consumers': [],
+        }
+        self._add('containers', container_id, container)
+        return _Response(201, {'container_ref': container['container_ref']})
+
+    def _update_consumers(self, container_id, method, data):
+        if not data.get('name') or not data.get('URL'):
+            return _error(400, 'A consumer needs a name and an URL.')
+        consumer = {'name': data['name'], 'URL': data['URL']}
+        with self._lock:
+            container = self._entities['containers'].get(container_id)
+            if container is None:
+                return _not_found('Container')
+            consumers = [c for c in container['consumers'] if c != consumer]
+            if method == 'POST':
+                consumers.append(consumer)
+            elif len(consumers) == len(container['consumers']):
+                return _not_found('Consumer')
+            container['consumers'] = consumers
+            container = dict(container)
+        return _Response(200, container)
+
+    def _create_order(self, data, base_url):
+        order_type = data.get('type')
+        if order_type not in _ORDER_ALGORITHMS:
+            return _error(400, 'Invalid order type.')
+        order_id = str(uuid.uuid4())
+        order = {
+            'order_ref': self._ref(base_url, 'orders', order_id),
+            'type': order_type,
+            'meta': data.get('meta', {}),
+        }
+        self._add('orders', order_id, order, status='PENDING')
+        if not self.order_delay:
+            self._process_order(order_id, base_url)
+        return _Response(201, {'order_ref': order['order_ref']})
+
+    def _process_order(self, order_id, base_url):
+        """Completes a PENDING order once order_delay has elapsed."""
+        with self._lock:
+            order = self._entities['orders'].get(order_id)
+            if (order is None or order['status'] != 'PENDING' or
+                    order_id in self._processing or
+                    self._clock() - self._created[order_id][0] <
+                    self.order_delay):
+                return
+            self._processing.add(order_id)
+        meta = order['meta']
+        result = {'status': 'ACTIVE'}
+        algorithm = (meta.get('algorithm') or '').lower()
+        if algorithm not in _ORDER_ALGORITHMS[order['type']]:
+            result = {
+                'status': 'ERROR',
+                'error_status_code': 400,
+                'error_reason': 'Unsupported algorithm {0}.'.format(
+                    meta.get('algorithm')),
+            }
+        elif order['type'] == 'key':
+            result['secret_ref'] = self._generate_secret(
+                meta, 'application/octet-stream', base_url)
+        else:
+            secret_refs = [
+                {'name': name, 'secret_ref': self._generate_secret(
+                    meta, content_type, base_url)}
+                for name, content_type in (
+                    ('public_key', 'application/octet-stream'),
+                    ('private_key', 'application/octet-stream'))
+            ]
+            if meta.get('pass_phrase'):
+                secret_refs.append({
+                    'name': 'private_key_passphrase',
+                    'secret_ref': self._generate_secret(
+                        dict(meta, payload=meta['pass_phrase']),
+                        'text/plain', base_url)
+                })
+            resp = self._create_container(
+                {'name': meta.get('name'), 'type': 'rsa',
+                 'secret_refs': secret_refs}, base_url)
+            result['container_ref'] = json.loads(
+                resp.body.decode('utf-8'))['container_ref']
+        result['updated'] = _timestamp(self._clock())
+        with self._lock:
+            order.update(result)
+            self._processing.discard(order_id)
+
+    def _generate_secret(self, meta, content_type, base_url):
+        payload = meta.get('payload')
+        if payload is None:
+            payload = base64.b64encode(
+                os.urandom((meta.get('bit_length') or 256) // 8))
+            encoding = 'base64'
+        else:
+            encoding = None
+        resp = self._create_secret({
+            'name': meta.get('name'),
+            'algorithm': meta.get('algorithm'),
+            'bit_length': meta.get('bit_length'),
+            'mode': meta.get('mode'),
+            'expiration': meta.get('expiration'),
+            'payload': payload,
+            'payload_content_type': content_type,
+            'payload_content_encoding': encoding,
+        }, base_url)
+        return json.loads(resp.body.decode('utf-8'))['secret_ref']
+
+
+class _WSGIRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves a WSGI application over HTTP/1.1 keep-alive connections."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, which Nagle's algorithm
+    # would otherwise hold back until the client acknowledges the headers
+    disable_nagle_algorithm = True
+
+    def _read_chunked_body(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+            if not size:
+                # Trailers end with an empty line
+                while self.rfile.readline().strip():
+                    pass
+                return b''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _run_app(self):
+        url = parse.urlsplit(self.path)
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': self.headers.get('Content-Length', ''),
+            'SERVER_NAME': self.server.server_address[0],
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'SERVER_PROTOCOL': self.request_version,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': self.rfile,
+            'wsgi.errors': six.moves.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for key, value in self.headers.items():
+            environ['HTTP_' + key.upper().replace('-', '_')] = value
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = self._read_chunked_body()
+            environ['CONTENT_LENGTH'] = str(len(body))
+            environ['wsgi.input'] = six.BytesIO(body)
+
+        def start_response(status, headers, exc_info=None):
+            self.send_response(int(status.split(' ', 1)[0]))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+
+        for chunk in self.server.app(environ, start_response):
+            self.wfile.write(chunk)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _run_app
+
+    def log_message(self, *args):
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 128
+
+
+class FakeBarbicanServer(object):
+    """
+    Serves a FakeBarbican application on a local port.
+
+    :param app: WSGI application to serve, a new FakeBarbican by default
+    :param host: Address to listen on
+    :param port: Port to listen on, 0 for any free port
+    """
+
+    def __init__(self, app=None, host='127.0.0.1', port=0):
+        self.app = app or FakeBarbican()
+        self._server = _ThreadingHTTPServer((host, port), _WSGIRequestHandler)
+        self._server.app = self.app
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        """Starts serving from a daemon thread and returns the server."""
+        # Polled that often for shutdown, which makes stop() quick
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -20,6 +20,8 @@ class EntityFormatter(object):
     the function _get_formatted_data().
     """
 
+    __slots__ = ()
+
     @staticmethod
     def _list_objects(obj_list):
         columns = []
@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Events describing the HTTP requests sent by the Barbican client.
+"""
+import collections
+import json
+import re
+
+import six
+
+
+RequestEvent = collections.namedtuple('RequestEvent', [
+    'method', 'entity', 'url_template', 'status', 'bytes_in', 'bytes_out',
+    'latency'
+])
+RequestEvent.__doc__ = """
+    Describes one HTTP request sent by a Client.
+
+    :param method: HTTP method in lower case
+    :param entity: First path segment under the API version, such as
+        secrets, containers or orders
+    :param url_template: Path of the URL with every UUID replaced by {uuid}
+    :param status: Response status code, or None if no response was received
+    :param bytes_in: Size of the response body, or None if it is unknown
+    :param bytes_out: Size of the request body, or None if it is unknown
+    :param latency: Wall clock seconds spent on the request
+"""
+
+_UUID_RE = re.compile(
+    r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+    r'[0-9a-fA-F]{12}')
+
+
+def url_template(url):
+    """Returns the path of url with its UUIDs replaced by {uuid}."""
+    path = six.moves.urllib.parse.urlparse(url).path
+    return _UUID_RE.sub('{uuid}', path)
+
+
+def body_size(data, json_body=None):
+    """Returns the size in bytes of a request body, None for streams."""
+    if json_body is not None:
+        # Serialized the way requests does for its json argument
+        return len(json.dumps(json_body).encode('utf-8'))
+    if data is None:
+        return 0
+    if isinstance(data, six.binary_type):
+        return len(data)
+    if isinstance(data, six.text_type):
+        return len(data.encode('utf-8'))
+    return None
+
+
+def response_size(resp, stream=False):
+    """Returns the size of a response body without consuming a stream."""
+    if stream:
+        length = resp.headers.get('Content-Length')
+        return int(length) if length is not None else None
+    return len(resp.content)
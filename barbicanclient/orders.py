@@ -15,16 +15,40 @@
 import abc
 import functools
 import logging
+import time
 
-from oslo.utils.timeutils import parse_isotime
 import six
 
+from barbicanclient import _logging
 from barbicanclient import base
 from barbicanclient import formatter
+from barbicanclient import tracing
 
 
 LOG = logging.getLogger(__name__)
 
+_FINAL_STATUSES = ('ACTIVE', 'ERROR')
+
+
+class OrderWaitTimeout(Exception):
+    """Raised when orders are still pending after the wait timeout."""
+
+    def __init__(self, order_refs):
+        self.order_refs = order_refs
+        super(OrderWaitTimeout, self).__init__(
+            '{0} orders are still pending.'.format(len(order_refs)))
+
+
+class OrderWaitError(Exception):
+    """Raised when polling an order failed while waiting for orders."""
+
+    def __init__(self, error, order_refs):
+        self.error = error
+        self.order_refs = order_refs
+        super(OrderWaitError, self).__init__(
+            'Polling orders failed with {0} orders still pending: '
+            '{1}'.format(len(order_refs), error))
+
 
 def immutable_after_save(func):
     @functools.wraps(func)
@@ -37,6 +61,8 @@ def immutable_after_save(func):
 
 class KeyOrderFormatter(formatter.EntityFormatter):
 
+    __slots__ = ()
+
     columns = ("Order href",
                "Secret href",
                "Created",
@@ -58,6 +84,8 @@ class KeyOrderFormatter(formatter.EntityFormatter):
 
 class AsymmetricOrderFormatter(formatter.EntityFormatter):
 
+    __slots__ = ()
+
     columns = ("Order href",
                "Container href",
                "Created",
@@ -87,35 +115,31 @@ class Order(object):
     """
     _entity = 'orders'
 
+    # Listings can hold many orders, so instances have no __dict__.  The
+    # order type is a class attribute of the concrete orders.
+    __slots__ = ('_api', '_status', '_created', '_updated', '_order_ref',
+                 '_meta', '_parsed_expiration', '_error_status_code',
+                 '_error_reason')
+
     def __init__(self, api, type, status=None, created=None, updated=None,
                  meta=None, order_ref=None, error_status_code=None,
                  error_reason=None):
         super(Order, self).__init__()
 
         self._api = api
-        self._type = type
         self._status = status
 
-        if created:
-            self._created = parse_isotime(created)
-        else:
-            self._created = None
-
-        if updated:
-            self._updated = parse_isotime(updated)
-        else:
-            self._updated = None
+        self._created = created
+        self._updated = updated
 
         self._order_ref = order_ref
 
         self._meta = base.filter_empty_keys(meta)
+        self._parsed_expiration = None
 
         self._error_status_code = error_status_code
         self._error_reason = error_reason
 
-        if 'expiration' in self._meta.keys():
-            self._meta['expiration'] = parse_isotime(self._meta['expiration'])
-
     @property
     def name(self):
         return self._meta.get('name')
@@ -145,12 +169,17 @@ class Order(object):
 
     @property
     def expiration(self):
-        return self._meta.get('expiration')
+        # The raw value stays in _meta, which submit() sends as given
+        if self._parsed_expiration is None:
+            self._parsed_expiration = base.parse_timestamp(
+                self._meta.get('expiration'))
+        return self._parsed_expiration
 
     @expiration.setter
     @immutable_after_save
     def expiration(self, value):
         self._meta['expiration'] = value
+        self._parsed_expiration = None
 
     @property
     def payload_content_type(self):
@@ -167,10 +196,12 @@ class Order(object):
 
     @property
     def created(self):
+        self._created = base.parse_timestamp(self._created)
         return self._created
 
     @property
     def updated(self):
+        self._updated = base.parse_timestamp(self._updated)
         return self._updated
 
     @property
@@ -185,15 +216,17 @@ class Order(object):
     def error_reason(self):
         return self._error_reason
 
+    @tracing.traced
     @immutable_after_save
     def submit(self):
         order_dict = {'type': self._type, 'meta': self._meta}
-        LOG.debug("Request body: {0}".format(order_dict))
+        _logging.debug(LOG, 'order.submit', body=order_dict)
         response = self._api._post(self._entity, order_dict)
         if response:
             self._order_ref = response.get('order_ref')
         return self._order_ref
 
+    @tracing.traced
     def delete(self):
         if self._order_ref:
             self._api._delete(self._order_ref)
@@ -205,6 +238,8 @@ class Order(object):
 class KeyOrder(Order, KeyOrderFormatter):
     _type = 'key'
 
+    __slots__ = ('_secret_ref',)
+
     def __init__(self, api, name=None, algorithm=None, bit_length=None,
                  mode=None, expiration=None, payload_content_type=None,
                  status=None, created=None, updated=None, order_ref=None,
@@ -241,6 +276,8 @@ class KeyOrder(Order, KeyOrderFormatter):
 class AsymmetricOrder(Order, AsymmetricOrderFormatter):
     _type = 'asymmetric'
 
+    __slots__ = ('_container_ref',)
+
     def __init__(self, api, name=None, algorithm=None, bit_length=None,
                  pass_phrase=None, expiration=None, payload_content_type=None,
                  status=None, created=None, updated=None, order_ref=None,
@@ -285,6 +322,7 @@ class OrderManager(base.BaseEntityManager):
     def __init__(self, api):
         super(OrderManager, self).__init__(api, 'orders')
 
+    @tracing.traced
     def get(self, order_ref):
         """
         Get an Order
@@ -292,7 +330,7 @@ class OrderManager(base.BaseEntityManager):
         :param order_ref: Full HATEOAS reference to an Order
         :returns: An instance of the appropriate subtype of Order
         """
-        LOG.debug("Getting order - Order href: {0}".format(order_ref))
+        _logging.debug(LOG, 'order.get', ref=order_ref)
         base.validate_ref(order_ref, 'Order')
         try:
             response = self._api._get(order_ref)
@@ -352,6 +390,79 @@ class OrderManager(base.BaseEntityManager):
                                payload_content_type=payload_content_type,
                                expiration=expiration)
 
+    def wait(self, orders, timeout=None, concurrency=base.DEFAULT_MAX_WORKERS,
+             interval=1.0, max_interval=30.0):
+        """
+        Wait for Orders to become ACTIVE or ERROR
+
+        Pending orders are polled concurrently.  The delay between two polls
+        of the same order starts at interval and doubles after every poll up
+        to max_interval, so long running orders are polled less often.
+
+        :param orders: Orders or order references to wait for
+        :param timeout: Seconds to wait before giving up, or None to wait
+            until all the orders are done
+        :param concurrency: Maximum number of orders polled at once
+        :param interval: Initial delay in seconds between polls of an order
+        :param max_interval: Maximum delay in seconds between polls of an
+            order
+        :returns: generator of Order objects, yielded as soon as each of them
+            is ACTIVE or ERROR
+        :raises OrderWaitTimeout: if orders are still pending after timeout
+        :raises OrderWaitError: if polling an order failed, once the orders
+            polled along with it were yielded
+        """
+        done = []
+        order_refs = []
+        for order in orders:
+            if isinstance(order, Order):
+                if order.status in _FINAL_STATUSES:
+                    done.append(order)
+                    continue
+                order = order.order_ref
+            if not order:
+                raise ValueError('order_ref is required.')
+            base.validate_ref(order, 'Order')
+            order_refs.append(order)
+
+        for order in done:
+            yield order
+
+        deadline = None if timeout is None else time.time() + timeout
+        # Each pending entry is [order_ref, next poll time, next delay]
+        pending = [[order_ref, 0, interval] for order_ref in order_refs]
+        while pending:
+            now = time.time()
+            due = [entry for entry in pending if entry[1] <= now]
+            _logging.debug(LOG, 'order.poll', due=len(due),
+                           pending=len(pending))
+            results = base.run_concurrently(
+                self.get, [entry[0] for entry in due], concurrency)
+            first_error = None
+            for entry, (order, error) in zip(due, results):
+                if error is not None:
+                    first_error = first_error or error
+                    continue
+                if order.status in _FINAL_STATUSES:
+                    pending.remove(entry)
+                    yield order
+                else:
+                    entry[1] = now + entry[2]
+                    entry[2] = min(entry[2] * 2, max_interval)
+
+            if first_error is not None:
+                raise OrderWaitError(first_error,
+                                     [entry[0] for entry in pending])
+            if not pending:
+                return
+            wake_up = min(entry[1] for entry in pending)
+            if deadline is not None:
+                if time.time() >= deadline:
+                    raise OrderWaitTimeout([entry[0] for entry in pending])
+                wake_up = min(wake_up, deadline)
+            time.sleep(max(wake_up - time.time(), 0))
+
+    @tracing.traced
     def delete(self, order_ref):
         """
         Delete an Order
@@ -362,6 +473,7 @@ class OrderManager(base.BaseEntityManager):
             raise ValueError('order_ref is required.')
         self._api._delete(order_ref)
 
+    @tracing.traced
     def list(self, limit=10, offset=0):
         """
         List all Orders for the project
@@ -370,8 +482,7 @@ class OrderManager(base.BaseEntityManager):
         :param offset: Offset orders to begin list
         :returns: list of Order objects
         """
-        LOG.debug('Listing orders - offset {0} limit {1}'.format(offset,
-                                                                 limit))
+        _logging.debug(LOG, 'order.list', offset=offset, limit=limit)
         href = '{0}/{1}'.format(self._api._base_url, self._entity)
         params = {'limit': limit, 'offset': offset}
         response = self._api._get(href, params)
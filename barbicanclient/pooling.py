@@ -0,0 +1,174 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Connection pool tuning for the sessions used by the Barbican client.
+"""
+import copy
+import threading
+
+import requests
+from requests import adapters
+from requests.packages.urllib3 import connectionpool
+
+
+DEFAULT_POOL_CONNECTIONS = adapters.DEFAULT_POOLSIZE
+DEFAULT_POOL_MAXSIZE = adapters.DEFAULT_POOLSIZE
+DEFAULT_POOL_BLOCK = adapters.DEFAULT_POOLBLOCK
+
+
+class PoolStatistics(object):
+    """Thread-safe counters describing how pooled connections are used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._new_connections = 0
+        self._waits = 0
+
+    def _increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self._checkouts,
+                'hits': max(self._checkouts - self._new_connections, 0),
+                'new_connections': self._new_connections,
+                'waits': self._waits,
+            }
+
+
+def _instrumented_pool(pool_class, stats):
+
+    class InstrumentedPool(pool_class):
+
+        def _new_conn(self):
+            stats._increment('_new_connections')
+            return super(InstrumentedPool, self)._new_conn()
+
+        def _get_conn(self, timeout=None):
+            stats._increment('_checkouts')
+            if self.block and self.pool is not None and self.pool.empty():
+                stats._increment('_waits')
+            return super(InstrumentedPool, self)._get_conn(timeout)
+
+    return InstrumentedPool
+
+
+class PoolingAdapter(adapters.HTTPAdapter):
+    """
+    HTTPAdapter that records connection pool statistics.
+
+    :param pool_connections: Number of per-host pools to cache
+    :param pool_maxsize: Maximum number of connections kept per host
+    :param pool_block: Whether to wait for a free connection instead of
+        opening a throwaway one when the pool is exhausted
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=DEFAULT_POOL_BLOCK):
+        self.statistics = PoolStatistics()
+        super(PoolingAdapter, self).__init__(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PoolingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _instrumented_pool(connectionpool.HTTPConnectionPool,
+                                       self.statistics),
+            'https': _instrumented_pool(connectionpool.HTTPSConnectionPool,
+                                        self.statistics),
+        }
+
+    def __setstate__(self, state):
+        self.statistics = PoolStatistics()
+        super(PoolingAdapter, self).__setstate__(state)
+
+
+def mount_pooling_adapter(session, pool_connections=None, pool_maxsize=None,
+                          pool_block=None):
+    """
+    Mount a PoolingAdapter for http and https on a keystone Session.
+
+    Options left as None use the requests defaults.
+
+    :returns: the mounted PoolingAdapter
+    """
+    adapter = PoolingAdapter(
+        pool_connections=(DEFAULT_POOL_CONNECTIONS if pool_connections is None
+                          else pool_connections),
+        pool_maxsize=(DEFAULT_POOL_MAXSIZE if pool_maxsize is None
+                      else pool_maxsize),
+        pool_block=DEFAULT_POOL_BLOCK if pool_block is None else pool_block
+    )
+    session.session.mount('http://', adapter)
+    session.session.mount('https://', adapter)
+    return adapter
+
+
+class ThreadLocalSessions(object):
+    """
+    Hands every thread its own copy of a keystone Session.
+
+    The copies share the auth plugin of the original session, so a token is
+    not fetched again per thread, and its mounted adapters, so connections
+    are still pooled across threads.  Only the requests.Session, with its
+    cookies and settings, is private to a thread.
+
+    :param session: The keystone Session to copy
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = 0
+
+    @property
+    def sessions(self):
+        """Number of sessions created so far."""
+        with self._lock:
+            return self._sessions
+
+    def get(self):
+        """Returns the session of the calling thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = copy.copy(self._session)
+            session.session = _copy_requests_session(self._session.session)
+            self._local.session = session
+            with self._lock:
+                self._sessions += 1
+        return session
+
+
+def _copy_requests_session(original):
+    session = requests.Session()
+    session.headers = original.headers.copy()
+    session.auth = original.auth
+    session.proxies = original.proxies.copy()
+    session.verify = original.verify
+    session.cert = original.cert
+    session.adapters = original.adapters.copy()
+    session.hooks = dict((event, list(hooks))
+                         for event, hooks in original.hooks.items())
+    session.params = original.params.copy()
+    session.stream = original.stream
+    session.trust_env = original.trust_env
+    session.max_redirects = original.max_redirects
+    session.cookies = original.cookies.copy()
+    return session
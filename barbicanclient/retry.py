@@ -0,0 +1,201 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Retry policy used by the Barbican client for transient failures.
+"""
+import email.utils
+import random
+import threading
+import time
+
+from keystoneclient import exceptions as ks_exceptions
+
+
+_IDEMPOTENT_METHODS = frozenset(['get', 'delete'])
+_RETRY_AFTER_STATUS_CODES = frozenset([429, 503])
+
+
+class RetryPolicy(object):
+    """
+    Describes when and how long to wait before a request is retried.
+
+    GET and DELETE requests are retried on connection failures and on the
+    configured status codes.  POST requests are only retried when
+    ``retry_post`` is set, since they are not idempotent.
+
+    :param max_retries: Maximum number of retries for a single request
+    :param backoff_factor: Base delay in seconds.  The n-th retry waits a
+        random time between 0 and ``backoff_factor * 2 ** n`` seconds.
+    :param max_backoff: Upper bound in seconds for any single delay.  A
+        Retry-After header asking for a longer wait ends the retries.
+    :param retry_post: Whether POST requests may be retried
+    :param status_codes: Response status codes considered transient
+    :param budget_ratio: Retries a client earns for every request it sends.
+        0.2 allows at most one retry for every five requests once the
+        reserve is spent.
+    :param budget_reserve: Retries a client may spend before the ratio
+        applies
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0,
+                 retry_post=False, status_codes=(429, 500, 502, 503, 504),
+                 budget_ratio=0.2, budget_reserve=10):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_post = retry_post
+        self.status_codes = frozenset(status_codes)
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = budget_reserve
+
+    def allows(self, method):
+        return method in _IDEMPOTENT_METHODS or (
+            self.retry_post and method == 'post')
+
+    def is_retryable_response(self, resp):
+        return resp is not None and resp.status_code in self.status_codes
+
+    def is_retryable_exception(self, exc):
+        if isinstance(exc, (ks_exceptions.ConnectionRefused,
+                            ks_exceptions.RequestTimeout)):
+            return True
+        return (isinstance(exc, ks_exceptions.HttpError) and
+                exc.http_status in self.status_codes)
+
+    def get_backoff(self, attempt, resp=None):
+        """
+        Returns the delay in seconds before the given retry attempt.
+
+        Returns None when the server asked for a longer wait than
+        ``max_backoff`` allows.
+        """
+        retry_after = _get_retry_after(resp)
+        if retry_after is not None:
+            if retry_after > self.max_backoff:
+                return None
+            return retry_after
+        ceiling = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class RetryBudget(object):
+    """Token bucket limiting the share of requests that may be retries."""
+
+    def __init__(self, ratio, reserve):
+        self._lock = threading.Lock()
+        self._ratio = ratio
+        self._capacity = max(reserve, 1)
+        self._tokens = float(reserve)
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Retrier(object):
+    """
+    Runs requests under a RetryPolicy and keeps retry counters.
+
+    Each client owns a Retrier, so the retry budget is per client even when
+    the policy is shared.
+    """
+
+    def __init__(self, policy, sleep=time.sleep):
+        self.policy = policy
+        self._sleep = sleep
+        self._budget = RetryBudget(policy.budget_ratio, policy.budget_reserve)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {'requests': 0, 'retries': 0,
+                          'budget_exhausted': 0}
+
+    @property
+    def last_retries(self):
+        return getattr(self._local, 'retries', 0)
+
+    def statistics(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def call(self, method, send):
+        """
+        Calls ``send`` until it succeeds or the policy gives up.
+
+        :param method: Lower case HTTP method of the request
+        :param send: Callable issuing the request and returning a response
+        :returns: The last response
+        """
+        self._budget.deposit()
+        self._count('requests')
+        attempt = 0
+        try:
+            while True:
+                try:
+                    resp = send()
+                except Exception as exc:
+                    delay = self._next_delay(method, attempt, exc=exc)
+                    if delay is None:
+                        raise
+                else:
+                    delay = self._next_delay(method, attempt, resp=resp)
+                    if delay is None:
+                        return resp
+                attempt += 1
+                self._sleep(delay)
+        finally:
+            self._local.retries = attempt
+
+    def _next_delay(self, method, attempt, resp=None, exc=None):
+        policy = self.policy
+        if attempt >= policy.max_retries or not policy.allows(method):
+            return None
+        if exc is not None:
+            if not policy.is_retryable_exception(exc):
+                return None
+            resp = getattr(exc, 'response', None)
+        elif not policy.is_retryable_response(resp):
+            return None
+        delay = policy.get_backoff(attempt, resp)
+        if delay is None:
+            return None
+        if not self._budget.withdraw():
+            self._count('budget_exhausted')
+            return None
+        self._count('retries')
+        return delay
+
+
+def _get_retry_after(resp):
+    if resp is None or resp.status_code not in _RETRY_AFTER_STATUS_CODES:
+        return None
+    value = resp.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        parsed = email.utils.parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(email.utils.mktime_tz(parsed) - time.time(), 0.0)
@@ -14,16 +14,22 @@
 # limitations under the License.
 import functools
 import logging
+import sys
+
 import six
 
-from oslo.utils.timeutils import parse_isotime
+from oslo.utils import timeutils
 
+from barbicanclient import _logging
 from barbicanclient import base
 from barbicanclient import formatter
+from barbicanclient import tracing
 
 
 LOG = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
 
 def lazy(func):
     @functools.wraps(func)
@@ -44,6 +50,8 @@ def immutable_after_save(func):
 
 class SecretFormatter(formatter.EntityFormatter):
 
+    __slots__ = ()
+
     columns = ("Secret href",
                "Name",
                "Created",
@@ -75,12 +83,20 @@ class Secret(SecretFormatter):
     """
     _entity = 'secrets'
 
+    # Listings can hold many secrets, so instances have no __dict__
+    __slots__ = ('_api', '_secret_ref', '_name', '_algorithm', '_bit_length',
+                 '_mode', '_payload', '_payload_content_type',
+                 '_payload_content_encoding', '_expiration',
+                 '_parsed_expiration', '_content_types', '_status',
+                 '_created', '_updated', '_lock')
+
     def __init__(self, api, name=None, expiration=None, algorithm=None,
                  bit_length=None, mode=None, payload=None,
                  payload_content_type=None, payload_content_encoding=None,
                  secret_ref=None, created=None, updated=None,
                  content_types=None, status=None):
         self._api = api
+        self._lock = base.entity_lock(api)
         self._secret_ref = secret_ref
         self._fill_from_data(
             name=name,
@@ -109,7 +125,10 @@ class Secret(SecretFormatter):
     @property
     @lazy
     def expiration(self):
-        return self._expiration
+        # The raw value is kept for store(), which sends it as given
+        if self._parsed_expiration is None:
+            self._parsed_expiration = base.parse_timestamp(self._expiration)
+        return self._parsed_expiration
 
     @property
     @lazy
@@ -134,11 +153,13 @@ class Secret(SecretFormatter):
     @property
     @lazy
     def created(self):
+        self._created = base.parse_timestamp(self._created)
         return self._created
 
     @property
     @lazy
     def updated(self):
+        self._updated = base.parse_timestamp(self._updated)
         return self._updated
 
     @property
@@ -164,7 +185,9 @@ class Secret(SecretFormatter):
     @property
     def payload(self):
         if not self._payload:
-            self._fetch_payload()
+            with self._lock:
+                if not self._payload:
+                    self._fetch_payload()
         return self._payload
 
     @name.setter
@@ -176,6 +199,7 @@ class Secret(SecretFormatter):
     @immutable_after_save
     def expiration(self, value):
         self._expiration = value
+        self._parsed_expiration = None
 
     @algorithm.setter
     @immutable_after_save
@@ -207,18 +231,86 @@ class Secret(SecretFormatter):
     def payload_content_encoding(self, value):
         self._payload_content_encoding = value
 
-    def _fetch_payload(self):
+    def iter_payload(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields the decrypted payload in chunks of at most chunk_size bytes
+
+        The payload is streamed from Barbican and never held in memory as a
+        whole.  It bypasses the payload cache.  A file object or iterator
+        given as the payload of an unsaved secret is consumed as it is read.
+        """
+        if _is_stream(self._payload):
+            for chunk in _iter_stream(self._payload, chunk_size):
+                for piece in _split_payload(chunk, chunk_size):
+                    yield piece
+            return
+        if self._payload:
+            for piece in _split_payload(self._payload, chunk_size):
+                yield piece
+            return
+        headers = self._get_payload_headers()
+        _logging.debug(LOG, 'secret.stream_payload', ref=self._secret_ref)
+        for chunk in self._api._get_stream(self._secret_ref, headers,
+                                           chunk_size):
+            yield chunk
+
+    def payload_to_file(self, fobj, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Writes the decrypted payload to a binary file object as it streams
+
+        :returns: the number of bytes written
+        """
+        written = 0
+        for chunk in self.iter_payload(chunk_size):
+            fobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    def _get_payload_headers(self):
         if not self.payload_content_type and not self.content_types:
             raise ValueError('Secret has no encrypted data to decrypt.')
         elif not self.payload_content_type:
             raise ValueError("Must specify decrypt content-type as "
                              "secret does not specify a 'default' "
                              "content-type.")
-        headers = {'Accept': self.payload_content_type}
-        self._payload = self._api._get_raw(self._secret_ref, headers)
+        return {'Accept': self.payload_content_type}
+
+    @tracing.traced
+    def _fetch_payload(self):
+        headers = self._get_payload_headers()
+        payload_cache = self._api._payload_cache
+        if payload_cache is None:
+            self._payload = self._api._get_raw(self._secret_ref, headers)
+            return
+        cache_key = (self._secret_ref, self.payload_content_type)
+        payload = payload_cache.get(cache_key)
+        if payload is None:
+            ttl = self._seconds_until_expiration()
+            payload = self._api._get_raw(self._secret_ref, headers)
+            payload_cache.set(cache_key, payload, ttl=ttl)
+        self._payload = payload
+
+    def _seconds_until_expiration(self):
+        if not self.expiration:
+            return None
+        return timeutils.delta_seconds(
+            timeutils.utcnow(), timeutils.normalize_time(self.expiration))
 
+    @tracing.traced
     @immutable_after_save
     def store(self):
+        """
+        Stores the secret in Barbican
+
+        A payload given as a file object or an iterator of bytes is uploaded
+        as a streamed request body once the secret metadata was stored, so
+        it is never held in memory as a whole.  If the upload fails the
+        secret is deleted again.
+
+        :returns: the secret reference
+        """
+        if _is_stream(self._payload):
+            return self._store_streamed()
         secret_dict = base.filter_empty_keys({
             'name': self.name,
             'payload': self.payload,
@@ -227,47 +319,93 @@ class Secret(SecretFormatter):
             'algorithm': self.algorithm,
             'mode': self.mode,
             'bit_length': self.bit_length,
-            'expiration': self.expiration
+            'expiration': self._expiration
         })
 
-        LOG.debug("Request body: {0}".format(secret_dict))
+        _logging.debug(LOG, 'secret.store', body=secret_dict)
 
         # Save, store secret_ref and return
         response = self._api._post(self._entity, secret_dict)
         if response:
             self._secret_ref = response.get('secret_ref')
+            _invalidate_caches(self._api, self._secret_ref)
         return self.secret_ref
 
+    def _store_streamed(self):
+        secret_dict = base.filter_empty_keys({
+            'name': self.name,
+            'algorithm': self.algorithm,
+            'mode': self.mode,
+            'bit_length': self.bit_length,
+            'expiration': self._expiration
+        })
+        content_type = (self.payload_content_type or
+                        'application/octet-stream')
+        headers = {'Content-Type': content_type}
+        if self.payload_content_encoding:
+            headers['Content-Encoding'] = self.payload_content_encoding
+
+        _logging.debug(LOG, 'secret.store', body=secret_dict, streamed=True)
+
+        response = self._api._post(self._entity, secret_dict)
+        if not response:
+            return None
+        secret_ref = response.get('secret_ref')
+        _logging.debug(LOG, 'secret.upload_payload', ref=secret_ref)
+        try:
+            self._api._put(secret_ref, self._payload, headers)
+        except Exception:
+            exc_info = sys.exc_info()
+            try:
+                self._api._delete(secret_ref)
+            except Exception as e:
+                _logging.log(LOG, logging.WARNING,
+                             'secret.upload_cleanup_failed', ref=secret_ref,
+                             error=e)
+            six.reraise(*exc_info)
+        self._secret_ref = secret_ref
+        self._payload = None
+        self._payload_content_type = content_type
+        _invalidate_caches(self._api, self._secret_ref)
+        return self._secret_ref
+
+    @tracing.traced
     def delete(self):
         if self._secret_ref:
             self._api._delete(self._secret_ref)
+            _invalidate_caches(self._api, self._secret_ref)
             self._secret_ref = None
         else:
             raise LookupError("Secret is not yet stored.")
 
+    @tracing.traced
+    def _get_metadata(self):
+        metadata_cache = self._api._metadata_cache
+        if metadata_cache is None:
+            return self._api._get(self._secret_ref)
+        result = metadata_cache.get(self._secret_ref)
+        if result is None:
+            result = self._api._get(self._secret_ref)
+            metadata_cache.set(self._secret_ref, result)
+        return result
+
     def _fill_from_data(self, name=None, expiration=None, algorithm=None,
                         bit_length=None, mode=None, payload=None,
                         payload_content_type=None,
                         payload_content_encoding=None, created=None,
                         updated=None, content_types=None, status=None):
-        self._name = name
         self._algorithm = algorithm
         self._bit_length = bit_length
         self._mode = mode
         self._payload = payload
         self._payload_content_encoding = payload_content_encoding
         self._expiration = expiration
-        if self._expiration:
-            self._expiration = parse_isotime(self._expiration)
+        self._parsed_expiration = None
         if self._secret_ref:
             self._content_types = content_types
             self._status = status
             self._created = created
             self._updated = updated
-            if self._created:
-                self._created = parse_isotime(self._created)
-            if self._updated:
-                self._updated = parse_isotime(self._updated)
         else:
             self._content_types = None
             self._status = None
@@ -279,25 +417,34 @@ class Secret(SecretFormatter):
         else:
             self._payload_content_type = self._content_types.get('default',
                                                                  None)
+        # Set last, threads that find a name skip loading the metadata
+        self._name = name
 
     def _fill_lazy_properties(self):
         if self._secret_ref and not self._name:
-            result = self._api._get(self._secret_ref)
-            self._fill_from_data(
-                name=result.get('name'),
-                expiration=result.get('expiration'),
-                algorithm=result.get('algorithm'),
-                bit_length=result.get('bit_length'),
-                mode=result.get('mode'),
-                payload_content_type=result.get('payload_content_type'),
-                payload_content_encoding=result.get(
-                    'payload_content_encoding'
-                ),
-                created=result.get('created'),
-                updated=result.get('updated'),
-                content_types=result.get('content_types'),
-                status=result.get('status')
-            )
+            with self._lock:
+                if self._name:
+                    return
+                self._load_metadata()
+
+    def _load_metadata(self):
+        result = self._get_metadata()
+        self._fill_from_data(
+            name=result.get('name'),
+            expiration=result.get('expiration'),
+            algorithm=result.get('algorithm'),
+            bit_length=result.get('bit_length'),
+            mode=result.get('mode'),
+            payload=self._payload,
+            payload_content_type=result.get('payload_content_type'),
+            payload_content_encoding=result.get(
+                'payload_content_encoding'
+            ),
+            created=result.get('created'),
+            updated=result.get('updated'),
+            content_types=result.get('content_types'),
+            status=result.get('status')
+        )
 
     def __repr__(self):
         if self._secret_ref:
@@ -305,6 +452,40 @@ class Secret(SecretFormatter):
         return 'Secret(name="{0}")'.format(self._name)
 
 
+def _is_stream(payload):
+    if payload is None or isinstance(payload, (six.binary_type, bytearray,
+                                               six.text_type)):
+        return False
+    return (hasattr(payload, 'read') or hasattr(payload, '__next__') or
+            hasattr(payload, 'next'))
+
+
+def _iter_stream(payload, chunk_size):
+    if not hasattr(payload, 'read'):
+        for chunk in payload:
+            yield chunk
+        return
+    while True:
+        chunk = payload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_payload(payload, chunk_size):
+    if isinstance(payload, six.text_type):
+        payload = payload.encode('utf-8')
+    for start in range(0, len(payload), chunk_size):
+        yield payload[start:start + chunk_size]
+
+
+def _invalidate_caches(api, secret_ref):
+    if api._metadata_cache is not None:
+        api._metadata_cache.invalidate(secret_ref)
+    if api._payload_cache is not None:
+        api._payload_cache.invalidate_ref(secret_ref)
+
+
 class SecretManager(base.BaseEntityManager):
 
     def __init__(self, api):
@@ -318,7 +499,7 @@ class SecretManager(base.BaseEntityManager):
         :param payload_content_type: Content type to use for payload decryption
         :returns: Secret
         """
-        LOG.debug("Getting secret - Secret href: {0}".format(secret_ref))
+        _logging.debug(LOG, 'secret.get', ref=secret_ref)
         base.validate_ref(secret_ref, 'Secret')
         return Secret(
             api=self._api,
@@ -326,6 +507,39 @@ class SecretManager(base.BaseEntityManager):
             secret_ref=secret_ref
         )
 
+    @tracing.traced
+    def get_many(self, secret_refs, max_workers=base.DEFAULT_MAX_WORKERS,
+                 include_payload=False, payload_content_type=None):
+        """
+        Get many Secrets with their metadata loaded
+
+        The secrets are retrieved concurrently.  A secret that cannot be
+        retrieved does not abort the others; its error is reported instead.
+
+        :param secret_refs: Full HATEOAS references to Secrets.  Duplicate
+            references are only retrieved once.
+        :param max_workers: Maximum number of concurrent requests
+        :param include_payload: If True the decrypted payloads are retrieved
+            as well
+        :param payload_content_type: Content type to use for payload decryption
+        :returns: list of base.BulkResult(ref, entity, error) tuples, one per
+            unique secret_ref in the order given
+        """
+        secret_refs = base.unique(secret_refs)
+        _logging.debug(LOG, 'secret.get_many', count=len(secret_refs))
+
+        def load(secret_ref):
+            secret = self.get(secret_ref,
+                              payload_content_type=payload_content_type)
+            secret._fill_lazy_properties()
+            if include_payload:
+                secret._fetch_payload()
+            return secret
+
+        results = base.run_concurrently(load, secret_refs, max_workers)
+        return [base.BulkResult(ref, secret, error)
+                for ref, (secret, error) in zip(secret_refs, results)]
+
     def create(self, name=None, payload=None,
                payload_content_type=None, payload_content_encoding=None,
                algorithm=None, bit_length=None, mode=None, expiration=None):
@@ -348,6 +562,7 @@ class SecretManager(base.BaseEntityManager):
                       algorithm=algorithm, bit_length=bit_length, mode=mode,
                       expiration=expiration)
 
+    @tracing.traced
     def delete(self, secret_ref):
         """
         Delete a Secret
@@ -357,9 +572,11 @@ class SecretManager(base.BaseEntityManager):
         if not secret_ref:
             raise ValueError('secret_ref is required.')
         self._api._delete(secret_ref)
+        _invalidate_caches(self._api, secret_ref)
 
+    @tracing.traced
     def list(self, limit=10, offset=0, name=None, algorithm=None,
-             mode=None, bits=0):
+             mode=None, bits=0, fields=None, columnar=False):
         """
         List all Secrets for the project
 
@@ -369,10 +586,14 @@ class SecretManager(base.BaseEntityManager):
         :param algorithm: Algorithm filter for the list
         :param mode: Mode filter for the list
         :param bits: Bits filter for the list
+        :param fields: Names of the fields to return, such as 'secret_ref'
+            or 'name'.  When given, named tuples holding the values sent by
+            Barbican are returned instead of Secret objects.
+        :param columnar: If True, return the fields as a dict of lists keyed
+            by field name
         :returns: list of Secret metadata objects
         """
-        LOG.debug('Listing secrets - offset {0} limit {1}'.format(offset,
-                                                                  limit))
+        _logging.debug(LOG, 'secret.list', offset=offset, limit=limit)
         href = '{0}/{1}'.format(self._api._base_url, self._entity)
         params = {'limit': limit, 'offset': offset}
         if name:
@@ -386,6 +607,9 @@ class SecretManager(base.BaseEntityManager):
 
         response = self._api._get(href, params)
 
+        if fields is not None:
+            return base.select_fields(response.get('secrets', []), fields,
+                                      columnar)
         return [
             Secret(api=self._api, **s)
             for s in response.get('secrets', [])
@@ -0,0 +1,85 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Coalescing of identical requests issued concurrently by several threads.
+"""
+import sys
+import threading
+
+import six
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs a function at most once at a time per key.
+
+    Threads calling do() with a key whose call is still running wait for it
+    and get its result, or its exception, instead of running the function
+    again.  Nothing is kept once the call returns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._requests = 0
+        self._coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Calls func(*args, **kwargs), unless a call for key is running.
+
+        :param key: Hashable key identifying identical calls
+        :returns: the result of the call shared by the waiting threads
+        """
+        with self._lock:
+            self._requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self._coalesced += 1
+
+        if leader:
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException:
+                call.error = sys.exc_info()
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            six.reraise(*call.error)
+        return call.result
+
+    def statistics(self):
+        """
+        Returns the number of ``requests`` made through do() and how many of
+        them were ``coalesced`` into a call already running.
+        """
+        with self._lock:
+            return {'requests': self._requests,
+                    'coalesced': self._coalesced}
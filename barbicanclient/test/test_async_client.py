@@ -0,0 +1,180 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+import mock
+import testtools
+
+try:
+    import asyncio
+    from barbicanclient import async_client
+except (ImportError, SyntaxError):
+    asyncio = None
+
+from barbicanclient import secrets
+
+
+@testtools.skipIf(asyncio is None, 'asyncio is not available')
+class WhenTestingAsyncClient(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingAsyncClient, self).setUp()
+        self.endpoint = 'http://localhost:9311'
+        self.secret_ref = (self.endpoint + '/v1/secrets/'
+                           'abcd1234-eabc-5678-9abc-abcdef012345')
+        self.resp = mock.MagicMock()
+        self.resp.status_code = 200
+        self.session = mock.MagicMock()
+        self.session.get.return_value = self.resp
+        self.session.post.return_value = self.resp
+        self.session.delete.return_value = self.resp
+        self.session.get_endpoint.return_value = self.endpoint
+        self.client = async_client.AsyncClient(session=self.session,
+                                               max_workers=2,
+                                               json_codec='json')
+        self.addCleanup(self.client.close)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+
+    def _run(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def _drain(self, iterator):
+        items = []
+        while True:
+            try:
+                items.append(self._run(iterator.__anext__()))
+            except StopAsyncIteration:
+                return items
+
+    def test_get_secret_loads_metadata_in_executor(self):
+        self.resp.json.return_value = {'name': 'test', 'status': 'ACTIVE'}
+        secret = self._run(self.client.secrets.get(self.secret_ref))
+        self.assertIsInstance(secret.entity, secrets.Secret)
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertEqual('test', secret.name)
+        self.assertEqual(1, self.session.get.call_count)
+
+    def test_get_secret_with_payload(self):
+        self.resp.json.return_value = {
+            'name': 'test', 'content_types': {'default': 'text/plain'}
+        }
+        self.resp.content = 'payload'
+        secret = self._run(self.client.secrets.get(self.secret_ref,
+                                                   payload=True))
+        self.assertEqual(2, self.session.get.call_count)
+        self.assertEqual('payload', secret.payload)
+
+    def test_store_secret_is_awaitable(self):
+        self.resp.json.return_value = {'secret_ref': self.secret_ref}
+        secret = self.client.secrets.create(name='test', payload='data')
+        secret.payload_content_type = 'text/plain'
+        secret_ref = self._run(secret.store())
+        self.assertEqual(self.secret_ref, secret_ref)
+        self.assertEqual(self.secret_ref, secret.secret_ref)
+
+    def test_delete_is_awaitable(self):
+        self._run(self.client.secrets.delete(self.secret_ref))
+        args, kwargs = self.session.delete.call_args
+        self.assertEqual(self.secret_ref, args[0])
+
+    def test_total_is_awaitable(self):
+        self.resp.json.return_value = {'total': 3}
+        self.assertEqual(3, self._run(self.client.secrets.total()))
+
+    def test_list_wraps_entities(self):
+        self.resp.json.return_value = {
+            'secrets': [{'name': 'one', 'secret_ref': self.secret_ref}]
+        }
+        listed = self._run(self.client.secrets.list())
+        self.assertEqual(1, len(listed))
+        self.assertIsInstance(listed[0], async_client.AsyncEntity)
+        self.assertEqual('one', listed[0].name)
+
+    def test_iter_all_follows_pages(self):
+        first = {'secrets': [{'name': 'one', 'secret_ref': self.secret_ref},
+                             {'name': 'two', 'secret_ref': self.secret_ref}]}
+        second = {'secrets': [{'name': 'three',
+                               'secret_ref': self.secret_ref}]}
+        self.resp.json.side_effect = [first, second]
+        names = [s.name for s in
+                 self._drain(self.client.secrets.iter_all(page_size=2))]
+        self.assertEqual(['one', 'two', 'three'], names)
+        offsets = [kwargs['params']['offset']
+                   for args, kwargs in self.session.get.call_args_list]
+        self.assertEqual([0, 2], offsets)
+
+    def test_iter_all_caps_page_size(self):
+        one = {'name': 'one', 'secret_ref': self.secret_ref}
+        full = {'secrets': [one] * 100}
+        last = {'secrets': [{'name': 'two', 'secret_ref': self.secret_ref}]}
+        self.resp.json.side_effect = [full, last]
+        listed = self._drain(self.client.secrets.iter_all(page_size=200))
+        self.assertEqual(101, len(listed))
+        limits = [kwargs['params']['limit']
+                  for args, kwargs in self.session.get.call_args_list]
+        self.assertEqual([100, 100], limits)
+
+    def test_container_create_accepts_async_secrets(self):
+        secret = self.client.secrets.create(name='test')
+        container = self.client.containers.create(secrets={'a': secret})
+        self.assertIs(secret.entity, container.secrets['a'])
+
+    def test_load_reloads_metadata_after_store(self):
+        self.resp.json.return_value = {'secret_ref': self.secret_ref}
+        secret = self.client.secrets.create(name='test', payload='data')
+        secret.payload_content_type = 'text/plain'
+        self._run(secret.store())
+        self.resp.json.return_value = {'name': 'test', 'status': 'ACTIVE',
+                                       'created': '2015-03-15T22:32:19'}
+        self.assertIs(secret, self._run(secret.load()))
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertEqual('ACTIVE', secret.status)
+        self.assertIsNotNone(secret.created)
+        self.assertEqual(1, self.session.get.call_count)
+
+    def test_load_retrieves_container_secrets(self):
+        container_ref = (self.endpoint + '/v1/containers/'
+                         'abcd1234-eabc-5678-9abc-abcdef012346')
+        self.resp.json.return_value = {
+            'container_ref': container_ref, 'name': 'container',
+            'type': 'generic',
+            'secret_refs': [{'name': 'key', 'secret_ref': self.secret_ref}]
+        }
+        container = self._run(self.client.containers.get(container_ref))
+        self.resp.json.return_value = {
+            'name': 'key', 'status': 'ACTIVE',
+            'content_types': {'default': 'text/plain'}
+        }
+        self.resp.content = 'payload'
+        self._run(container.load(payload=True))
+        self.assertEqual(3, self.session.get.call_count)
+        self.assertEqual('key', container.secrets['key'].name)
+        self.assertEqual('payload', container.secrets['key'].payload)
+        self.assertEqual(3, self.session.get.call_count)
+
+    def test_concurrent_loads_fetch_once(self):
+        self.resp.json.return_value = {'secret_ref': self.secret_ref}
+        secret = self.client.secrets.create(name='test', payload='data')
+        secret.payload_content_type = 'text/plain'
+        self._run(secret.store())
+
+        def get(*args, **kwargs):
+            time.sleep(0.05)
+            return self.resp
+        self.session.get.side_effect = get
+        self.resp.json.return_value = {'name': 'test', 'status': 'ACTIVE'}
+        self._run(asyncio.gather(secret.load(), secret.load()))
+        self.assertEqual(1, self.session.get.call_count)
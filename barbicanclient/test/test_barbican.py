@@ -13,15 +13,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
 import os
+import shutil
 import sys
+import tempfile
+import time
 
+import mock
 import six
 import testtools
 import httpretty
 import uuid
 import json
 
+from barbicanclient.barbican_cli import bench as cli_bench
+from barbicanclient.barbican_cli import secrets as cli_secrets
+from barbicanclient import client
+from barbicanclient import fake_barbican
 from barbicanclient.test import keystone_client_fixtures
 from barbicanclient.test import test_client
 import barbicanclient.barbican
@@ -193,3 +202,112 @@ class TestBarbicanWithKeystoneClient(testtools.TestCase):
                                body=json.dumps(v3_token),
                                adding_headers={'x-subject-token': '1234'})
         self._delete_secret(keystone_client_fixtures.V3_URL)
+
+
+class WhenTestingGetSecretCommand(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingGetSecretCommand, self).setUp()
+        self.app = mock.MagicMock()
+        self.app.stdout.buffer = six.BytesIO()
+        self.secret = self.app.client.secrets.get.return_value
+        self.secret.payload_to_file.side_effect = (
+            lambda fobj: fobj.write(b'payload'))
+        self.command = cli_secrets.GetSecret(self.app, None)
+        self.ref = 'http://localhost:9311/v1/secrets/1234'
+
+    def _run(self, argv):
+        parser = self.command.get_parser('barbican secret get')
+        return self.command.run(parser.parse_args(argv))
+
+    def test_should_stream_decrypted_payload_to_stdout(self):
+        self.assertEqual(0, self._run([self.ref, '--decrypt']))
+
+        self.assertEqual(b'payload', self.app.stdout.buffer.getvalue())
+        self.app.client.secrets.get.assert_called_once_with(
+            secret_ref=self.ref, payload_content_type='text/plain')
+
+    def test_should_stream_decrypted_payload_to_file(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        path = os.path.join(tempdir, 'payload')
+
+        self._run([self.ref, '--decrypt', '--file', path])
+
+        with open(path, 'rb') as fobj:
+            self.assertEqual(b'payload', fobj.read())
+        self.assertEqual(b'', self.app.stdout.buffer.getvalue())
+
+
+class WhenTestingBenchCommand(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingBenchCommand, self).setUp()
+        self.server = fake_barbican.FakeBarbicanServer().start()
+        self.addCleanup(self.server.stop)
+        self.app = mock.MagicMock()
+        self.app.stdout = six.StringIO()
+        self.app.create_client.side_effect = (
+            lambda **kwargs: client.Client(endpoint=self.server.endpoint,
+                                           project_id='project', **kwargs))
+        self.command = cli_bench.Bench(self.app, None)
+
+    def _run(self, argv):
+        parser = self.command.get_parser('barbican bench')
+        self.command.run(parser.parse_args(argv + ['-f', 'json']))
+        return dict((row['Operation'], row)
+                    for row in json.loads(self.app.stdout.getvalue()))
+
+    def test_should_report_every_operation_of_the_mix(self):
+        rows = self._run(['--requests', '70', '--concurrency', '4'])
+
+        self.assertEqual(set(cli_bench.OPERATIONS + ('all',)), set(rows))
+        self.assertEqual(70, rows['all']['Requests'])
+        self.assertEqual(0, rows['all']['Errors'])
+        self.assertEqual(70, sum(row['Requests'] for name, row in
+                                 rows.items() if name != 'all'))
+        self.assertTrue(rows['all']['p50'] <= rows['all']['p99'])
+        self.app.create_client.assert_called_once_with(
+            thread_safe=True, pool_maxsize=4, coalesce_requests=False)
+
+    def test_should_only_run_the_operations_of_the_mix(self):
+        rows = self._run(['--requests', '20', '--mix', 'secret-get=3,'
+                          'secret-store'])
+
+        self.assertEqual(set(['secret-get', 'secret-store', 'all']),
+                         set(rows))
+
+    def test_should_pace_operations_at_the_target_rate(self):
+        start = time.time()
+
+        rows = self._run(['--requests', '20', '--rate', '100', '--mix',
+                          'secret-get'])
+
+        self.assertTrue(time.time() - start >= 0.19)
+        self.assertEqual(20, rows['secret-get']['Requests'])
+
+    def test_should_delete_created_entities_on_cleanup(self):
+        self._run(['--requests', '30', '--cleanup', '--mix',
+                   'secret-store,container-create,secret-delete,'
+                   'order-submit'])
+
+        entities = self.server.app._entities
+        self.assertEqual({}, entities['secrets'])
+        self.assertEqual({}, entities['containers'])
+        self.assertEqual({}, entities['orders'])
+
+    def test_should_parse_weighted_mixes(self):
+        self.assertEqual({'secret-get': 3.0, 'order-submit': 1.0},
+                         cli_bench.parse_mix('secret-get=3,order-submit'))
+        self.assertRaises(argparse.ArgumentTypeError, cli_bench.parse_mix,
+                          'secret-list')
+        self.assertRaises(argparse.ArgumentTypeError, cli_bench.parse_mix,
+                          'secret-get=0')
+
+    def test_should_compute_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(50, cli_bench.percentile(values, 50))
+        self.assertEqual(99, cli_bench.percentile(values, 99))
+        self.assertEqual(1, cli_bench.percentile([1], 99))
+        self.assertIsNone(cli_bench.percentile([], 50))
@@ -0,0 +1,177 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import testtools
+
+from barbicanclient import cache
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class WhenTestingTTLCache(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingTTLCache, self).setUp()
+        self.clock = FakeClock()
+        self.cache = cache.TTLCache(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_get_returns_value_that_was_set(self):
+        self.cache.set('a', 1)
+        self.assertEqual(1, self.cache.get('a'))
+
+    def test_get_returns_none_for_missing_key(self):
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.set('a', 1)
+        self.clock.now += 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(1, self.cache.statistics()['expirations'])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(3, self.cache.get('c'))
+        self.assertEqual(1, self.cache.statistics()['evictions'])
+
+    def test_set_replaces_existing_value(self):
+        self.cache.set('a', 1)
+        self.cache.set('a', 2)
+        self.assertEqual(2, self.cache.get('a'))
+        self.assertEqual(1, len(self.cache))
+
+    def test_invalidate_removes_entry(self):
+        self.cache.set('a', 1)
+        self.cache.invalidate('a')
+        self.cache.invalidate('missing')
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_clear_removes_all_entries(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+
+    def test_statistics_count_hits_and_misses(self):
+        self.cache.set('a', 1)
+        self.cache.get('a')
+        self.cache.get('a')
+        self.cache.get('b')
+        stats = self.cache.statistics()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['entries'])
+
+
+class WhenTestingPayloadCache(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingPayloadCache, self).setUp()
+        self.clock = FakeClock()
+        self.cache = cache.PayloadCache(max_entries=10, ttl=60, max_uses=2,
+                                        max_bytes=10, clock=self.clock)
+
+    def _cached_payload(self, key):
+        return self.cache._entries[key].value
+
+    def test_returns_copies_of_bytes_and_text(self):
+        self.cache.set(('a', 'application/octet-stream'), b'\x01\x02')
+        self.cache.set(('a', 'text/plain'), u'text')
+        self.assertEqual(b'\x01\x02',
+                         self.cache.get(('a', 'application/octet-stream')))
+        self.assertEqual(u'text', self.cache.get(('a', 'text/plain')))
+
+    def test_payload_is_dropped_and_wiped_after_max_uses(self):
+        self.cache.set('a', b'secret')
+        payload = self._cached_payload('a')
+        self.assertEqual(b'secret', self.cache.get('a'))
+        self.assertEqual(b'secret', self.cache.get('a'))
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(bytearray(6), payload.data)
+
+    def test_expired_payload_is_wiped(self):
+        self.cache.set('a', b'secret')
+        payload = self._cached_payload('a')
+        self.clock.now += 60
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(bytearray(6), payload.data)
+
+    def test_shorter_ttl_is_honoured(self):
+        self.cache.set('a', b'secret', ttl=5)
+        self.clock.now += 5
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_longer_ttl_is_capped_by_cache_ttl(self):
+        self.cache.set('a', b'secret', ttl=3600)
+        self.clock.now += 60
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_expired_ttl_is_not_cached(self):
+        self.cache.set('a', b'secret', ttl=-1)
+        self.assertEqual(0, len(self.cache))
+
+    def test_total_size_is_bounded(self):
+        self.cache.set('a', b'12345')
+        first = self._cached_payload('a')
+        self.cache.set('b', b'123456')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(bytearray(5), first.data)
+        self.assertEqual(6, self.cache.statistics()['bytes'])
+
+    def test_oversized_payload_is_not_cached(self):
+        self.cache.set('a', b'12345678901')
+        self.assertEqual(0, len(self.cache))
+
+    def test_invalidate_ref_drops_every_content_type(self):
+        self.cache.set(('a', 'text/plain'), b'1')
+        self.cache.set(('a', 'application/octet-stream'), b'2')
+        self.cache.set(('b', 'text/plain'), b'3')
+        self.cache.invalidate_ref('a')
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(1, self.cache.statistics()['bytes'])
+
+
+class WhenTestingHTTPCache(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingHTTPCache, self).setUp()
+        self.cache = cache.HTTPCache(max_entries=10, ttl=10)
+
+    def test_hit_ratio_is_reported_per_endpoint(self):
+        for revalidated in (True, True, True, False):
+            self.cache.record('secrets', revalidated)
+        self.cache.record('containers', False)
+
+        endpoints = self.cache.statistics()['endpoints']
+        self.assertEqual({'hits': 3, 'misses': 1, 'hit_ratio': 0.75},
+                         endpoints['secrets'])
+        self.assertEqual(0.0, endpoints['containers']['hit_ratio'])
+
+    def test_invalidate_href_drops_every_parameter_set(self):
+        response = cache.CachedResponse('"1"', None, b'{}')
+        self.cache.set(('a', None), response)
+        self.cache.set(('a', (('limit', 10),)), response)
+        self.cache.set(('b', None), response)
+        self.cache.invalidate_href('a')
+        self.assertEqual(1, len(self.cache))
@@ -12,10 +12,21 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+import threading
+import time
+
+from keystoneclient import session as ks_session
 import mock
+import requests
+from requests import adapters
+from six.moves import BaseHTTPServer
 import testtools
+from testtools import matchers
 
 from barbicanclient import client
+from barbicanclient import containers
+from barbicanclient import pooling
 
 
 class TestClient(testtools.TestCase):
@@ -24,8 +35,10 @@ class TestClient(testtools.TestCase):
         super(TestClient, self).setUp()
         self.endpoint = 'http://localhost:9311'
         self.project_id = 'project_id'
+        # The fake responses below are decoded with resp.json()
         self.client = client.Client(endpoint=self.endpoint,
-                                    project_id=self.project_id)
+                                    project_id=self.project_id,
+                                    json_codec='json')
 
 
 class WhenTestingClientInit(TestClient):
@@ -82,6 +95,233 @@ class WhenTestingClientInit(TestClient):
         self.assertEqual(c._barbican_endpoint, self.endpoint)
 
 
+class _OKHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"total": 0}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class WhenTestingClientPooling(TestClient):
+
+    def _get_fake_session(self):
+        sess = mock.MagicMock()
+        sess.get_endpoint.return_value = self.endpoint
+        return sess
+
+    def test_mounts_pooling_adapter_on_own_session(self):
+        adapter = self.client._session.session.get_adapter(self.endpoint)
+        self.assertIsInstance(adapter, pooling.PoolingAdapter)
+
+    def test_pool_options_are_passed_to_adapter(self):
+        c = client.Client(endpoint=self.endpoint, project_id=self.project_id,
+                          pool_connections=2, pool_maxsize=64,
+                          pool_block=True)
+        adapter = c._session.session.get_adapter(self.endpoint)
+        self.assertEqual(2, adapter._pool_connections)
+        self.assertEqual(64, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+
+    def test_given_session_is_left_alone_without_pool_options(self):
+        sess = self._get_fake_session()
+        c = client.Client(session=sess)
+        self.assertFalse(sess.session.mount.called)
+        self.assertIsNone(c.pool_statistics())
+
+    def test_given_session_is_tuned_with_pool_options(self):
+        sess = self._get_fake_session()
+        client.Client(session=sess, pool_maxsize=64)
+        self.assertEqual(2, sess.session.mount.call_count)
+
+    def test_keep_alive_disabled_sends_connection_close(self):
+        c = client.Client(endpoint=self.endpoint, project_id=self.project_id,
+                          keep_alive=False)
+        self.assertEqual('close', c._default_headers['Connection'])
+
+    def test_pool_statistics_count_reused_connections(self):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _OKHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        endpoint = 'http://127.0.0.1:{0}'.format(server.server_port)
+        c = client.Client(endpoint=endpoint, project_id=self.project_id)
+        self.addCleanup(c._session.session.close)
+
+        for _ in range(3):
+            c.secrets.total()
+
+        stats = c.pool_statistics()
+        self.assertEqual(3, stats['checkouts'])
+        self.assertEqual(1, stats['new_connections'])
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(0, stats['waits'])
+
+
+class _FakeBarbicanAdapter(adapters.BaseAdapter):
+    """Answers secret metadata and payload requests after a short delay."""
+
+    def __init__(self):
+        super(_FakeBarbicanAdapter, self).__init__()
+        self.urls = []
+
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        time.sleep(0.001)
+        secret_id = request.url.rstrip('/').split('/')[-1]
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = request.url
+        resp.request = request
+        if request.headers.get('Accept') == 'application/json':
+            resp._content = json.dumps({
+                'secret_ref': request.url,
+                'name': secret_id,
+                'content_types': {'default': 'text/plain'},
+            }).encode('utf-8')
+        else:
+            resp._content = secret_id.encode('ascii')
+        return resp
+
+    def close(self):
+        pass
+
+
+class WhenTestingThreadSafeClient(TestClient):
+
+    def setUp(self):
+        super(WhenTestingThreadSafeClient, self).setUp()
+        self.session = ks_session.Session()
+        self.adapter = _FakeBarbicanAdapter()
+        self.session.session.mount('http://', self.adapter)
+        self.client = client.Client(session=self.session,
+                                    endpoint=self.endpoint,
+                                    project_id=self.project_id,
+                                    thread_safe=True)
+
+    def _secret_ref(self, secret_id):
+        return '{0}/secrets/{1}'.format(self.client._base_url, secret_id)
+
+    def test_thread_sessions_share_auth_and_adapters(self):
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(self.client._get_session()))
+        thread.start()
+        thread.join()
+
+        thread_session = sessions[0]
+        self.assertIsNot(self.session, thread_session)
+        self.assertIsNot(self.session.session, thread_session.session)
+        self.assertIs(self.session.auth, thread_session.auth)
+        self.assertIs(self.adapter,
+                      thread_session.session.get_adapter(self.endpoint))
+        self.assertIs(self.client._get_session(), self.client._get_session())
+
+    def test_thread_sessions_copy_requests_settings(self):
+        original = self.session.session
+        hook = mock.Mock()
+        original.hooks['response'].append(hook)
+        original.params = {'debug': '1'}
+        original.stream = True
+        original.trust_env = False
+        original.max_redirects = 3
+        original.cookies.set('flavor', 'oatmeal')
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(self.client._get_session()))
+        thread.start()
+        thread.join()
+
+        copied = sessions[0].session
+        self.assertEqual([hook], copied.hooks['response'])
+        self.assertIsNot(original.hooks['response'], copied.hooks['response'])
+        self.assertEqual({'debug': '1'}, copied.params)
+        self.assertTrue(copied.stream)
+        self.assertFalse(copied.trust_env)
+        self.assertEqual(3, copied.max_redirects)
+        self.assertEqual('oatmeal', copied.cookies.get('flavor'))
+        self.assertIsNot(original.cookies, copied.cookies)
+
+    def test_entities_get_their_own_lock(self):
+        first = self.client.secrets.get(self._secret_ref('1' * 32))
+        second = self.client.secrets.get(self._secret_ref('2' * 32))
+        self.assertIsNot(first._lock, second._lock)
+
+    def test_threads_load_a_shared_container_once(self):
+        container_ref = '{0}/containers/{1}'.format(self.client._base_url,
+                                                    'c' * 32)
+        container = containers.Container(self.client,
+                                         container_ref=container_ref)
+        names = []
+
+        def worker():
+            names.append(container.name)
+
+        threads = [threading.Thread(target=worker) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['c' * 32] * 50, names)
+        self.assertEqual([container_ref], self.adapter.urls)
+
+    def test_sessions_are_shared_without_thread_safe_mode(self):
+        c = client.Client(session=self.session, endpoint=self.endpoint,
+                          project_id=self.project_id)
+        self.assertIs(self.session, c._get_session())
+
+    def test_hundreds_of_threads_get_consistent_secrets(self):
+        secret_ids = ['{0:032x}'.format(i) for i in range(20)]
+        shared = self.client.secrets.get(self._secret_ref('f' * 32))
+        errors = []
+
+        def worker(secret_id):
+            try:
+                secret = self.client.secrets.get(self._secret_ref(secret_id))
+                self.assertEqual(secret_id, secret.name)
+                self.assertEqual(secret_id.encode('ascii'), secret.payload)
+                self.assertEqual('f' * 32, shared.name)
+                self.assertEqual(b'f' * 32, shared.payload)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker,
+                                    args=(secret_ids[i % 20],))
+                   for i in range(300)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        # Every thread sent its requests through its own session
+        self.assertEqual(300, self.client._thread_sessions.sessions)
+
+
+class WhenTestingClientCaches(TestClient):
+
+    def test_metadata_cache_is_disabled_by_default(self):
+        self.assertIsNone(self.client._metadata_cache)
+        self.assertIsNone(self.client.metadata_cache_statistics())
+
+    def test_metadata_cache_options(self):
+        c = client.Client(endpoint=self.endpoint, project_id=self.project_id,
+                          metadata_cache_size=5, metadata_cache_ttl=60)
+        self.assertEqual(5, c._metadata_cache.max_entries)
+        self.assertEqual(60, c._metadata_cache.ttl)
+        self.assertEqual(0, c.metadata_cache_statistics()['entries'])
+
+
 class TestClientWithSession(testtools.TestCase):
 
     def setUp(self):
@@ -104,7 +344,7 @@ class WhenTestingClientPost(TestClientWithSession):
     def setUp(self):
         super(WhenTestingClientPost, self).setUp()
         self.session = self._get_fake_session_with_status_code(201)
-        self.client = client.Client(session=self.session)
+        self.client = client.Client(session=self.session, json_codec='json')
 
     def test_post_normalizes_url_with_traling_slash(self):
         self.client._post(path='secrets', data={'test_data': 'test'})
@@ -138,7 +378,7 @@ class WhenTestingClientGet(TestClientWithSession):
     def setUp(self):
         super(WhenTestingClientGet, self).setUp()
         self.session = self._get_fake_session_with_status_code(200)
-        self.client = client.Client(session=self.session)
+        self.client = client.Client(session=self.session, json_codec='json')
         self.headers = dict()
         self.href = 'http://test_href'
 
@@ -199,12 +439,274 @@ class WhenTestingClientGet(TestClientWithSession):
         self.client._check_status_code.assert_called_with(resp)
 
 
+class WhenTestingClientGetStream(TestClientWithSession):
+
+    def setUp(self):
+        super(WhenTestingClientGetStream, self).setUp()
+        self.session = self._get_fake_session_with_status_code(200)
+        self.resp = self.session.get.return_value
+        self.resp.iter_content.return_value = iter([b'pay', b'load'])
+        self.client = client.Client(session=self.session, json_codec='json')
+        self.href = 'http://test_href'
+
+    def test_get_stream_yields_chunks_and_closes_response(self):
+        chunks = list(self.client._get_stream(self.href, {}, 3))
+
+        self.assertEqual([b'pay', b'load'], chunks)
+        args, kwargs = self.session.get.call_args
+        self.assertTrue(kwargs['stream'])
+        self.resp.iter_content.assert_called_once_with(3)
+        self.resp.close.assert_called_once_with()
+
+    def test_get_stream_raises_and_closes_response_on_error(self):
+        self.resp.status_code = 404
+        self.resp.json.return_value = {'title': 'Not Found'}
+
+        self.assertRaises(client.HTTPClientError, list,
+                          self.client._get_stream(self.href, {}, 3))
+        self.resp.close.assert_called_once_with()
+
+
+class WhenTestingClientPut(TestClientWithSession):
+
+    def setUp(self):
+        super(WhenTestingClientPut, self).setUp()
+        self.session = self._get_fake_session_with_status_code(204)
+        self.session.put.return_value.status_code = 204
+        self.client = client.Client(session=self.session, json_codec='json')
+        self.client._default_headers = {'Test-Default-Header': 'test'}
+        self.href = 'http://test_href'
+
+    def test_put_sends_data_as_is(self):
+        data = iter([b'pay', b'load'])
+        self.client._put(self.href, data, {'Content-Type': 'text/plain'})
+
+        args, kwargs = self.session.put.call_args
+        self.assertEqual(self.href, args[0])
+        self.assertIs(data, kwargs['data'])
+        self.assertEqual({'Content-Type': 'text/plain',
+                          'Test-Default-Header': 'test'}, kwargs['headers'])
+
+    def test_put_checks_status_code(self):
+        self.session.put.return_value.status_code = 400
+        self.assertRaises(client.HTTPClientError, self.client._put,
+                          self.href, b'', {})
+
+
+class WhenTestingClientCoalescing(TestClientWithSession):
+
+    def setUp(self):
+        super(WhenTestingClientCoalescing, self).setUp()
+        self.release = threading.Event()
+        self.session = self._get_fake_session_with_status_code(200)
+        resp = self.session.get.return_value
+        resp.json.side_effect = lambda: {'name': 'secret'}
+        resp.content = b'payload'
+
+        def get(*args, **kwargs):
+            self.release.wait()
+            return resp
+
+        self.session.get.side_effect = get
+        self.client = client.Client(session=self.session, json_codec='json',
+                                    coalesce_requests=True)
+        self.href = self.client._base_url + '/secrets/1234'
+
+    def _hammer(self, count, func, *args):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func(*args)))
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while self.client.coalescing_statistics()['coalesced'] < count - 1:
+            if time.time() > deadline:
+                self.fail('Requests were not coalesced.')
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_gets_share_one_request(self):
+        results = self._hammer(10, self.client._get, self.href)
+
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertEqual([{'name': 'secret'}] * 10, results)
+        # Every caller decodes its own copy of the body
+        self.assertEqual(10, len(set(id(r) for r in results)))
+
+    def test_concurrent_payload_gets_share_one_request(self):
+        results = self._hammer(10, self.client._get_raw, self.href,
+                               {'Accept': 'text/plain'})
+
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertEqual([b'payload'] * 10, results)
+
+    def test_different_accept_headers_are_not_coalesced(self):
+        self.release.set()
+        self.client._get_raw(self.href, {'Accept': 'text/plain'})
+        self.client._get(self.href)
+        self.assertEqual({'requests': 2, 'coalesced': 0},
+                         self.client.coalescing_statistics())
+
+    def test_coalescing_is_disabled_by_default(self):
+        c = client.Client(session=self.session)
+        self.assertIsNone(c.coalescing_statistics())
+
+
+class WhenTestingClientHTTPCache(TestClientWithSession):
+
+    def setUp(self):
+        super(WhenTestingClientHTTPCache, self).setUp()
+        self.session = self._get_fake_session_with_status_code(200)
+        self.session.delete.return_value.status_code = 204
+        self.client = client.Client(session=self.session, json_codec='json',
+                                    http_cache_size=10)
+        self.href = self.client._base_url + '/containers/1234'
+
+    def _response(self, status_code, headers=None, content=b''):
+        resp = mock.MagicMock()
+        resp.status_code = status_code
+        resp.headers = headers or {}
+        resp.content = content
+        resp.json.side_effect = lambda: json.loads(content.decode('utf-8'))
+        return resp
+
+    def test_http_cache_is_disabled_by_default(self):
+        c = client.Client(session=self.session)
+        self.assertIsNone(c._http_cache)
+        self.assertIsNone(c.http_cache_statistics())
+
+    def test_not_modified_response_is_served_from_cache(self):
+        self.session.get.side_effect = [
+            self._response(200, {'ETag': '"v1"',
+                                 'Last-Modified': 'Wed, 21 Oct 2015'},
+                           b'{"name": "container"}'),
+            self._response(304),
+        ]
+
+        first = self.client._get(self.href)
+        first['name'] = 'changed by caller'
+        second = self.client._get(self.href)
+
+        self.assertEqual({'name': 'container'}, second)
+        args, kwargs = self.session.get.call_args
+        self.assertEqual('"v1"', kwargs['headers']['If-None-Match'])
+        self.assertEqual('Wed, 21 Oct 2015',
+                         kwargs['headers']['If-Modified-Since'])
+        stats = self.client.http_cache_statistics()
+        self.assertEqual({'hits': 1, 'misses': 1, 'hit_ratio': 0.5},
+                         stats['endpoints']['containers'])
+
+    def test_responses_without_validators_are_not_cached(self):
+        self.session.get.side_effect = [
+            self._response(200, content=b'{"name": "container"}'),
+            self._response(200, content=b'{"name": "container"}'),
+        ]
+
+        self.client._get(self.href)
+        self.client._get(self.href)
+
+        args, kwargs = self.session.get.call_args
+        self.assertNotIn('If-None-Match', kwargs['headers'])
+        self.assertEqual(0, len(self.client._http_cache))
+
+    def test_params_are_part_of_the_cache_key(self):
+        self.session.get.side_effect = [
+            self._response(200, {'ETag': '"v1"'}, b'{"total": 1}'),
+            self._response(200, {'ETag': '"v2"'}, b'{"total": 2}'),
+        ]
+
+        self.client._get(self.href, {'limit': 1})
+        self.client._get(self.href, {'limit': 2})
+
+        args, kwargs = self.session.get.call_args
+        self.assertNotIn('If-None-Match', kwargs['headers'])
+
+    def test_delete_drops_cached_responses(self):
+        self.session.get.return_value = self._response(
+            200, {'ETag': '"v1"'}, b'{}')
+        self.client._get(self.href)
+
+        self.client._delete(self.href)
+
+        self.assertEqual(0, len(self.client._http_cache))
+
+
+class WhenTestingClientRequestHooks(TestClientWithSession):
+
+    def setUp(self):
+        super(WhenTestingClientRequestHooks, self).setUp()
+        self.session = self._get_fake_session_with_status_code(200)
+        # The same response is returned for every method
+        resp = self.session.get.return_value
+        resp.content = b'{"name": "secret"}'
+        resp.json.return_value = {'name': 'secret'}
+        resp.headers = {}
+        self.client = client.Client(session=self.session, json_codec='json')
+        self.events = []
+        self.client.add_request_hook(self.events.append)
+        self.ref = (self.client._base_url +
+                    '/secrets/3b2a2c68-6c8b-4a59-a1e6-64e0d4a4fd5d')
+
+    def test_get_emits_one_event(self):
+        self.client._get(self.ref)
+
+        self.assertEqual(1, len(self.events))
+        event = self.events[0]
+        self.assertEqual('get', event.method)
+        self.assertEqual('secrets', event.entity)
+        self.assertEqual('/v1/secrets/{uuid}', event.url_template)
+        self.assertEqual(200, event.status)
+        self.assertEqual(18, event.bytes_in)
+        self.assertEqual(0, event.bytes_out)
+        self.assertThat(event.latency, matchers.GreaterThan(-1))
+
+    def test_post_reports_bytes_out(self):
+        self.client._post('containers', {'name': 'container'})
+
+        event = self.events[0]
+        self.assertEqual('post', event.method)
+        self.assertEqual('containers', event.entity)
+        self.assertEqual(len(self.client._codec.dumps({'name': 'container'})),
+                         event.bytes_out)
+
+    def test_delete_reports_json_bytes_out(self):
+        consumer = {'name': 'service', 'URL': 'http://example.com'}
+        self.client._delete(self.ref, json=consumer)
+
+        event = self.events[0]
+        self.assertEqual('delete', event.method)
+        self.assertEqual(len(json.dumps(consumer)), event.bytes_out)
+
+    def test_failed_request_emits_event_and_raises(self):
+        error = Exception('not found')
+        error.http_status = 404
+        self.session.get.side_effect = error
+
+        self.assertRaises(Exception, self.client._get, self.ref)
+        self.assertEqual(404, self.events[0].status)
+        self.assertIsNone(self.events[0].bytes_in)
+
+    def test_failing_hook_does_not_break_requests(self):
+        self.client.add_request_hook(mock.Mock(side_effect=ValueError))
+
+        self.assertEqual({'name': 'secret'}, self.client._get(self.ref))
+        self.assertEqual(1, len(self.events))
+
+    def test_removed_hook_is_not_called(self):
+        self.client.remove_request_hook(self.events.append)
+        self.client._get(self.ref)
+        self.assertEqual([], self.events)
+
+
 class WhenTestingClientDelete(TestClientWithSession):
 
     def setUp(self):
         super(WhenTestingClientDelete, self).setUp()
         self.session = self._get_fake_session_with_status_code(200)
-        self.client = client.Client(session=self.session)
+        self.client = client.Client(session=self.session, json_codec='json')
         self.href = 'http://test_href'
 
     def test_delete_uses_href_as_is(self):
@@ -317,3 +819,6 @@ class BaseEntityResource(testtools.TestCase):
 
         self.api = mock.MagicMock()
         self.api._base_url = self.endpoint
+        self.api._metadata_cache = None
+        self.api._payload_cache = None
+        self.api._tracer = None
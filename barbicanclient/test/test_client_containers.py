@@ -130,6 +130,12 @@ class WhenTestingContainers(test_client.BaseEntityResource):
         self.assertIn('name="{0}"'.format(self.container.name),
                       repr(container_obj))
 
+    def test_repr_does_not_load_the_container(self):
+        container_obj = containers.Container(
+            api=self.api, container_ref=self.entity_href)
+        repr(container_obj)
+        self.assertFalse(self.api._get.called)
+
     def test_should_store_generic_via_constructor(self):
         self.api._post.return_value = {'container_ref': self.entity_href}
 
@@ -518,3 +524,164 @@ class WhenTestingContainers(test_client.BaseEntityResource):
         self.api._get.return_value = {'total': 1}
         total = self.manager.total()
         self.assertEqual(total, 1)
+
+    def test_should_iter_all(self):
+        self.api._get.side_effect = [
+            {'containers': [self.container.get_dict(self.entity_href)
+                            for _ in range(2)]},
+            {'containers': [self.container.get_dict(self.entity_href,
+                                                    type='rsa')]},
+        ]
+
+        containers_list = list(self.manager.iter_all(page_size=2,
+                                                     target_latency=None,
+                                                     type='generic'))
+
+        self.assertEqual(3, len(containers_list))
+        self.assertIsInstance(containers_list[2], containers.RSAContainer)
+        params = [args[1] for args, kwargs in self.api._get.call_args_list]
+        self.assertEqual([0, 2], [p['offset'] for p in params])
+        self.assertEqual('generic', params[0]['type'])
+
+    def test_should_get_list_fields(self):
+        container_resp = self.container.get_dict(self.entity_href,
+                                                 type='certificate')
+        self.api._get.return_value = {"containers":
+                                      [container_resp for v in range(3)]}
+
+        rows = self.manager.list(fields=['container_ref', 'type'])
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual(self.entity_href, rows[0].container_ref)
+        self.assertEqual('certificate', rows[0].type)
+        self.assertFalse(self.api.secrets.get.called)
+
+        columns = self.manager.list(fields=['container_ref'], columnar=True)
+        self.assertEqual({'container_ref': [self.entity_href] * 3}, columns)
+
+    def test_should_not_accept_unknown_attributes(self):
+        for container in (self.manager.create(),
+                          self.manager.create_rsa(),
+                          self.manager.create_certificate()):
+            self.assertFalse(hasattr(container, '__dict__'))
+            self.assertRaises(AttributeError, setattr, container, 'color',
+                              'red')
+
+    def _get_certificate_container(self):
+        self.api.secrets.get.side_effect = (
+            lambda secret_ref: secrets.Secret(self.api, secret_ref=secret_ref)
+        )
+        self.api._get.side_effect = lambda ref: {
+            'name': ref.split('/')[-1],
+            'content_types': {'default': 'application/octet-stream'},
+        }
+        self.api._get_raw.side_effect = (
+            lambda ref, headers: ref.split('/')[-1].encode('utf-8')
+        )
+        return containers.CertificateContainer(
+            api=self.api,
+            container_ref=self.entity_href,
+            certificate_ref=self.endpoint + '/secrets/cert',
+            private_key_ref=self.endpoint + '/secrets/key'
+        )
+
+    def test_should_load_secrets_and_payloads(self):
+        container = self._get_certificate_container()
+
+        self.assertIs(container, container.load())
+
+        self.assertEqual(2, self.api._get.call_count)
+        self.assertEqual(2, self.api._get_raw.call_count)
+        self.assertEqual('cert', container.certificate.name)
+        self.assertEqual(b'key', container.private_key.payload)
+        self.assertEqual(2, self.api._get.call_count)
+        self.assertEqual(2, self.api._get_raw.call_count)
+
+    def test_should_load_secrets_without_payloads(self):
+        container = self._get_certificate_container()
+
+        container.load(payloads=False, max_workers=1)
+
+        self.assertEqual(2, self.api._get.call_count)
+        self.assertFalse(self.api._get_raw.called)
+
+    def test_should_raise_load_error_after_loading_other_secrets(self):
+        container = self._get_certificate_container()
+        self.api._get_raw.side_effect = [ValueError('boom'), b'payload']
+
+        self.assertRaises(ValueError, container.load, max_workers=1)
+        self.assertEqual(2, self.api._get_raw.call_count)
+
+    def _get_unsaved_secret(self, name, error=None):
+        secret = mock.Mock(spec=secrets.Secret)
+        secret.secret_ref = None
+
+        def store():
+            if error:
+                raise error
+            secret.secret_ref = self.endpoint + '/secrets/' + name
+            return secret.secret_ref
+
+        secret.store.side_effect = store
+        return secret
+
+    def test_should_store_secrets_concurrently(self):
+        self.api._post.return_value = {'container_ref': self.entity_href}
+        unsaved = dict((name, self._get_unsaved_secret(name))
+                       for name in ('one', 'two', 'three'))
+        container = self.manager.create(secrets=unsaved)
+
+        container.store(max_workers=2)
+
+        for secret in unsaved.values():
+            secret.store.assert_called_once_with()
+        args, kwargs = self.api._post.call_args
+        self.assertEqual(
+            sorted(self.endpoint + '/secrets/' + name for name in unsaved),
+            sorted(ref['secret_ref'] for ref in args[1]['secret_refs']))
+        self.assertEqual(sorted(unsaved), sorted(container.store_timings))
+
+    def test_should_have_no_store_timings_before_store(self):
+        container = self.manager.create(name=self.container.name)
+
+        self.assertEqual({}, container.store_timings)
+
+    def test_should_store_shared_secret_once(self):
+        self.api._post.return_value = {'container_ref': self.entity_href}
+        secret = self._get_unsaved_secret('shared')
+        container = self.manager.create(secrets={'a': secret, 'b': secret})
+
+        container.store()
+
+        secret.store.assert_called_once_with()
+
+    def test_should_delete_stored_secrets_when_a_secret_fails(self):
+        stored = self._get_unsaved_secret('stored')
+        failing = self._get_unsaved_secret('failing', error=ValueError())
+        container = self.manager.create(secrets={'stored': stored,
+                                                 'failing': failing})
+
+        self.assertRaises(ValueError, container.store)
+
+        stored.delete.assert_called_once_with()
+        self.assertFalse(failing.delete.called)
+        self.assertFalse(self.api._post.called)
+        self.assertIsNone(container.container_ref)
+
+    def test_should_delete_stored_secrets_when_container_fails(self):
+        self.api._post.side_effect = ValueError()
+        stored = self._get_unsaved_secret('stored')
+        container = self.manager.create(secrets={'stored': stored})
+
+        self.assertRaises(ValueError, container.store)
+
+        stored.delete.assert_called_once_with()
+
+    def test_should_not_delete_previously_stored_secrets(self):
+        self.api._post.side_effect = ValueError()
+        container = self.manager.create(
+            secrets=self.container.generic_secrets)
+
+        self.assertRaises(ValueError, container.store)
+
+        self.assertFalse(self.container.secret.delete.called)
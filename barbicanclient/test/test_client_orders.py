@@ -48,6 +48,7 @@ class OrdersTestCase(testtools.TestCase):
         }}""".format(self.secret_ref, self.order_ref)
         self.api = mock.MagicMock()
         self.api._base_url = 'http://localhost:9311/v1'
+        self.api._tracer = None
         self.manager = orders.OrderManager(api=self.api)
 
     def _get_order_args(self, order_data):
@@ -227,6 +228,50 @@ class WhenTestingOrderManager(OrdersTestCase):
         self.assertEqual(10, params['limit'])
         self.assertEqual(5, params['offset'])
 
+    def test_should_parse_timestamps_on_first_access(self):
+        self.api._get.return_value = json.loads(self.key_order_data)
+
+        order = self.manager.get(order_ref=self.order_ref)
+        self.assertEqual('2014-10-21T17:15:50.824202', order._created)
+
+        self.assertEqual(
+            timeutils.parse_isotime('2014-10-21T17:15:50.824202'),
+            order.created)
+        self.assertEqual(
+            timeutils.parse_isotime('2015-02-28T19:14:44.180394'),
+            order.expiration)
+
+    def test_should_not_accept_unknown_attributes(self):
+        for order in (self.manager.create_key(),
+                      self.manager.create_asymmetric()):
+            self.assertFalse(hasattr(order, '__dict__'))
+            self.assertRaises(AttributeError, setattr, order, 'color', 'red')
+
+    def test_should_submit_unparsed_expiration(self):
+        self.api._post.return_value = {'order_ref': self.order_ref}
+        order = self.manager.create_key(
+            name='name', expiration='2015-02-28T19:14:44.180394')
+
+        order.submit()
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual('2015-02-28T19:14:44.180394',
+                         args[1]['meta']['expiration'])
+
+    def test_should_submit_unparsed_expiration_after_reading_it(self):
+        self.api._post.return_value = {'order_ref': self.order_ref}
+        order = self.manager.create_key(
+            name='name', expiration='2015-02-28T19:14:44.180394')
+        self.assertEqual(
+            timeutils.parse_isotime('2015-02-28T19:14:44.180394'),
+            order.expiration)
+
+        order.submit()
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual('2015-02-28T19:14:44.180394',
+                         args[1]['meta']['expiration'])
+
     def test_should_delete(self):
         self.manager.delete(order_ref=self.order_ref)
 
@@ -242,3 +287,109 @@ class WhenTestingOrderManager(OrdersTestCase):
         self.api._get.return_value = {'total': 1}
         total = self.manager.total()
         self.assertEqual(total, 1)
+
+    def test_should_iter_all(self):
+        self.api._get.side_effect = [
+            {"orders": [json.loads(self.key_order_data) for _ in range(2)]},
+            {"orders": []},
+        ]
+
+        orders_list = list(self.manager.iter_all(page_size=2,
+                                                 target_latency=None))
+
+        self.assertEqual(2, len(orders_list))
+        self.assertIsInstance(orders_list[0], orders.KeyOrder)
+        self.assertEqual(2, self.api._get.call_count)
+
+
+class WhenTestingOrderWait(OrdersTestCase):
+
+    def setUp(self):
+        super(WhenTestingOrderWait, self).setUp()
+        self.other_ref = ("http://localhost:9311/v1/orders/"
+                          "5b1cb8ab-4ae2-4d3c-8c8e-b6f0b5f8a0c2")
+        self.statuses = {}
+        self.api._get.side_effect = self._get_order
+        self.now = 1000.0
+        time_patcher = mock.patch.object(orders, 'time')
+        fake_time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        fake_time.time.side_effect = lambda: self.now
+        fake_time.sleep.side_effect = self._sleep
+        self.sleep = fake_time.sleep
+
+    def _sleep(self, seconds):
+        self.now += seconds
+
+    def _get_order(self, order_ref):
+        data = json.loads(self.key_order_data)
+        data['order_ref'] = order_ref
+        data['status'] = self.statuses[order_ref].pop(0)
+        return data
+
+    def test_should_yield_orders_as_they_complete(self):
+        self.statuses[self.order_ref] = ['PENDING', 'PENDING', 'ACTIVE']
+        self.statuses[self.other_ref] = ['PENDING', 'ERROR']
+
+        done = list(self.manager.wait([self.order_ref, self.other_ref]))
+
+        self.assertEqual([self.other_ref, self.order_ref],
+                         [order.order_ref for order in done])
+        self.assertEqual('ERROR', done[0].status)
+        self.assertEqual(5, self.api._get.call_count)
+
+    def test_should_back_off_between_polls(self):
+        self.statuses[self.order_ref] = ['PENDING'] * 4 + ['ACTIVE']
+
+        list(self.manager.wait([self.order_ref], interval=1, max_interval=3))
+
+        delays = [args[0] for args, kwargs in self.sleep.call_args_list]
+        self.assertEqual(4, len(delays))
+        self.assertEqual([1, 2, 3, 3], delays)
+
+    def test_should_not_poll_completed_orders(self):
+        order = orders.KeyOrder(
+            api=self.api, **self._get_order_args(self.key_order_data))
+
+        self.assertEqual([order], list(self.manager.wait([order])))
+        self.assertFalse(self.api._get.called)
+
+    def test_should_raise_after_timeout(self):
+        self.statuses[self.order_ref] = ['PENDING', 'ACTIVE']
+        self.statuses[self.other_ref] = ['PENDING'] * 10
+
+        waiter = self.manager.wait([self.order_ref, self.other_ref],
+                                   timeout=0)
+
+        self.assertRaises(orders.OrderWaitTimeout, list, waiter)
+        with self.assertRaises(orders.OrderWaitTimeout) as raised:
+            list(self.manager.wait([self.other_ref], timeout=0))
+        self.assertEqual([self.other_ref], raised.exception.order_refs)
+
+    def test_should_keep_pending_orders_on_poll_error(self):
+        self.statuses[self.order_ref] = ['ACTIVE']
+        self.statuses[self.other_ref] = ['PENDING']
+        third_ref = ("http://localhost:9311/v1/orders/"
+                     "9c7a2f1e-3b5d-4e8a-9f6c-1d2e3f4a5b6c")
+        error = ValueError('boom')
+
+        def get_order(order_ref):
+            if order_ref == third_ref:
+                raise error
+            return self._get_order(order_ref)
+        self.api._get.side_effect = get_order
+
+        done = []
+        with self.assertRaises(orders.OrderWaitError) as raised:
+            for order in self.manager.wait(
+                    [self.order_ref, self.other_ref, third_ref]):
+                done.append(order.order_ref)
+
+        self.assertEqual([self.order_ref], done)
+        self.assertIs(error, raised.exception.error)
+        self.assertEqual([self.other_ref, third_ref],
+                         raised.exception.order_refs)
+
+    def test_should_fail_wait_for_unsubmitted_order(self):
+        order = self.manager.create_key(name='name')
+        self.assertRaises(ValueError, list, self.manager.wait([order]))
@@ -12,9 +12,12 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
 
 from oslo.utils import timeutils
+import six
 
+from barbicanclient import cache
 from barbicanclient.test import test_client
 from barbicanclient import secrets, base
 
@@ -80,6 +83,97 @@ class WhenTestingSecrets(test_client.BaseEntityResource):
         self.assertEqual(self.secret.payload_content_type,
                          secret_req['payload_content_type'])
 
+    def test_should_store_unparsed_expiration(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        secret = self.manager.create(
+            name=self.secret.name, payload=self.secret.payload,
+            expiration='2015-02-28T19:14:44.180394')
+
+        secret.store()
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual('2015-02-28T19:14:44.180394',
+                         args[1]['expiration'])
+
+    def test_should_store_unparsed_expiration_after_reading_it(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        secret = self.manager.create(
+            name=self.secret.name, payload=self.secret.payload,
+            expiration='2015-02-28T19:14:44.180394')
+        self.assertEqual(
+            timeutils.parse_isotime('2015-02-28T19:14:44.180394'),
+            secret.expiration)
+
+        secret.store()
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual('2015-02-28T19:14:44.180394',
+                         args[1]['expiration'])
+
+    def test_should_store_streamed_payload_with_unparsed_expiration(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        secret = self.manager.create(
+            name=self.secret.name, payload=six.BytesIO(b'payload'),
+            expiration='2015-02-28T19:14:44.180394')
+
+        secret.store()
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual('2015-02-28T19:14:44.180394',
+                         args[1]['expiration'])
+
+    def test_should_store_streamed_payload(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        payload = six.BytesIO(b'\x00' * 1024)
+
+        secret = self.manager.create(name=self.secret.name, payload=payload)
+        self.assertEqual(self.entity_href, secret.store())
+
+        args, kwargs = self.api._post.call_args
+        self.assertEqual({'name': self.secret.name}, args[1])
+        self.api._put.assert_called_once_with(
+            self.entity_href, payload,
+            {'Content-Type': 'application/octet-stream'})
+        self.assertEqual('application/octet-stream',
+                         secret.payload_content_type)
+
+    def test_should_store_payload_from_iterator(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        chunks = iter([b'c2Vj', b'cmV0'])
+
+        secret = self.manager.create(
+            payload=chunks, payload_content_type='application/octet-stream',
+            payload_content_encoding='base64')
+        secret.store()
+
+        args, kwargs = self.api._post.call_args
+        self.assertNotIn('payload_content_type', args[1])
+        self.api._put.assert_called_once_with(
+            self.entity_href, chunks,
+            {'Content-Type': 'application/octet-stream',
+             'Content-Encoding': 'base64'})
+
+    def test_should_store_bytearray_payload_inline(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        payload = bytearray(b'payload')
+
+        secret = self.manager.create(name=self.secret.name, payload=payload)
+        secret.store()
+
+        args, kwargs = self.api._post.call_args
+        self.assertIs(payload, args[1]['payload'])
+        self.assertFalse(self.api._put.called)
+
+    def test_should_delete_secret_when_payload_upload_fails(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        self.api._put.side_effect = ValueError()
+
+        secret = self.manager.create(payload=six.BytesIO(b'secret'))
+
+        self.assertRaises(ValueError, secret.store)
+        self.api._delete.assert_called_once_with(self.entity_href)
+        self.assertIsNone(secret.secret_ref)
+
     def test_should_store_via_attributes(self):
         self.api._post.return_value = {'secret_ref': self.entity_href}
 
@@ -296,6 +390,35 @@ class WhenTestingSecrets(test_client.BaseEntityResource):
         self.assertEqual(10, params['limit'])
         self.assertEqual(5, params['offset'])
 
+    def test_should_get_list_fields(self):
+        secret_resp = self.secret.get_dict(self.entity_href)
+        self.api._get.return_value = {"secrets":
+                                      [secret_resp for v in range(3)]}
+
+        rows = self.manager.list(fields=['secret_ref', 'created', 'mode'])
+
+        self.assertEqual(3, len(rows))
+        self.assertEqual(self.entity_href, rows[0].secret_ref)
+        self.assertEqual(self.secret.created, rows[0].created)
+        self.assertIsNone(rows[0].mode)
+        self.assertEqual(('secret_ref', 'created', 'mode'), rows[0]._fields)
+
+    def test_should_get_list_columns(self):
+        secret_resp = self.secret.get_dict(self.entity_href)
+        self.api._get.return_value = {"secrets":
+                                      [secret_resp for v in range(3)]}
+
+        columns = self.manager.list(fields=['name', 'algorithm'],
+                                    columnar=True)
+
+        self.assertEqual({'name': [self.secret.name] * 3,
+                          'algorithm': [self.secret.algorithm] * 3}, columns)
+
+    def test_should_not_iter_all_columns(self):
+        self.assertRaises(ValueError, list,
+                          self.manager.iter_all(fields=['name'],
+                                                columnar=True))
+
     def test_should_fail_get_invalid_secret(self):
         self.assertRaises(ValueError, self.manager.get,
                           **{'secret_ref': '12345'})
@@ -327,3 +450,302 @@ class WhenTestingSecrets(test_client.BaseEntityResource):
         self.api._get.return_value = {'total': 1}
         total = self.manager.total()
         self.assertEqual(total, 1)
+
+    def test_should_get_many(self):
+        refs = [self.entity_base + 'abcd1234-eabc-5678-9abc-abcdef01234{0}'
+                .format(i) for i in range(5)]
+        self.api._get.side_effect = lambda ref: {'name': ref[-1]}
+
+        results = self.manager.get_many(refs, max_workers=3)
+
+        self.assertEqual(refs, [r.ref for r in results])
+        self.assertEqual([r[-1] for r in refs],
+                         [r.entity.name for r in results])
+        self.assertEqual([None] * 5, [r.error for r in results])
+        self.assertEqual(5, self.api._get.call_count)
+        self.assertFalse(self.api._get_raw.called)
+
+    def test_should_get_many_deduplicates_refs(self):
+        other_href = self.entity_base + 'abcd1234-eabc-5678-9abc-abcdef012346'
+        self.api._get.return_value = self.secret.get_dict()
+
+        results = self.manager.get_many(
+            [self.entity_href, other_href, self.entity_href])
+
+        self.assertEqual([self.entity_href, other_href],
+                         [r.ref for r in results])
+        self.assertEqual(2, self.api._get.call_count)
+
+    def test_should_get_many_with_payloads(self):
+        self.api._get.return_value = self.secret.get_dict(
+            content_types_dict={'default': 'text/plain'})
+        self.api._get_raw.return_value = self.secret.payload
+
+        results = self.manager.get_many([self.entity_href],
+                                        include_payload=True)
+
+        self.assertEqual(self.secret.payload, results[0].entity.payload)
+        self.assertEqual(1, self.api._get_raw.call_count)
+
+    def test_should_get_many_reports_errors_per_ref(self):
+        bad_href = self.entity_base + 'abcd1234-eabc-5678-9abc-abcdef012346'
+        error = LookupError('not found')
+
+        def get(ref):
+            if ref == bad_href:
+                raise error
+            return self.secret.get_dict()
+        self.api._get.side_effect = get
+
+        results = self.manager.get_many([bad_href, self.entity_href,
+                                         'invalid'])
+
+        self.assertIs(error, results[0].error)
+        self.assertIsNone(results[0].entity)
+        self.assertEqual(self.secret.name, results[1].entity.name)
+        self.assertIsInstance(results[2].error, ValueError)
+
+    def _get_secret_pages(self, *sizes):
+        return [{'secrets': [self.secret.get_dict(self.entity_href)
+                             for _ in range(size)]}
+                for size in sizes]
+
+    def test_should_iter_all_following_pages(self):
+        self.api._get.side_effect = self._get_secret_pages(2, 2, 1)
+
+        secrets_list = list(self.manager.iter_all(page_size=2,
+                                                  target_latency=None,
+                                                  name='test'))
+
+        self.assertEqual(5, len(secrets_list))
+        self.assertIsInstance(secrets_list[0], secrets.Secret)
+        params = [args[1] for args, kwargs in self.api._get.call_args_list]
+        self.assertEqual([0, 2, 4], [p['offset'] for p in params])
+        self.assertEqual(['test'] * 3, [p['name'] for p in params])
+
+    def test_should_iter_all_stop_on_empty_page(self):
+        self.api._get.side_effect = self._get_secret_pages(2, 0)
+
+        secrets_list = list(self.manager.iter_all(page_size=2,
+                                                  target_latency=None))
+
+        self.assertEqual(2, len(secrets_list))
+        self.assertEqual(2, self.api._get.call_count)
+
+    def test_should_iter_all_cap_page_size(self):
+        self.api._get.side_effect = self._get_secret_pages(100, 50)
+
+        secrets_list = list(self.manager.iter_all(page_size=200,
+                                                  target_latency=None))
+
+        self.assertEqual(150, len(secrets_list))
+        params = [args[1] for args, kwargs in self.api._get.call_args_list]
+        self.assertEqual([100, 100], [p['limit'] for p in params])
+        self.assertEqual([0, 100], [p['offset'] for p in params])
+
+    def test_should_iter_all_raise_fetch_errors(self):
+        self.api._get.side_effect = (self._get_secret_pages(2) +
+                                     [LookupError('gone')])
+
+        iterator = self.manager.iter_all(page_size=2, target_latency=None)
+
+        self.assertEqual(2, len([next(iterator), next(iterator)]))
+        self.assertRaises(LookupError, next, iterator)
+
+    def test_should_iter_all_bound_pages_in_flight(self):
+        self.api._get.side_effect = self._get_secret_pages(*[1] * 50)
+
+        iterator = self.manager.iter_all(page_size=1, pages_in_flight=2,
+                                         target_latency=None)
+        next(iterator)
+        time.sleep(0.2)
+        iterator.close()
+
+        self.assertTrue(self.api._get.call_count <= 4)
+
+    def test_should_adapt_page_size_to_latency(self):
+        self.assertEqual(20, base._adapt_page_size(10, 0.1, 0.5))
+        self.assertEqual(100, base._adapt_page_size(80, 0.1, 0.5))
+        self.assertEqual(10, base._adapt_page_size(10, 0.4, 0.5))
+        self.assertEqual(5, base._adapt_page_size(10, 0.9, 0.5))
+
+    def test_should_parse_timestamps_on_first_access(self):
+        secret_resp = self.secret.get_dict(self.entity_href)
+        secret_resp['expiration'] = '2030-01-15T18:25:32.573932'
+        self.api._get.return_value = {'secrets': [secret_resp]}
+
+        secret = self.manager.list()[0]
+        self.assertEqual(self.secret.created, secret._created)
+        self.assertEqual('2030-01-15T18:25:32.573932', secret._expiration)
+
+        self.assertEqual(timeutils.parse_isotime(self.secret.created),
+                         secret.created)
+        self.assertIs(secret.created, secret._created)
+        self.assertEqual(2030, secret.expiration.year)
+        self.assertIsNone(secret.updated)
+
+    def test_should_stream_payload(self):
+        self.api._get.return_value = self.secret.get_dict(
+            self.entity_href, content_types_dict={'default': 'text/plain'})
+        self.api._get_stream.return_value = iter([b'the magic ', b'words'])
+        secret = self.manager.get(secret_ref=self.entity_href)
+
+        chunks = list(secret.iter_payload(chunk_size=10))
+
+        self.assertEqual([b'the magic ', b'words'], chunks)
+        self.api._get_stream.assert_called_once_with(
+            self.entity_href, {'Accept': 'text/plain'}, 10)
+        self.assertFalse(self.api._get_raw.called)
+
+    def test_should_stream_payload_to_file(self):
+        self.api._get.return_value = self.secret.get_dict(
+            self.entity_href, content_types_dict={'default': 'text/plain'})
+        self.api._get_stream.return_value = iter([b'the magic ', b'words'])
+        secret = self.manager.get(secret_ref=self.entity_href)
+        fobj = six.BytesIO()
+
+        self.assertEqual(15, secret.payload_to_file(fobj))
+        self.assertEqual(b'the magic words', fobj.getvalue())
+
+    def test_should_stream_payload_in_memory_without_request(self):
+        secret = self.manager.create(payload=u'caf\xe9')
+
+        self.assertEqual([b'ca', b'f\xc3', b'\xa9'],
+                         list(secret.iter_payload(chunk_size=2)))
+        self.assertFalse(self.api._get_stream.called)
+
+    def test_should_stream_file_payload_without_request(self):
+        secret = self.manager.create(payload=six.BytesIO(b'abcde'))
+
+        self.assertEqual([b'ab', b'cd', b'e'],
+                         list(secret.iter_payload(chunk_size=2)))
+        self.assertFalse(self.api._get_stream.called)
+
+    def test_should_stream_iterator_payload_without_request(self):
+        secret = self.manager.create(payload=iter([b'abc', u'd\xe9']))
+
+        self.assertEqual([b'ab', b'c', b'd\xc3', b'\xa9'],
+                         list(secret.iter_payload(chunk_size=2)))
+        self.assertFalse(self.api._get_stream.called)
+
+    def test_should_not_accept_unknown_attributes(self):
+        secret = self.manager.create(name=self.secret.name)
+        self.assertFalse(hasattr(secret, '__dict__'))
+        self.assertRaises(AttributeError, setattr, secret, 'color', 'red')
+
+    def test_should_parse_barbican_timestamps_like_oslo(self):
+        for value in ('2015-01-15T18:25:32.573932', '2015-01-15T18:25:32',
+                      '2015-01-15T18:25:32.5Z', '2015-01-15 18:25:32.573932',
+                      '2015-01-15T18:25:32+02:00'):
+            self.assertEqual(timeutils.parse_isotime(value),
+                             base.parse_timestamp(value))
+            self.assertEqual(timeutils.parse_isotime(value).tzinfo,
+                             base.parse_timestamp(value).tzinfo)
+        self.assertIsNone(base.parse_timestamp(None))
+        self.assertIsNone(base.parse_timestamp(''))
+
+
+class WhenTestingSecretMetadataCache(test_client.BaseEntityResource):
+
+    def setUp(self):
+        self._setUp('secrets')
+
+        self.secret = SecretData()
+        self.api._metadata_cache = cache.TTLCache()
+        self.manager = secrets.SecretManager(self.api)
+
+    def test_should_share_metadata_between_instances(self):
+        self.api._get.return_value = self.secret.get_dict(self.entity_href)
+
+        first = self.manager.get(secret_ref=self.entity_href)
+        second = self.manager.get(secret_ref=self.entity_href)
+
+        self.assertEqual(self.secret.name, first.name)
+        self.assertEqual(self.secret.name, second.name)
+        self.assertEqual(1, self.api._get.call_count)
+        stats = self.api._metadata_cache.statistics()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_should_cache_full_metadata_after_store(self):
+        self.api._post.return_value = {'secret_ref': self.entity_href}
+        self.api._get.return_value = self.secret.get_dict(
+            self.entity_href, {'default': self.secret.content})
+        secret = self.manager.create(name=self.secret.name,
+                                     payload=self.secret.payload,
+                                     payload_content_type=self.secret.content,
+                                     algorithm=self.secret.algorithm)
+        secret.store()
+
+        retrieved = self.manager.get(secret_ref=self.entity_href)
+        again = self.manager.get(secret_ref=self.entity_href)
+
+        self.assertEqual(self.secret.name, retrieved.name)
+        self.assertEqual(self.secret.algorithm, retrieved.algorithm)
+        self.assertEqual({'default': self.secret.content},
+                         retrieved.content_types)
+        # Only Barbican knows these, the stored fields are not enough
+        self.assertEqual('ACTIVE', retrieved.status)
+        self.assertIsNotNone(retrieved.created)
+        self.assertEqual('ACTIVE', again.status)
+        self.assertIsNotNone(again.created)
+        self.assertEqual(1, self.api._get.call_count)
+
+    def test_should_invalidate_on_delete(self):
+        self.api._get.return_value = self.secret.get_dict(self.entity_href)
+        secret = self.manager.get(secret_ref=self.entity_href)
+        secret.name
+
+        secret.delete()
+
+        self.assertEqual(0, len(self.api._metadata_cache))
+
+    def test_should_invalidate_on_manager_delete(self):
+        self.api._get.return_value = self.secret.get_dict(self.entity_href)
+        self.manager.get(secret_ref=self.entity_href).name
+
+        self.manager.delete(self.entity_href)
+
+        self.assertEqual(0, len(self.api._metadata_cache))
+
+
+class WhenTestingSecretPayloadCache(test_client.BaseEntityResource):
+
+    def setUp(self):
+        self._setUp('secrets')
+
+        self.secret = SecretData()
+        self.api._payload_cache = cache.PayloadCache()
+        self.api._get.return_value = self.secret.get_dict(self.entity_href)
+        self.api._get_raw.return_value = self.secret.payload
+        self.manager = secrets.SecretManager(self.api)
+
+    def _get_payload(self, content_type='text/plain'):
+        return self.manager.get(secret_ref=self.entity_href,
+                                payload_content_type=content_type).payload
+
+    def test_should_serve_payload_from_cache(self):
+        self.assertEqual(self.secret.payload, self._get_payload())
+        self.assertEqual(self.secret.payload, self._get_payload())
+        self.assertEqual(1, self.api._get_raw.call_count)
+
+    def test_should_key_cache_by_content_type(self):
+        self._get_payload('text/plain')
+        self._get_payload('application/octet-stream')
+        self.assertEqual(2, self.api._get_raw.call_count)
+
+    def test_should_not_cache_expired_secret(self):
+        secret_dict = self.secret.get_dict(self.entity_href)
+        secret_dict['expiration'] = '2014-01-01T00:00:00.000000'
+        self.api._get.return_value = secret_dict
+
+        self._get_payload()
+        self._get_payload()
+
+        self.assertEqual(2, self.api._get_raw.call_count)
+        self.assertEqual(0, len(self.api._payload_cache))
+
+    def test_should_invalidate_on_delete(self):
+        self._get_payload()
+        self.manager.delete(self.entity_href)
+        self.assertEqual(0, len(self.api._payload_cache))
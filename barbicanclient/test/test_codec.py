@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import json
+
+import mock
+import six
+import testtools
+
+from barbicanclient import client
+from barbicanclient import codec
+
+
+class WhenTestingCodecs(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingCodecs, self).setUp()
+        self.data = {'secrets': [{'name': u'caf\xe9', 'bit_length': 256}],
+                     'total': 1}
+
+    def test_stdlib_codec_is_always_available(self):
+        self.assertEqual('json', codec.available_codecs()[-1])
+
+    def test_default_codec_is_the_fastest_available(self):
+        self.assertEqual(codec.available_codecs()[0], codec.get_codec().name)
+
+    def test_unknown_codec_raises(self):
+        self.assertRaises(ValueError, codec.get_codec, 'yaml')
+
+    def test_codecs_round_trip(self):
+        for name in codec.available_codecs():
+            json_codec = codec.get_codec(name)
+            encoded = json_codec.dumps(self.data)
+            self.assertEqual(self.data, json.loads(encoded))
+            self.assertEqual(self.data, json_codec.loads(encoded))
+
+    def test_codecs_encode_datetimes_alike(self):
+        data = {'expiration': datetime.datetime(2015, 2, 28, 19, 14, 44,
+                                                180394),
+                'dates': (datetime.date(2015, 2, 28),)}
+        expected = {'expiration': '2015-02-28T19:14:44.180394',
+                    'dates': ['2015-02-28']}
+        for name in codec.available_codecs():
+            encoded = codec.get_codec(name).dumps(data)
+            self.assertEqual(expected, json.loads(encoded), name)
+
+    def test_codecs_reject_the_same_types(self):
+        for name in codec.available_codecs():
+            json_codec = codec.get_codec(name)
+            for data in ({'payload': object()}, {1: 'key'},
+                         {'payload': set(['a'])}):
+                self.assertRaises(TypeError, json_codec.dumps, data)
+            if six.PY3:
+                self.assertRaises(TypeError, json_codec.dumps,
+                                  {'payload': b'bytes'})
+
+    def test_library_codec_decodes_raw_content(self):
+        json_codec = codec.LibraryCodec('json', json.dumps, json.loads)
+        resp = mock.MagicMock()
+        resp.content = json.dumps(self.data)
+        self.assertEqual(self.data, json_codec.decode(resp))
+        self.assertFalse(resp.json.called)
+
+    def test_library_codec_errors_are_value_errors(self):
+        for name in codec.available_codecs():
+            self.assertRaises(ValueError, codec.get_codec(name).loads,
+                              b'not json')
+
+
+class WhenTestingClientCodec(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingClientCodec, self).setUp()
+        self.resp = mock.MagicMock()
+        self.resp.status_code = 200
+        self.resp.content = b'{"title": "error"}'
+        self.session = mock.MagicMock()
+        self.session.get.return_value = self.resp
+        self.session.post.return_value = self.resp
+        self.session.get_endpoint.return_value = 'http://localhost:9311'
+        self.json_codec = mock.MagicMock(wraps=codec.get_codec('json'))
+        self.json_codec.name = 'wrapped'
+        self.client = client.Client(session=self.session,
+                                    json_codec=self.json_codec)
+
+    def test_client_defaults_to_fastest_codec(self):
+        c = client.Client(session=self.session)
+        self.assertEqual(codec.get_codec().name, c._codec.name)
+
+    def test_client_accepts_codec_name(self):
+        c = client.Client(session=self.session, json_codec='json')
+        self.assertEqual('json', c._codec.name)
+
+    def test_post_encodes_and_decodes_with_codec(self):
+        self.client._post('secrets', {'name': 'test'})
+        self.json_codec.dumps.assert_called_once_with({'name': 'test'})
+        self.json_codec.decode.assert_called_once_with(self.resp)
+
+    def test_get_decodes_with_codec(self):
+        self.client._get('http://localhost:9311/v1/secrets')
+        self.json_codec.decode.assert_called_once_with(self.resp)
+
+    def test_error_message_is_decoded_with_codec(self):
+        self.resp.status_code = 500
+        self.client._codec = codec.LibraryCodec('json', json.dumps,
+                                                json.loads)
+        e = self.assertRaises(client.HTTPServerError, self.client._get,
+                              'http://localhost:9311/v1/secrets')
+        self.assertEqual('error', str(e))
@@ -0,0 +1,218 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import threading
+import time
+
+import requests
+import six
+import testtools
+
+from barbicanclient import client
+from barbicanclient import fake_barbican
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class WhenTestingFakeBarbican(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingFakeBarbican, self).setUp()
+        self.clock = FakeClock()
+        self.app = fake_barbican.FakeBarbican(clock=self.clock)
+        self.server = fake_barbican.FakeBarbicanServer(self.app).start()
+        self.addCleanup(self.server.stop)
+        self.endpoint = self.server.endpoint
+        self.client = client.Client(endpoint=self.endpoint,
+                                    project_id='project')
+
+    def _store_secret(self, name='secret', payload='payload'):
+        return self.client.secrets.create(
+            name=name, payload=payload,
+            payload_content_type='text/plain').store()
+
+    def test_should_store_get_and_delete_a_secret(self):
+        secret_ref = self._store_secret()
+
+        self.assertTrue(secret_ref.startswith(self.endpoint + '/v1/secrets/'))
+        secret = self.client.secrets.get(secret_ref)
+        self.assertEqual('secret', secret.name)
+        self.assertEqual('ACTIVE', secret.status)
+        self.assertEqual(b'payload', secret.payload)
+
+        self.client.secrets.delete(secret_ref)
+        resp = requests.get(secret_ref)
+        self.assertEqual(404, resp.status_code)
+        self.assertEqual('Not Found', resp.json()['title'])
+
+    def test_should_reject_a_payload_without_content_type(self):
+        resp = requests.post(self.endpoint + '/v1/secrets',
+                             data=json.dumps({'payload': 'payload'}))
+
+        self.assertEqual(400, resp.status_code)
+
+    def test_should_reject_a_payload_request_of_another_type(self):
+        secret_ref = self._store_secret()
+
+        resp = requests.get(secret_ref,
+                            headers={'Accept': 'application/octet-stream'})
+
+        self.assertEqual(406, resp.status_code)
+        resp = requests.get(secret_ref,
+                            headers={'Accept': 'text/plain; charset=utf-8'})
+        self.assertEqual(b'payload', resp.content)
+
+    def test_should_store_a_streamed_payload(self):
+        secret = self.client.secrets.create(
+            name='streamed', payload=six.BytesIO(b'streamed payload'),
+            payload_content_type='application/octet-stream')
+
+        secret_ref = secret.store()
+
+        self.assertEqual(b'streamed payload',
+                         self.client.secrets.get(secret_ref).payload)
+
+    def test_should_paginate_listings(self):
+        refs = [self._store_secret(name='secret{0}'.format(i))
+                for i in range(25)]
+
+        page = requests.get(self.endpoint + '/v1/secrets',
+                            params={'limit': 10, 'offset': 10}).json()
+
+        self.assertEqual(25, page['total'])
+        self.assertEqual(refs[10:20],
+                         [s['secret_ref'] for s in page['secrets']])
+        self.assertIn('offset=20', page['next'])
+        self.assertIn('offset=0', page['previous'])
+        self.assertEqual(25, self.client.secrets.total())
+
+    def test_should_cap_the_page_size(self):
+        for i in range(101):
+            self._store_secret(name='secret{0}'.format(i))
+
+        page = requests.get(self.endpoint + '/v1/secrets',
+                            params={'limit': 500}).json()
+
+        self.assertEqual(100, len(page['secrets']))
+        self.assertIn('limit=100', page['next'])
+        self.assertEqual(
+            ['secret24'],
+            [s.name for s in self.client.secrets.list(name='secret24')])
+
+    def test_should_store_typed_containers(self):
+        public_key = self.client.secrets.get(self._store_secret())
+        private_key = self.client.secrets.get(self._store_secret())
+        container_ref = self.client.containers.create_rsa(
+            name='rsa', public_key=public_key,
+            private_key=private_key).store()
+
+        container = self.client.containers.get(container_ref)
+
+        self.assertEqual('RSAContainer', type(container).__name__)
+        self.assertEqual(public_key.secret_ref,
+                         container.public_key.secret_ref)
+
+    def test_should_reject_unknown_secret_names_in_typed_containers(self):
+        resp = requests.post(self.endpoint + '/v1/containers',
+                             data=json.dumps({
+                                 'type': 'rsa',
+                                 'secret_refs': [{
+                                     'name': 'certificate',
+                                     'secret_ref': self._store_secret()
+                                 }]
+                             }))
+
+        self.assertEqual(400, resp.status_code)
+
+    def test_should_register_and_remove_consumers(self):
+        container_ref = self.client.containers.create(
+            name='generic').store()
+
+        container = self.client.containers.register_consumer(
+            container_ref, 'service', 'http://consumer')
+
+        consumer = {'name': 'service', 'URL': 'http://consumer'}
+        self.assertEqual([consumer], container.consumers)
+        self.client.containers.remove_consumer(container_ref, 'service',
+                                               'http://consumer')
+        self.assertEqual([],
+                         self.client.containers.get(container_ref).consumers)
+
+    def test_should_complete_orders_after_the_order_delay(self):
+        self.app.order_delay = 5
+        order_ref = self.client.orders.create_key(
+            name='key', algorithm='aes', bit_length=256).submit()
+
+        order = self.client.orders.get(order_ref)
+        self.assertEqual('PENDING', order.status)
+        self.assertIsNone(order.secret_ref)
+
+        self.clock.now += 5
+        order = self.client.orders.get(order_ref)
+        self.assertEqual('ACTIVE', order.status)
+        secret = self.client.secrets.get(order.secret_ref)
+        self.assertEqual(32, len(secret.payload))
+
+    def test_should_generate_a_container_for_asymmetric_orders(self):
+        order_ref = self.client.orders.create_asymmetric(
+            name='keys', algorithm='rsa', bit_length=2048,
+            pass_phrase='secret').submit()
+
+        order = self.client.orders.get(order_ref)
+
+        self.assertEqual('ACTIVE', order.status)
+        container = self.client.containers.get(order.container_ref)
+        self.assertEqual(b'secret',
+                         container.private_key_passphrase.payload)
+
+    def test_should_fail_orders_with_unsupported_algorithms(self):
+        order_ref = self.client.orders.create_key(
+            name='key', algorithm='rot13').submit()
+
+        order = self.client.orders.get(order_ref)
+
+        self.assertEqual('ERROR', order.status)
+        self.assertEqual(400, order.error_status_code)
+
+    def test_should_inject_latency(self):
+        self.app.latency = 0.05
+        start = time.time()
+
+        requests.get(self.endpoint + '/v1/secrets')
+
+        self.assertTrue(time.time() - start >= 0.05)
+
+    def test_should_serve_concurrent_clients(self):
+        secret_ref = self._store_secret()
+        barbican = client.Client(endpoint=self.endpoint, project_id='project',
+                                 thread_safe=True, pool_maxsize=10)
+        names = []
+
+        def reader():
+            for _ in range(20):
+                names.append(barbican.secrets.get(secret_ref).name)
+
+        threads = [threading.Thread(target=reader) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['secret'] * 200, names)
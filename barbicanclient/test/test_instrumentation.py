@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+
+import mock
+import testtools
+
+from barbicanclient import instrumentation
+
+
+class WhenTestingInstrumentation(testtools.TestCase):
+
+    def test_url_template_replaces_uuids(self):
+        url = ('http://localhost:9311/v1/containers/'
+               '3b2a2c68-6c8b-4a59-a1e6-64e0d4a4fd5d/consumers')
+        self.assertEqual('/v1/containers/{uuid}/consumers',
+                         instrumentation.url_template(url))
+
+    def test_url_template_ignores_query_string(self):
+        self.assertEqual(
+            '/v1/secrets',
+            instrumentation.url_template('http://localhost/v1/secrets?a=1'))
+
+    def test_body_size(self):
+        self.assertEqual(0, instrumentation.body_size(None))
+        self.assertEqual(3, instrumentation.body_size(b'abc'))
+        self.assertEqual(2, instrumentation.body_size(u'\xe9'))
+        self.assertIsNone(instrumentation.body_size(io.BytesIO(b'abc')))
+        self.assertEqual(10, instrumentation.body_size(None, {'a': 'b'}))
+
+    def test_response_size_does_not_read_streams(self):
+        resp = mock.MagicMock()
+        resp.headers = {'Content-Length': '42'}
+        self.assertEqual(42, instrumentation.response_size(resp, True))
+        resp.headers = {}
+        self.assertIsNone(instrumentation.response_size(resp, True))
+        self.assertFalse(resp.content.called)
+
+    def test_response_size_of_read_response(self):
+        resp = mock.MagicMock()
+        resp.content = b'{}'
+        self.assertEqual(2, instrumentation.response_size(resp))
@@ -0,0 +1,106 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+
+import mock
+import testtools
+
+from barbicanclient import _logging
+from barbicanclient import secrets
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordingHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class FormattingCounter(object):
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __repr__(self):
+        self.formatted += 1
+        return 'counter'
+
+    __str__ = __repr__
+
+
+class WhenTestingStructuredLogging(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingStructuredLogging, self).setUp()
+        self.logger = logging.getLogger('barbicanclient.test.logging')
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+
+    def test_redact_hides_secret_material(self):
+        data = {'payload': 'secret', 'payload_content_type': 'text/plain',
+                'meta': {'pass_phrase': 'phrase', 'name': 'key'},
+                'empty': {'payload': None}}
+        self.assertEqual({'payload': _logging.REDACTED,
+                          'payload_content_type': 'text/plain',
+                          'meta': {'pass_phrase': _logging.REDACTED,
+                                   'name': 'key'},
+                          'empty': {'payload': None}},
+                         _logging.redact(data))
+        self.assertEqual('secret', data['payload'])
+
+    def test_event_is_formatted_with_sorted_fields(self):
+        _logging.debug(self.logger, 'secret.get', ref='r', limit=1)
+
+        record, = self.handler.records
+        self.assertEqual('secret.get limit=1 ref=r', record.getMessage())
+        self.assertEqual('secret.get', record.barbican_event)
+        self.assertEqual({'ref': 'r', 'limit': 1}, record.barbican_fields)
+
+    def test_message_is_redacted(self):
+        _logging.debug(self.logger, 'secret.store',
+                       body={'name': 'n', 'payload': 'plaintext'})
+
+        record, = self.handler.records
+        self.assertNotIn('plaintext', record.getMessage())
+        self.assertNotIn('plaintext', str(record.barbican_fields))
+
+    def test_nothing_is_formatted_when_level_is_disabled(self):
+        self.logger.setLevel(logging.INFO)
+        value = FormattingCounter()
+
+        _logging.debug(self.logger, 'secret.get', ref=value)
+
+        self.assertEqual([], self.handler.records)
+        self.assertEqual(0, value.formatted)
+
+    def test_secret_store_does_not_log_the_payload(self):
+        logger = logging.getLogger('barbicanclient.secrets')
+        logger.addHandler(self.handler)
+        self.addCleanup(logger.removeHandler, self.handler)
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(logger.setLevel, logging.NOTSET)
+        api = mock.MagicMock()
+        api._metadata_cache = None
+        api._post.return_value = {'secret_ref': 'http://localhost/secrets/1'}
+
+        secrets.Secret(api, name='n', payload='plaintext').store()
+
+        messages = [r.getMessage() for r in self.handler.records]
+        self.assertTrue(any('secret.store' in m for m in messages))
+        self.assertFalse(any('plaintext' in m for m in messages))
@@ -0,0 +1,162 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from keystoneclient import exceptions as ks_exceptions
+import mock
+import testtools
+
+from barbicanclient import client
+from barbicanclient import retry
+
+
+def _response(status_code, headers=None):
+    resp = mock.MagicMock()
+    resp.status_code = status_code
+    resp.headers = headers or {}
+    resp.json.return_value = {'title': 'error'}
+    return resp
+
+
+class WhenTestingRetryPolicy(testtools.TestCase):
+
+    def test_only_idempotent_methods_are_allowed_by_default(self):
+        policy = retry.RetryPolicy()
+        self.assertTrue(policy.allows('get'))
+        self.assertTrue(policy.allows('delete'))
+        self.assertFalse(policy.allows('post'))
+
+    def test_post_is_allowed_when_opted_in(self):
+        self.assertTrue(retry.RetryPolicy(retry_post=True).allows('post'))
+
+    def test_backoff_is_bounded_by_exponential_ceiling(self):
+        policy = retry.RetryPolicy(backoff_factor=1, max_backoff=5)
+        for attempt, ceiling in ((0, 1), (1, 2), (2, 4), (5, 5)):
+            for _ in range(20):
+                delay = policy.get_backoff(attempt)
+                self.assertTrue(0 <= delay <= ceiling)
+
+    def test_backoff_honours_retry_after_seconds(self):
+        policy = retry.RetryPolicy()
+        resp = _response(503, {'Retry-After': '7'})
+        self.assertEqual(7.0, policy.get_backoff(0, resp))
+
+    def test_backoff_gives_up_when_retry_after_exceeds_max(self):
+        policy = retry.RetryPolicy(max_backoff=5)
+        resp = _response(429, {'Retry-After': '120'})
+        self.assertIsNone(policy.get_backoff(0, resp))
+
+    def test_retry_after_is_ignored_for_other_status_codes(self):
+        policy = retry.RetryPolicy(backoff_factor=0)
+        resp = _response(500, {'Retry-After': '7'})
+        self.assertEqual(0, policy.get_backoff(0, resp))
+
+
+class WhenTestingRetryBudget(testtools.TestCase):
+
+    def test_reserve_is_spent_then_ratio_applies(self):
+        budget = retry.RetryBudget(ratio=0.5, reserve=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+
+class WhenTestingClientRetries(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingClientRetries, self).setUp()
+        self.endpoint = 'http://localhost:9311'
+        self.href = 'http://test_href'
+        self.session = mock.MagicMock()
+        self.session.get_endpoint.return_value = self.endpoint
+
+    def _get_client(self, **kwargs):
+        c = client.Client(session=self.session, json_codec='json',
+                          retry_policy=retry.RetryPolicy(**kwargs))
+        c._retrier._sleep = mock.MagicMock()
+        return c
+
+    def test_client_without_policy_does_not_retry(self):
+        self.session.get.return_value = _response(503)
+        c = client.Client(session=self.session, json_codec='json')
+        self.assertRaises(client.HTTPServerError, c._get, self.href)
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertIsNone(c.retry_statistics())
+
+    def test_get_is_retried_until_success(self):
+        self.session.get.side_effect = [_response(503), _response(502),
+                                        _response(200)]
+        c = self._get_client()
+        c._get(self.href)
+        self.assertEqual(3, self.session.get.call_count)
+        stats = c.retry_statistics()
+        self.assertEqual(2, stats['retries'])
+        self.assertEqual(2, stats['last_call_retries'])
+
+    def test_gives_up_after_max_retries(self):
+        self.session.delete.return_value = _response(500)
+        c = self._get_client(max_retries=2)
+        self.assertRaises(client.HTTPServerError, c._delete, self.href)
+        self.assertEqual(3, self.session.delete.call_count)
+
+    def test_client_errors_are_not_retried(self):
+        self.session.get.return_value = _response(404)
+        c = self._get_client()
+        self.assertRaises(client.HTTPClientError, c._get, self.href)
+        self.assertEqual(1, self.session.get.call_count)
+        self.assertEqual(0, c.retry_statistics()['last_call_retries'])
+
+    def test_post_is_not_retried_by_default(self):
+        self.session.post.return_value = _response(503)
+        c = self._get_client()
+        self.assertRaises(client.HTTPServerError, c._post, 'secrets', {})
+        self.assertEqual(1, self.session.post.call_count)
+
+    def test_post_is_retried_when_opted_in(self):
+        self.session.post.side_effect = [_response(503), _response(201)]
+        c = self._get_client(retry_post=True)
+        c._post('secrets', {})
+        self.assertEqual(2, self.session.post.call_count)
+
+    def test_connection_failures_are_retried(self):
+        self.session.get.side_effect = [
+            ks_exceptions.ConnectionRefused('refused'), _response(200)
+        ]
+        c = self._get_client()
+        c._get(self.href)
+        self.assertEqual(2, self.session.get.call_count)
+
+    def test_connection_failure_is_raised_when_retries_run_out(self):
+        self.session.get.side_effect = ks_exceptions.ConnectionRefused('no')
+        c = self._get_client(max_retries=1)
+        self.assertRaises(ks_exceptions.ConnectionRefused, c._get, self.href)
+        self.assertEqual(2, self.session.get.call_count)
+
+    def test_sleeps_for_retry_after(self):
+        self.session.get.side_effect = [
+            _response(429, {'Retry-After': '3'}), _response(200)
+        ]
+        c = self._get_client()
+        c._get(self.href)
+        c._retrier._sleep.assert_called_once_with(3.0)
+
+    def test_retry_budget_limits_retries(self):
+        self.session.get.return_value = _response(503)
+        c = self._get_client(budget_reserve=1, budget_ratio=0)
+        self.assertRaises(client.HTTPServerError, c._get, self.href)
+        self.assertRaises(client.HTTPServerError, c._get, self.href)
+        self.assertEqual(3, self.session.get.call_count)
+        stats = c.retry_statistics()
+        self.assertEqual(1, stats['retries'])
+        self.assertEqual(2, stats['budget_exhausted'])
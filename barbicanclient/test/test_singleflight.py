@@ -0,0 +1,92 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+
+import testtools
+
+from barbicanclient import singleflight
+
+
+class WhenTestingSingleFlight(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingSingleFlight, self).setUp()
+        self.flight = singleflight.SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _blocking_call(self, value):
+        self.calls.append(value)
+        self.release.wait()
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def _start_callers(self, count, key, value):
+        results = []
+
+        def caller():
+            try:
+                results.append(self.flight.do(key, self._blocking_call,
+                                              value))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        self._wait_for_coalesced(count - 1)
+        return threads, results
+
+    def _wait_for_coalesced(self, count):
+        deadline = time.time() + 5
+        while self.flight.statistics()['coalesced'] < count:
+            if time.time() > deadline:
+                self.fail('Callers were not coalesced.')
+            time.sleep(0.001)
+
+    def _finish(self, threads):
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_calls_share_one_result(self):
+        threads, results = self._start_callers(8, 'key', 'value')
+        self._finish(threads)
+
+        self.assertEqual(['value'], self.calls)
+        self.assertEqual(['value'] * 8, results)
+        self.assertEqual({'requests': 8, 'coalesced': 7},
+                         self.flight.statistics())
+
+    def test_concurrent_calls_share_the_exception(self):
+        error = ValueError('boom')
+        threads, results = self._start_callers(4, 'key', error)
+        self._finish(threads)
+
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual([error] * 4, results)
+
+    def test_different_keys_are_not_coalesced(self):
+        self.release.set()
+        self.flight.do('a', self._blocking_call, 1)
+        self.flight.do('b', self._blocking_call, 2)
+        self.assertEqual([1, 2], self.calls)
+
+    def test_result_is_not_kept_after_the_call(self):
+        self.release.set()
+        self.flight.do('key', self._blocking_call, 1)
+        self.flight.do('key', self._blocking_call, 2)
+        self.assertEqual([1, 2], self.calls)
+        self.assertEqual(0, self.flight.statistics()['coalesced'])
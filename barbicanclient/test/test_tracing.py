@@ -0,0 +1,153 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+import testtools
+
+from barbicanclient import client
+from barbicanclient import tracing
+
+
+class WhenTestingTracer(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingTracer, self).setUp()
+        self.exporter = tracing.InMemoryExporter()
+        self.tracer = tracing.Tracer(self.exporter)
+
+    def test_nested_spans_share_the_trace(self):
+        with self.tracer.start_span('parent', entity='secrets') as parent:
+            with self.tracer.start_span('child') as child:
+                self.assertIs(child, tracing.current_span())
+            self.assertIs(parent, tracing.current_span())
+        self.assertIsNone(tracing.current_span())
+
+        child, parent = self.exporter.get_finished_spans()
+        self.assertEqual(parent.trace_id, child.trace_id)
+        self.assertEqual(parent.span_id, child.parent_id)
+        self.assertIsNone(parent.parent_id)
+        self.assertEqual({'entity': 'secrets'}, parent.attributes)
+        self.assertEqual('OK', parent.status)
+        self.assertIsNotNone(parent.duration)
+
+    def test_span_is_marked_error_when_block_raises(self):
+        def fail():
+            with self.tracer.start_span('failing'):
+                raise ValueError('boom')
+
+        self.assertRaises(ValueError, fail)
+        span, = self.exporter.get_finished_spans()
+        self.assertEqual('ERROR', span.status)
+        self.assertIn('boom', span.error)
+
+    def test_exporter_errors_are_ignored(self):
+        exporter = mock.Mock()
+        exporter.export.side_effect = RuntimeError
+        with tracing.Tracer(exporter).start_span('span'):
+            pass
+        self.assertIsNone(tracing.current_span())
+
+    def test_use_span_restores_the_previous_span(self):
+        with self.tracer.start_span('parent') as parent:
+            with tracing.use_span(None):
+                self.assertIsNone(tracing.current_span())
+            self.assertIs(parent, tracing.current_span())
+
+    def test_clear_drops_finished_spans(self):
+        with self.tracer.start_span('span'):
+            pass
+        self.exporter.clear()
+        self.assertEqual([], self.exporter.get_finished_spans())
+
+    def test_tracing_is_disabled_without_a_tracer(self):
+        self.assertIsNone(tracing.get_tracer(mock.Mock(_tracer=None)))
+        self.assertIsNone(tracing.get_tracer(object()))
+
+    def test_accepts_any_object_with_start_span(self):
+        class AdapterTracer(object):
+            def start_span(self, name, **attributes):
+                pass
+
+        tracer = AdapterTracer()
+        self.assertIs(tracer, tracing.get_tracer(mock.Mock(_tracer=tracer)))
+
+
+class WhenTestingTracedClient(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenTestingTracedClient, self).setUp()
+        self.endpoint = 'http://localhost:9311'
+        self.secret_ref = (self.endpoint +
+                           '/v1/secrets/3b2a2c68-6c8b-4a59-a1e6-64e0d4a4fd5d')
+        self.container_ref = (
+            self.endpoint +
+            '/v1/containers/8d9c0a4e-4e6b-4f61-8d27-7c4b9f3a8e1a')
+        self.session = mock.MagicMock()
+        self.session.get_endpoint.return_value = self.endpoint
+        self.session.post.side_effect = self._post
+        self.exporter = tracing.InMemoryExporter()
+        self.client = client.Client(session=self.session, json_codec='json',
+                                    tracer=tracing.Tracer(self.exporter))
+
+    def _post(self, url, **kwargs):
+        resp = mock.MagicMock()
+        resp.status_code = 201
+        if '/secrets/' in url:
+            resp.json.return_value = {'secret_ref': self.secret_ref}
+        else:
+            resp.json.return_value = {'container_ref': self.container_ref}
+        return resp
+
+    def _spans_by_name(self):
+        spans = {}
+        for span in self.exporter.get_finished_spans():
+            spans.setdefault(span.name, []).append(span)
+        return spans
+
+    def test_container_store_has_child_spans(self):
+        container = self.client.containers.create(
+            name='container',
+            secrets={'a': self.client.secrets.create(payload='a'),
+                     'b': self.client.secrets.create(payload='b')})
+        container.store()
+
+        spans = self._spans_by_name()
+        store, = spans['Container.store']
+        self.assertEqual('containers', store.attributes['entity'])
+        self.assertEqual(self.container_ref, store.attributes['ref'])
+        self.assertEqual(2, len(spans['Secret.store']))
+        for secret_store in spans['Secret.store']:
+            self.assertEqual(store.span_id, secret_store.parent_id)
+            self.assertEqual(self.secret_ref,
+                             secret_store.attributes['ref'])
+        http_parents = [span.parent_id for span in spans['HTTP POST']]
+        self.assertEqual(3, len(http_parents))
+        self.assertIn(store.span_id, http_parents)
+        for span in spans['HTTP POST']:
+            self.assertEqual(201, span.attributes['http.status_code'])
+            self.assertEqual(store.trace_id, span.trace_id)
+
+    def test_failed_request_marks_the_spans_as_errors(self):
+        error = Exception('not found')
+        error.http_status = 404
+        self.session.delete.side_effect = error
+
+        self.assertRaises(Exception, self.client.secrets.delete,
+                          self.secret_ref)
+
+        spans = self._spans_by_name()
+        delete, = spans['SecretManager.delete']
+        request, = spans['HTTP DELETE']
+        self.assertEqual('ERROR', delete.status)
+        self.assertEqual(self.secret_ref, delete.attributes['ref'])
+        self.assertEqual(404, request.attributes['http.status_code'])
+        self.assertEqual('/v1/secrets/{uuid}', request.attributes['http.url'])
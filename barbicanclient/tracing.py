@@ -0,0 +1,206 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Tracing of the operations of the Barbican client.
+
+Spans follow the OpenTelemetry model: every span belongs to a trace, has a
+parent unless it is the root of the trace, carries attributes and ends with
+an OK or ERROR status.  Finished spans are handed to an exporter, which can
+forward them to a tracing system.
+"""
+import contextlib
+import functools
+import logging
+import random
+import threading
+import time
+
+import six
+
+
+LOG = logging.getLogger(__name__)
+
+_local = threading.local()
+# Attributes holding the reference of an entity, tried in order
+_REF_ATTRIBUTES = ('_secret_ref', '_container_ref', '_order_ref')
+
+
+def _new_id(bits):
+    return '{0:0{1}x}'.format(random.getrandbits(bits), bits // 4)
+
+
+class Span(object):
+    """
+    A timed operation.
+
+    :param name: Name of the operation
+    :param trace_id: Identifier shared by all the spans of a trace
+    :param parent_id: Identifier of the parent span, None for a root span
+    :param attributes: Attributes describing the operation
+    :param start_time: Time the operation started, in seconds
+    """
+
+    def __init__(self, name, trace_id, parent_id, attributes, start_time):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = start_time
+        self.end_time = None
+        self.status = 'UNSET'
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __repr__(self):
+        return 'Span(name="{0}", status={1})'.format(self.name, self.status)
+
+
+class InMemoryExporter(object):
+    """Keeps finished spans in memory, mostly useful in tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = []
+
+    def export(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self):
+        """Returns the finished spans in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            del self._spans[:]
+
+
+class Tracer(object):
+    """
+    Creates spans and exports them when they end.
+
+    :param exporter: Object with an export(span) method, called with every
+        finished span.  Exceptions raised by the exporter are logged and
+        ignored.
+    :param clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, exporter, clock=time.time):
+        self._exporter = exporter
+        self._clock = clock
+
+    @contextlib.contextmanager
+    def start_span(self, name, **attributes):
+        """
+        Opens a span, child of the current span of the calling thread.
+
+        The span is the current span until the block ends.  It is marked
+        ERROR if the block raises, OK otherwise.
+        """
+        parent = current_span()
+        if parent is None:
+            trace_id, parent_id = _new_id(128), None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        span = Span(name, trace_id, parent_id, attributes, self._clock())
+        _local.span = span
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'ERROR'
+            span.error = repr(e)
+            raise
+        else:
+            span.status = 'OK'
+        finally:
+            span.end_time = self._clock()
+            _local.span = parent
+            try:
+                self._exporter.export(span)
+            except Exception:
+                LOG.exception('Could not export span {0}'.format(span))
+
+
+def current_span():
+    """Returns the current span of the calling thread, if any."""
+    return getattr(_local, 'span', None)
+
+
+@contextlib.contextmanager
+def use_span(span):
+    """Makes span the current span of the calling thread in the block."""
+    previous = current_span()
+    _local.span = span
+    try:
+        yield span
+    finally:
+        _local.span = previous
+
+
+def get_tracer(api):
+    """
+    Returns the tracer of a client, or None when tracing is disabled.
+
+    Any object with a start_span method behaving like Tracer.start_span is
+    accepted, so adapters to other tracing libraries can be plugged in.
+    """
+    tracer = getattr(api, '_tracer', None)
+    return tracer if hasattr(tracer, 'start_span') else None
+
+
+def traced(func):
+    """
+    Runs a manager or entity method in a span when tracing is enabled.
+
+    The span is named after the class and the method, and carries the
+    entity type and the reference of the entity, taken from the entity or
+    from the first argument.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = get_tracer(self._api)
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        name = '{0}.{1}'.format(type(self).__name__, func.__name__)
+        with tracer.start_span(name, entity=self._entity) as span:
+            # Taken before and after, delete clears it and store sets it
+            span.set_attribute('ref', _get_ref(self, args, kwargs))
+            result = func(self, *args, **kwargs)
+            ref = _get_ref(self, args, kwargs)
+            if ref:
+                span.set_attribute('ref', ref)
+            return result
+    return wrapper
+
+
+def _get_ref(obj, args, kwargs):
+    for attribute in _REF_ATTRIBUTES:
+        ref = getattr(obj, attribute, None)
+        if ref:
+            return ref
+        ref = kwargs.get(attribute[1:])
+        if ref:
+            return ref
+    if args and isinstance(args[0], six.string_types):
+        return args[0]
+    return None
@@ -0,0 +1,64 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare secret retrieval throughput of the Client and the AsyncClient.
+
+Usage: python tools/benchmarks/bench_async_client.py [count] [latency]
+"""
+import asyncio
+import sys
+import time
+
+from barbicanclient import async_client
+from barbicanclient import client
+
+import fakes
+
+
+def bench_sync(refs, latency):
+    barbican = client.Client(session=fakes.LatencySession(latency),
+                             endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID)
+    start = time.time()
+    for ref in refs:
+        barbican.secrets.get(ref).name
+    return time.time() - start
+
+
+def bench_async(refs, latency, max_workers):
+    barbican = async_client.AsyncClient(
+        session=fakes.LatencySession(latency), endpoint=fakes.ENDPOINT,
+        project_id=fakes.PROJECT_ID, max_workers=max_workers)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start = time.time()
+    loop.run_until_complete(
+        asyncio.gather(*[barbican.secrets.get(ref) for ref in refs]))
+    elapsed = time.time() - start
+    barbican.close()
+    loop.close()
+    return elapsed
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 500
+    latency = float(argv[1]) if len(argv) > 1 else 0.005
+    refs = [fakes.secret_ref() for _ in range(count)]
+    fakes.report('Client.secrets.get', count, bench_sync(refs, latency))
+    for workers in (4, 16, 64):
+        fakes.report('AsyncClient.secrets.get ({0} workers)'.format(workers),
+                     count, bench_async(refs, latency, workers))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare resolving certificate containers member by member and with
+Container.load().
+
+Usage: python tools/benchmarks/bench_container_load.py [count] [latency]
+"""
+import sys
+import time
+
+from barbicanclient import client
+
+import fakes
+
+
+def _client(latency):
+    return client.Client(session=fakes.LatencySession(latency),
+                         endpoint=fakes.ENDPOINT,
+                         project_id=fakes.PROJECT_ID)
+
+
+def bench_sequential(refs, latency):
+    barbican = _client(latency)
+    start = time.time()
+    for ref in refs:
+        container = barbican.containers.get(ref)
+        for secret in container.secrets.values():
+            secret.payload
+    return time.time() - start
+
+
+def bench_load(refs, latency):
+    barbican = _client(latency)
+    start = time.time()
+    for ref in refs:
+        barbican.containers.get(ref).load()
+    return time.time() - start
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 50
+    latency = float(argv[1]) if len(argv) > 1 else 0.005
+    refs = [fakes.container_ref() for _ in range(count)]
+    fakes.report('certificate container, sequential', count,
+                 bench_sequential(refs, latency))
+    fakes.report('certificate container, load()', count,
+                 bench_load(refs, latency))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Report the memory held by each listed entity, measured with tracemalloc.
+
+The response dicts are built before measuring, so the figures only cover
+the entity objects and the values they keep.
+
+Usage: python tools/benchmarks/bench_entity_memory.py [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from barbicanclient import client
+from barbicanclient import secrets
+
+import fakes
+
+
+def _measure(build, items):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [build(item) for item in items]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / float(len(entities))
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 10000
+    barbican = client.Client(session=fakes.LatencySession(latency=0),
+                             endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID)
+
+    secret_items = [fakes.secret_dict() for _ in range(count)]
+    per_secret = _measure(
+        lambda item: secrets.Secret(api=barbican, **item), secret_items)
+    print('{0:<40} {1:>10.1f} bytes'.format('Secret', per_secret))
+
+    container_items = [fakes.certificate_container_dict()
+                       for _ in range(count)]
+    per_container = _measure(
+        lambda item: barbican.containers._generate_typed_container(
+            dict(item)),
+        container_items)
+    print('{0:<40} {1:>10.1f} bytes'.format(
+        'CertificateContainer with 4 secrets', per_container))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the installed JSON codecs on 100 item list pages, store bodies and
+error bodies.
+
+Usage: python tools/benchmarks/bench_json_codecs.py [iterations]
+"""
+import json
+import sys
+import time
+
+from barbicanclient import codec
+
+import fakes
+
+
+def _payloads():
+    secrets_page = json.dumps({
+        'secrets': [fakes.secret_dict() for _ in range(100)],
+        'total': 1000,
+    }).encode('utf-8')
+    containers_page = json.dumps({
+        'containers': [fakes.certificate_container_dict()
+                       for _ in range(100)],
+        'total': 1000,
+    }).encode('utf-8')
+    error_body = json.dumps({
+        'code': 404, 'title': 'Not Found',
+        'description': 'Not Found. Sorry but your secret is in another '
+                       'castle.',
+    }).encode('utf-8')
+    store_body = {
+        'name': 'benchmark secret', 'payload': 'c2VjcmV0' * 64,
+        'payload_content_type': 'application/octet-stream',
+        'payload_content_encoding': 'base64', 'algorithm': 'aes',
+        'bit_length': 256, 'mode': 'cbc',
+        'expiration': '2030-01-15T18:25:32.573932',
+    }
+    return secrets_page, containers_page, error_body, store_body
+
+
+def bench(func, arg, iterations):
+    start = time.time()
+    for _ in range(iterations):
+        func(arg)
+    return time.time() - start
+
+
+def main(argv):
+    iterations = int(argv[0]) if argv else 1000
+    secrets_page, containers_page, error_body, store_body = _payloads()
+    for name in codec.available_codecs():
+        json_codec = codec.get_codec(name)
+        fakes.report('{0} decode secrets page'.format(name), iterations,
+                     bench(json_codec.loads, secrets_page, iterations))
+        fakes.report('{0} decode containers page'.format(name), iterations,
+                     bench(json_codec.loads, containers_page, iterations))
+        fakes.report('{0} decode error body'.format(name), iterations,
+                     bench(json_codec.loads, error_body, iterations))
+        fakes.report('{0} encode store body'.format(name), iterations,
+                     bench(json_codec.dumps, store_body, iterations))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
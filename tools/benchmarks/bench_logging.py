@@ -0,0 +1,65 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the cost of logging a secret request body with DEBUG disabled,
+formatting the message eagerly and with the structured logging helpers.
+
+Usage: python tools/benchmarks/bench_logging.py [count]
+"""
+import logging
+import sys
+import time
+
+from barbicanclient import _logging
+
+import fakes
+
+
+LOG = logging.getLogger('barbicanclient.benchmark')
+
+
+def bench_eager(count, body):
+    start = time.time()
+    for _ in range(count):
+        LOG.debug("Request body: {0}".format(body))
+    return time.time() - start
+
+
+def bench_structured(count, body):
+    start = time.time()
+    for _ in range(count):
+        _logging.debug(LOG, 'secret.store', body=body)
+    return time.time() - start
+
+
+def bench_nothing(count, body):
+    start = time.time()
+    for _ in range(count):
+        pass
+    return time.time() - start
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 100000
+    LOG.setLevel(logging.INFO)
+    body = fakes.secret_dict()
+    body['payload'] = 'x' * 1024
+    fakes.report('no logging call', count, bench_nothing(count, body))
+    fakes.report('eager str.format, DEBUG off', count,
+                 bench_eager(count, body))
+    fakes.report('structured, DEBUG off', count,
+                 bench_structured(count, body))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,49 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measure the cost of request hooks on secret retrieval, without network
+latency so only the client work is timed.
+
+Usage: python tools/benchmarks/bench_request_hooks.py [count]
+"""
+import sys
+import time
+
+from barbicanclient import client
+
+import fakes
+
+
+def bench(count, hooks):
+    barbican = client.Client(session=fakes.LatencySession(latency=0),
+                             endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID)
+    for hook in hooks:
+        barbican.add_request_hook(hook)
+    refs = [fakes.secret_ref() for _ in range(count)]
+    start = time.time()
+    for ref in refs:
+        barbican.secrets.get(ref).name
+    return time.time() - start
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 5000
+    events = []
+    fakes.report('no hook', count, bench(count, []))
+    fakes.report('one no-op hook', count, bench(count, [lambda e: None]))
+    fakes.report('collecting hook', count, bench(count, [events.append]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
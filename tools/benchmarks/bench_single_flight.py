@@ -0,0 +1,77 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Hammer one secret from many threads at once, the way a cold process does,
+with and without GET coalescing.
+
+Usage: python tools/benchmarks/bench_single_flight.py [threads] [latency]
+"""
+import sys
+import threading
+import time
+
+from barbicanclient import client
+
+import fakes
+
+
+class CountingSession(fakes.LatencySession):
+
+    def __init__(self, latency):
+        super(CountingSession, self).__init__(latency)
+        self._lock = threading.Lock()
+        self.gets = 0
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        with self._lock:
+            self.gets += 1
+        return super(CountingSession, self).get(url, params, headers,
+                                                **kwargs)
+
+
+def bench(threads, latency, coalesce_requests):
+    session = CountingSession(latency)
+    barbican = client.Client(session=session, endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID,
+                             coalesce_requests=coalesce_requests)
+    ref = fakes.secret_ref()
+    start_line = threading.Event()
+
+    def worker():
+        start_line.wait()
+        secret = barbican.secrets.get(ref)
+        secret.name
+        secret.payload
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    start = time.time()
+    start_line.set()
+    for thread in workers:
+        thread.join()
+    return time.time() - start, session.gets
+
+
+def main(argv):
+    threads = int(argv[0]) if argv else 50
+    latency = float(argv[1]) if len(argv) > 1 else 0.05
+    for label, coalesce_requests in (('GET per thread', False),
+                                     ('coalesced GETs', True)):
+        elapsed, gets = bench(threads, latency, coalesce_requests)
+        fakes.report(label, threads, elapsed)
+        print('{0:<40} {1:>8} HTTP GETs'.format('', gets))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compare the peak memory of storing a large payload inline in the JSON body
+and streaming it from a file.
+
+Usage: python tools/benchmarks/bench_streamed_upload.py [megabytes]
+"""
+import base64
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from barbicanclient import client
+
+import fakes
+
+
+def _peak(store):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    store()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - base) / 1024.0 / 1024.0
+
+
+def main(argv):
+    megabytes = int(argv[0]) if argv else 32
+    barbican = client.Client(session=fakes.LatencySession(latency=0),
+                             endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID)
+    with tempfile.NamedTemporaryFile() as payload_file:
+        payload_file.write(os.urandom(megabytes * 1024 * 1024))
+        payload_file.flush()
+
+        def store_inline():
+            payload_file.seek(0)
+            barbican.secrets.create(
+                payload=base64.b64encode(payload_file.read()).decode('ascii'),
+                payload_content_type='application/octet-stream',
+                payload_content_encoding='base64').store()
+
+        def store_streamed():
+            with open(payload_file.name, 'rb') as fobj:
+                barbican.secrets.create(payload=fobj).store()
+
+        print('{0:<40} {1:>8.1f} MiB'.format(
+            '{0} MiB payload, inline'.format(megabytes), _peak(store_inline)))
+        print('{0:<40} {1:>8.1f} MiB'.format(
+            '{0} MiB payload, streamed'.format(megabytes),
+            _peak(store_streamed)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measure how secret retrieval scales with the number of threads sharing a
+client created with thread_safe=True.
+
+Every thread loads the metadata and payload of its own secrets through a
+keystone Session whose transport answers after a fixed delay, so the
+throughput should grow linearly with the number of threads until the CPU
+time spent per request saturates the interpreter.
+
+Usage: python tools/benchmarks/bench_thread_scaling.py [secrets] [latency]
+"""
+import json
+import sys
+import threading
+import time
+
+from keystoneclient import session as ks_session
+import requests
+from requests import adapters
+
+from barbicanclient import client
+
+import fakes
+
+
+class LatencyAdapter(adapters.BaseAdapter):
+
+    def __init__(self, latency):
+        super(LatencyAdapter, self).__init__()
+        self.latency = latency
+
+    def send(self, request, **kwargs):
+        time.sleep(self.latency)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = request.url
+        resp.request = request
+        if request.headers.get('Accept') == 'application/json':
+            resp._content = json.dumps(
+                fakes.secret_dict(ref=request.url)).encode('utf-8')
+        else:
+            resp._content = b'\x00' * 32
+        return resp
+
+    def close(self):
+        pass
+
+
+def bench(threads, secrets_per_thread, latency):
+    session = ks_session.Session()
+    session.session.mount('http://', LatencyAdapter(latency))
+    barbican = client.Client(session=session, endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID, thread_safe=True)
+    refs = [[fakes.secret_ref() for _ in range(secrets_per_thread)]
+            for _ in range(threads)]
+    errors = []
+
+    def worker(thread_refs):
+        for ref in thread_refs:
+            secret = barbican.secrets.get(ref)
+            if secret.secret_ref != ref or len(secret.payload) != 32:
+                errors.append(ref)
+
+    workers = [threading.Thread(target=worker, args=(thread_refs,))
+               for thread_refs in refs]
+    start = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.time() - start
+    if errors:
+        raise AssertionError('{0} secrets were wrong'.format(len(errors)))
+    return elapsed
+
+
+def main(argv):
+    secrets_per_thread = int(argv[0]) if argv else 5
+    latency = float(argv[1]) if len(argv) > 1 else 0.05
+    for threads in (1, 10, 25, 50, 100, 200):
+        fakes.report('{0} threads'.format(threads),
+                     threads * secrets_per_thread,
+                     bench(threads, secrets_per_thread, latency))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measure the cost of building a 100 item SecretManager.list page.
+
+The eager figures read every timestamp right after the listing, which is
+what constructing the entities used to cost.
+
+Usage: python tools/benchmarks/bench_timestamps.py [iterations]
+"""
+import sys
+import time
+
+from oslo.utils import timeutils
+
+from barbicanclient import base
+from barbicanclient import client
+
+import fakes
+
+
+def bench_list(barbican, iterations, read_timestamps):
+    start = time.time()
+    for _ in range(iterations):
+        for secret in barbican.secrets.list(limit=100):
+            if read_timestamps:
+                secret.created
+                secret.updated
+                secret.expiration
+    return time.time() - start
+
+
+def bench_parse(parse, iterations):
+    value = fakes.secret_dict()['created']
+    start = time.time()
+    for _ in range(iterations):
+        parse(value)
+    return time.time() - start
+
+
+def main(argv):
+    iterations = int(argv[0]) if argv else 200
+    barbican = client.Client(session=fakes.LatencySession(latency=0),
+                             endpoint=fakes.ENDPOINT,
+                             project_id=fakes.PROJECT_ID)
+    fakes.report('list page, timestamps read (eager)', iterations,
+                 bench_list(barbican, iterations, True))
+    fakes.report('list page, timestamps unread (lazy)', iterations,
+                 bench_list(barbican, iterations, False))
+    fakes.report('oslo.utils parse_isotime', iterations * 100,
+                 bench_parse(timeutils.parse_isotime, iterations * 100))
+    fakes.report('base.parse_timestamp', iterations * 100,
+                 bench_parse(base.parse_timestamp, iterations * 100))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
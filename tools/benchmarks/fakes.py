@@ -0,0 +1,139 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Fakes shared by the benchmark scripts.
+"""
+import json
+import time
+import uuid
+
+import requests
+
+ENDPOINT = 'http://localhost:9311'
+PROJECT_ID = 'benchmark'
+
+
+def secret_ref():
+    return '{0}/v1/secrets/{1}'.format(ENDPOINT, uuid.uuid4())
+
+
+def secret_dict(ref=None, name='benchmark secret'):
+    return {
+        'secret_ref': ref or secret_ref(),
+        'name': name,
+        'status': 'ACTIVE',
+        'algorithm': 'aes',
+        'bit_length': 256,
+        'mode': 'cbc',
+        'content_types': {'default': 'application/octet-stream'},
+        'created': '2015-01-15T18:25:32.573932',
+        'updated': '2015-01-15T18:25:32.573932',
+        'expiration': '2030-01-15T18:25:32.573932',
+    }
+
+
+def container_ref():
+    return '{0}/v1/containers/{1}'.format(ENDPOINT, uuid.uuid4())
+
+
+def certificate_container_dict(ref=None):
+    names = ('certificate', 'private_key', 'private_key_passphrase',
+             'intermediates')
+    return {
+        'container_ref': ref or container_ref(),
+        'name': 'benchmark container',
+        'type': 'certificate',
+        'status': 'ACTIVE',
+        'created': '2015-01-15T18:25:32.573932',
+        'updated': '2015-01-15T18:25:32.573932',
+        'secret_refs': [{'name': name, 'secret_ref': secret_ref()}
+                        for name in names],
+        'consumers': [],
+    }
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, body=None, content=None):
+        self.status_code = status_code
+        self._body = body
+        self.content = content if content is not None else json.dumps(body)
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class LatencySession(object):
+    """Keystone Session look-alike that answers after a fixed delay."""
+
+    auth = None
+
+    def __init__(self, latency=0.005, payload=b'\x00' * 32):
+        self.latency = latency
+        self.payload = payload
+        # Copied per thread by thread-safe clients; never sends anything
+        self.session = requests.Session()
+
+    def get_endpoint(self, **kwargs):
+        return ENDPOINT
+
+    def _respond(self, resp):
+        if self.latency:
+            time.sleep(self.latency)
+        return resp
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        headers = headers or {}
+        if headers.get('Accept', 'application/json') != 'application/json':
+            return self._respond(FakeResponse(200, content=self.payload))
+        entity = url.rstrip('/').split('/')[-1]
+        if params is not None and entity in ('secrets', 'containers',
+                                             'orders'):
+            limit = params.get('limit', 10)
+            body = {entity: [secret_dict() for _ in range(limit)]
+                    if entity == 'secrets' else [],
+                    'total': 1000}
+            return self._respond(FakeResponse(200, body))
+        if '/containers/' in url:
+            return self._respond(
+                FakeResponse(200, certificate_container_dict(ref=url)))
+        return self._respond(FakeResponse(200, secret_dict(ref=url)))
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        return self._respond(FakeResponse(201, {'secret_ref': secret_ref()}))
+
+    def put(self, url, data=None, headers=None, **kwargs):
+        # Consume the body the way requests would, one block at a time
+        if hasattr(data, 'read'):
+            while data.read(8192):
+                pass
+        elif data is not None and not isinstance(data, bytes):
+            for _ in data:
+                pass
+        return self._respond(FakeResponse(204, content=b''))
+
+    def delete(self, url, headers=None, json=None, **kwargs):
+        return self._respond(FakeResponse(204, content=b''))
+
+
+def report(label, count, elapsed):
+    print('{0:<40} {1:>8} ops {2:>8.3f}s {3:>10.1f} ops/s'.format(
+        label, count, elapsed, count / elapsed))
@@ -0,0 +1,46 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from . import common
+
+
+class Containers(common.ServerBenchmark):
+
+    params = ['generic', 'rsa', 'certificate']
+    param_names = ['container_type']
+
+    def setup(self, container_type):
+        super(Containers, self).setup(container_type)
+        secrets = [self.client.secrets.get(ref)
+                   for ref in self.store_secrets(3)]
+        self.secrets = dict(zip(['a', 'b', 'c'], secrets))
+        self.ref = self._create(container_type).store()
+
+    def _create(self, container_type):
+        containers = self.client.containers
+        a, b, c = self.secrets['a'], self.secrets['b'], self.secrets['c']
+        if container_type == 'rsa':
+            return containers.create_rsa(name='rsa', public_key=a,
+                                         private_key=b,
+                                         private_key_passphrase=c)
+        if container_type == 'certificate':
+            return containers.create_certificate(name='certificate',
+                                                 certificate=a,
+                                                 private_key=b,
+                                                 intermediates=c)
+        return containers.create(name='generic', secrets=self.secrets)
+
+    def time_create(self, container_type):
+        self._create(container_type).store()
+
+    def time_get(self, container_type):
+        self.client.containers.get(self.ref).name
@@ -0,0 +1,28 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from . import common
+
+
+class ListSecrets(common.ServerBenchmark):
+
+    # Barbican returns at most 100 entities per page
+    params = [10, 50, 100]
+    param_names = ['limit']
+    repeat = 20
+
+    def setup(self, limit):
+        super(ListSecrets, self).setup(limit)
+        self.store_secrets(1000)
+
+    def time_list(self, limit):
+        self.client.secrets.list(limit=limit)
@@ -0,0 +1,31 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from . import common
+
+
+class Orders(common.ServerBenchmark):
+
+    def setup(self):
+        super(Orders, self).setup()
+        for _ in range(10):
+            self._create().submit()
+
+    def _create(self):
+        return self.client.orders.create_key(name='key', algorithm='aes',
+                                             bit_length=256)
+
+    def time_submit(self):
+        self._create().submit()
+
+    def time_list(self):
+        self.client.orders.list()
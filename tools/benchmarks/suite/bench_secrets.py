@@ -0,0 +1,36 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from . import common
+
+
+class Secrets(common.ServerBenchmark):
+
+    def setup(self):
+        super(Secrets, self).setup()
+        # Used up by time_delete, one secret per sample
+        self.refs = self.store_secrets(self.repeat * 2)
+        self.ref = self.refs[0]
+
+    def time_store(self):
+        self.client.secrets.create(
+            name='stored', payload='payload',
+            payload_content_type='text/plain').store()
+
+    def time_get(self):
+        self.client.secrets.get(self.ref).name
+
+    def time_payload(self):
+        self.client.secrets.get(self.ref, 'text/plain').payload
+
+    def time_delete(self):
+        self.client.secrets.delete(self.refs.pop())
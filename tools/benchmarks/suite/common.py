@@ -0,0 +1,49 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Helpers shared by the benchmarks of the suite.
+"""
+from barbicanclient import client
+from barbicanclient import fake_barbican
+
+
+class ServerBenchmark(object):
+    """
+    Runs a FakeBarbicanServer and a Client talking to it for a benchmark.
+
+    Every timed call is a full request over a local socket, so the results
+    cover the client, the session and the HTTP stack but no real Barbican.
+    """
+
+    # Every call changes the server state, time each call once
+    number = 1
+    repeat = 50
+    warmup_time = 0
+    timeout = 120
+
+    def setup(self, *params):
+        self.server = fake_barbican.FakeBarbicanServer().start()
+        self.client = client.Client(endpoint=self.server.endpoint,
+                                    project_id='benchmark')
+
+    def teardown(self, *params):
+        self.server.stop()
+
+    def store_secrets(self, count, name='benchmark'):
+        """Stores count secrets with a payload and returns their refs."""
+        return [
+            self.client.secrets.create(
+                name=name, payload='payload',
+                payload_content_type='text/plain').store()
+            for _ in range(count)
+        ]